@@ -1,11 +1,12 @@
 from __future__ import annotations
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas, schema_types
 from app.api import deps
+from app.utilities import set_cursor_header
 
 router = APIRouter()
 
@@ -14,6 +15,7 @@ router = APIRouter()
 def read_all_project_resource_activities(
     *,
     db: Session = Depends(deps.get_db),
+    response: Response,
     project_id: str,
     match: Optional[str] = None,
     state: Optional[schema_types.StateType] = None,
@@ -23,6 +25,7 @@ def read_all_project_resource_activities(
     excludeComplete: bool = True,
     prioritised: bool = True,
     page: int = 0,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -34,25 +37,34 @@ def read_all_project_resource_activities(
             status_code=400,
             detail="Either project does not exist, or user does not have the rights for this request.",
         )
-    return crud.resource.get_multi(
-        db=db,
-        user=current_user,
-        project_obj=project_obj,
-        match=match,
-        state=state,
-        date_from=date_from,
-        date_to=date_to,
-        alert=alert,
-        excludeComplete=excludeComplete,
-        prioritised=prioritised,
-        page=page,
+    try:
+        db_objs = crud.resource.get_multi(
+            db=db,
+            user=current_user,
+            project_obj=project_obj,
+            match=match,
+            state=state,
+            date_from=date_from,
+            date_to=date_to,
+            alert=alert,
+            excludeComplete=excludeComplete,
+            prioritised=prioritised,
+            page=page,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_cursor_header(
+        response=response, cursor=crud.resource.get_next_cursor(db=db, db_objs=db_objs, prioritised=prioritised)
     )
+    return db_objs
 
 
 @router.get("/task/{task_id}", response_model=list[schemas.ResourceActivitySummary])
 def read_all_task_resource_activities(
     *,
     db: Session = Depends(deps.get_db),
+    response: Response,
     task_id: str,
     match: Optional[str] = None,
     state: Optional[schema_types.StateType] = None,
@@ -62,6 +74,7 @@ def read_all_task_resource_activities(
     excludeComplete: bool = True,
     prioritised: bool = True,
     page: int = 0,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -73,19 +86,27 @@ def read_all_task_resource_activities(
             status_code=400,
             detail="Either task does not exist, or user does not have the rights for this request.",
         )
-    return crud.resource.get_multi(
-        db=db,
-        user=current_user,
-        task_obj=task_obj,
-        match=match,
-        state=state,
-        date_from=date_from,
-        date_to=date_to,
-        alert=alert,
-        excludeComplete=excludeComplete,
-        prioritised=prioritised,
-        page=page,
+    try:
+        db_objs = crud.resource.get_multi(
+            db=db,
+            user=current_user,
+            task_obj=task_obj,
+            match=match,
+            state=state,
+            date_from=date_from,
+            date_to=date_to,
+            alert=alert,
+            excludeComplete=excludeComplete,
+            prioritised=prioritised,
+            page=page,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_cursor_header(
+        response=response, cursor=crud.resource.get_next_cursor(db=db, db_objs=db_objs, prioritised=prioritised)
     )
+    return db_objs
 
 
 @router.get("/report", response_model=schemas.ReportData)
@@ -140,6 +161,7 @@ def read_report(
 def read_all_resource_activities(
     *,
     db: Session = Depends(deps.get_db),
+    response: Response,
     match: Optional[str] = None,
     state: Optional[schema_types.StateType] = None,
     date_from: Optional[str] = None,
@@ -148,20 +170,29 @@ def read_all_resource_activities(
     excludeComplete: bool = True,
     prioritised: bool = True,
     page: int = 0,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get all resources and activity messages for this researcher.
     """
-    return crud.resource.get_multi(
-        db=db,
-        user=current_user,
-        match=match,
-        state=state,
-        date_from=date_from,
-        date_to=date_to,
-        alert=alert,
-        excludeComplete=excludeComplete,
-        prioritised=prioritised,
-        page=page,
+    try:
+        db_objs = crud.resource.get_multi(
+            db=db,
+            user=current_user,
+            match=match,
+            state=state,
+            date_from=date_from,
+            date_to=date_to,
+            alert=alert,
+            excludeComplete=excludeComplete,
+            prioritised=prioritised,
+            page=page,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_cursor_header(
+        response=response, cursor=crud.resource.get_next_cursor(db=db, db_objs=db_objs, prioritised=prioritised)
     )
+    return db_objs
@@ -25,6 +25,8 @@ async def create_or_edit_crosswalk(*, db: Session = Depends(deps.get_db), id: st
     resource_obj = None
     crosswalk_obj = None
     crosswalk_dfn = None
+    sample = None
+    preview_steps = []
     success = False
     # 1. Open the socket and validate current user
     #    The principle: load an existing reference. User cannot change the schemas. That is done from the resource as
@@ -79,6 +81,8 @@ async def create_or_edit_crosswalk(*, db: Session = Depends(deps.get_db), id: st
                 try:
                     # INITIALISE CROSSWALK ####################################################
                     if state == "initialiseCrosswalk":
+                        sample = None
+                        preview_steps = []
                         # Used to reinitialise
                         crosswalk_dfn = crud.reference.get_crosswalk_definition(
                             db_obj=resource_obj, refresh_schema=True
@@ -86,6 +90,8 @@ async def create_or_edit_crosswalk(*, db: Session = Depends(deps.get_db), id: st
                         initialised = True
                     # LOAD CROSSWALK ##########################################################
                     if state == "loadCrosswalk":
+                        sample = None
+                        preview_steps = []
                         # For local versions that have yet to be saved
                         crosswalk_dfn = crud.reference.get_crosswalk_definition(
                             db_obj=resource_obj, refresh_schema=True
@@ -124,6 +130,19 @@ async def create_or_edit_crosswalk(*, db: Session = Depends(deps.get_db), id: st
                     # SET CITATION #####################################################
                     if state == "setCitation" and initialised:
                         crosswalk_dfn.set_sitation(citation=data)
+                    # PREVIEW TRANSFORM #################################################
+                    if state == "previewTransform" and initialised:
+                        # Crosswalk a sample of the source, reapplying only the actions after the first change
+                        if sample is None:
+                            sample = crud.reference.get_preview_sample(
+                                resource_obj=resource_obj, crosswalk_dfn=crosswalk_dfn
+                            )
+                        response["data"] = {"preview": []}
+                        if sample is not None:
+                            rows, preview_steps = crud.reference.preview_transform(
+                                crosswalk_dfn=crosswalk_dfn, sample=sample, steps=preview_steps
+                            )
+                            response["data"] = {"preview": rows}
                     # SAVE AND CREATE CROSSWALK REFERENCE #################################
                     if state == "save" and initialised:
                         # This will close the socket, if it succeeds
@@ -168,7 +187,7 @@ async def create_or_edit_crosswalk(*, db: Session = Depends(deps.get_db), id: st
                         if crosswalk_obj:
                             response["data"] = {"id": str(crosswalk_obj.id)}
                         break
-                    if state and initialised and state not in ["setMetadata"]:
+                    if state and initialised and state not in ["setMetadata", "previewTransform"]:
                         data = []
                         for action in crosswalk_dfn.actions.get_all():
                             uuid = action.uuid
@@ -2,17 +2,17 @@ from __future__ import annotations
 from typing import Any, List
 from pydantic import ValidationError
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import StreamingResponse
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, status, Form
+from fastapi.responses import Response, StreamingResponse, FileResponse, RedirectResponse
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, status, Form, Request
 from sqlalchemy.orm import Session
+import hashlib
 import json
-import io
 
-from app import crud, models, schemas, schema_types
+from app import crud, models, schemas, schema_types, utilities
 from app.core.celery_app import celery_app
 from app.api import deps
-
-# from app.core.config import settings
+from app.core.config import settings
+from app.core.security import verify_presigned_token
 
 router = APIRouter()
 
@@ -47,7 +47,7 @@ async def create_upload_files(
         except ValueError as e:
             raise HTTPException(
                 status_code=400,
-                detail=e,
+                detail=str(e),
             )
         datasource_in = json.loads(datasource_in.model_dump_json(by_alias=True, exclude_unset=True))
         celery_app.send_task("app.worker.process_data_import", args=[current_user.id, datasource_in, sourceURL, None])
@@ -90,7 +90,7 @@ async def create_upload_files_for_task(
         except ValueError as e:
             raise HTTPException(
                 status_code=400,
-                detail=e,
+                detail=str(e),
             )
         # datasource_in = json.loads(datasource_in.model_dump(mode="json", by_alias=True))
         datasource_in = json.loads(datasource_in.model_dump_json(by_alias=True, exclude_unset=True))
@@ -102,11 +102,230 @@ async def create_upload_files_for_task(
     }
 
 
+def get_upload_session(db: Session, *, id: str, user: models.User) -> models.UploadSession:
+    # An upload session still able to receive chunks
+    db_obj = crud.upload.get(db=db, id=id, user=user)
+    if not db_obj:
+        raise HTTPException(
+            status_code=400,
+            detail="Either the upload does not exist, or you do not have the rights for this request.",
+        )
+    if crud.upload.is_expired(db_obj=db_obj):
+        crud.upload.abort(db=db, db_obj=db_obj)
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Upload has expired. Start it again.")
+    return db_obj
+
+
+@router.post("/upload/session", response_model=schemas.UploadSession)
+def create_upload_session(
+    *,
+    db: Session = Depends(deps.get_db),
+    obj_in: schemas.UploadSessionCreate,
+    current_user: models.User = Depends(deps.get_subscribed_user),
+) -> Any:
+    """
+    Start a resumable upload of a single source file. Chunks are then uploaded with `PUT`, at their byte offsets, in
+    any order and in parallel, and the upload finalized once complete.
+    """
+    if obj_in.task_id:
+        task_obj = crud.task.get(
+            db=db, id=obj_in.task_id, user=current_user, responsibility=schema_types.RoleType.CURATOR
+        )
+        if not task_obj:
+            raise HTTPException(
+                status_code=400,
+                detail="Either the task does not exist, or you do not have the rights for this request.",
+            )
+        if not obj_in.sourceURL:
+            obj_in.sourceURL = task_obj.source
+    try:
+        db_obj = crud.upload.create(db=db, obj_in=obj_in, user=current_user)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return crud.upload.get_status(db_obj=db_obj)
+
+
+@router.put("/upload/session/{id}", response_model=schemas.UploadSession)
+def upload_session_chunk(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: str,
+    offset: int,
+    data: bytes = Depends(deps.get_request_body),
+    current_user: models.User = Depends(deps.get_subscribed_user),
+) -> Any:
+    """
+    Upload a chunk of a resumable upload, as the raw request body, starting at `offset` bytes.
+    """
+    db_obj = get_upload_session(db=db, id=id, user=current_user)
+    try:
+        db_obj = crud.upload.write_chunk(db=db, db_obj=db_obj, offset=offset, data=data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return crud.upload.get_status(db_obj=db_obj)
+
+
+@router.get("/upload/session/{id}", response_model=schemas.UploadSession)
+def read_upload_session(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: str,
+    current_user: models.User = Depends(deps.get_subscribed_user),
+) -> Any:
+    """
+    Get the status of a resumable upload, including any byte ranges still missing.
+    """
+    db_obj = get_upload_session(db=db, id=id, user=current_user)
+    return crud.upload.get_status(db_obj=db_obj)
+
+
+@router.post("/upload/session/{id}/finalize", response_model=schemas.Msg, status_code=status.HTTP_202_ACCEPTED)
+def finalize_upload_session(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: str,
+    checksum: str | None = None,
+    current_user: models.User = Depends(deps.get_subscribed_user),
+) -> Any:
+    """
+    Finalize a resumable upload. The assembled source must match its Blake2b `checksum` (given here, or when the upload
+    was started) before it is imported. It is verified, and imported, in the background.
+    """
+    db_obj = get_upload_session(db=db, id=id, user=current_user)
+    try:
+        checksum = crud.upload.validate(db_obj=db_obj, checksum=checksum)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    celery_app.send_task("app.worker.process_upload_import", args=[current_user.id, id, checksum])
+    return {
+        "msg": "Source file successfully uploaded. Check your activity log to see when it's ready to process further."
+    }
+
+
+@router.delete("/upload/session/{id}", response_model=schemas.Msg)
+def abort_upload_session(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: str,
+    current_user: models.User = Depends(deps.get_subscribed_user),
+) -> Any:
+    """
+    Abandon a resumable upload, and delete everything received so far.
+    """
+    db_obj = crud.upload.get(db=db, id=id, user=current_user)
+    if not db_obj:
+        raise HTTPException(
+            status_code=400,
+            detail="Either the upload does not exist, or you do not have the rights for this request.",
+        )
+    crud.upload.abort(db=db, db_obj=db_obj)
+    return {"msg": "Upload abandoned."}
+
+
+@router.post("/upload/presigned", response_model=schemas.PresignedUpload)
+def create_presigned_upload(
+    *,
+    db: Session = Depends(deps.get_db),
+    obj_in: schemas.UploadSessionCreate,
+    current_user: models.User = Depends(deps.get_subscribed_user),
+) -> Any:
+    """
+    Get a short-lived presigned URL to upload a single source file directly to storage, bypassing the API. `POST` the
+    returned `fields`, and then the `file`, as `multipart/form-data`, then call `complete` to import the source.
+    """
+    if obj_in.task_id:
+        task_obj = crud.task.get(
+            db=db, id=obj_in.task_id, user=current_user, responsibility=schema_types.RoleType.CURATOR
+        )
+        if not task_obj:
+            raise HTTPException(
+                status_code=400,
+                detail="Either the task does not exist, or you do not have the rights for this request.",
+            )
+        if not obj_in.sourceURL:
+            obj_in.sourceURL = task_obj.source
+    try:
+        db_obj = crud.upload.create(db=db, obj_in=obj_in, user=current_user, presigned=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return crud.upload.get_presigned(db_obj=db_obj)
+
+
+@router.post("/upload/presigned/{id}/complete", response_model=schemas.Msg)
+def complete_presigned_upload(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: str,
+    current_user: models.User = Depends(deps.get_subscribed_user),
+) -> Any:
+    """
+    Completion callback for a presigned upload. The source is fetched, verified against its checksum (if one was
+    given), and imported in the background.
+    """
+    db_obj = crud.upload.get(db=db, id=id, user=current_user)
+    if not db_obj:
+        raise HTTPException(
+            status_code=400,
+            detail="Either the upload does not exist, or you do not have the rights for this request.",
+        )
+    sourceURL = db_obj.sourceURL
+    task_id = db_obj.task_id
+    checksum = db_obj.checksum
+    datasource_in = crud.upload.complete(db=db, db_obj=db_obj)
+    datasource_in = json.loads(datasource_in.model_dump_json(by_alias=True, exclude_unset=True))
+    celery_app.send_task(
+        "app.worker.process_data_import", args=[current_user.id, datasource_in, sourceURL, task_id, id, checksum]
+    )
+    return {
+        "msg": "Source file successfully uploaded. Check your activity log to see when it's ready to process further."
+    }
+
+
+@router.get("/presigned/{token}", response_class=FileResponse)
+def read_presigned_download(*, token: str) -> Any:
+    """
+    Local stand-in for a presigned storage download, used when sources are not stored in Spaces.
+    """
+    payload = verify_presigned_token(token=token, method="GET")
+    source_path = crud.files.directory / payload["key"] if payload else None
+    if not source_path or not crud.files.core.check_source(source=source_path):
+        raise HTTPException(status_code=403, detail="Presigned URL is invalid or has expired.")
+    return FileResponse(
+        source_path,
+        media_type="application/octet-stream",
+        filename=payload.get("filename") or payload["key"],
+    )
+
+
+@router.post("/presigned/{token}", response_model=schemas.Msg)
+async def create_presigned_upload_file(*, token: str, file: UploadFile = File(...)) -> Any:
+    """
+    Local stand-in for a presigned storage upload, used when sources are not stored in Spaces. The file must be
+    exactly the size declared when the URL was issued.
+    """
+    payload = verify_presigned_token(token=token, method="POST")
+    if not payload:
+        raise HTTPException(status_code=403, detail="Presigned URL is invalid or has expired.")
+    upload_path = crud.files.get_upload_path(upload_id=payload["key"])
+    size = 0
+    with open(upload_path, "wb") as f:
+        while chunk := await file.read(settings.CHUNK_SIZE):
+            size += len(chunk)
+            if size > payload["max_bytes"]:
+                break
+            f.write(chunk)
+    if size != payload["max_bytes"]:
+        crud.files.delete_upload(upload_id=payload["key"])
+        raise HTTPException(status_code=400, detail="Upload does not match the declared size.")
+    return {"msg": "Source file received."}
+
+
 @router.get("/download/model/{id}", response_class=StreamingResponse)
 def download_reference_model(
     *,
     db: Session = Depends(deps.get_db),
     id: str,
+    request: Request,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -124,30 +343,60 @@ def download_reference_model(
             status_code=400,
             detail="Either the reference does not exist, or you do not have the rights for this request.",
         )
+    # Models are small, so the ETag is the checksum of exactly what would be sent
+    content = model_obj.model_dump_json(by_alias=True, exclude_unset=True).encode("utf-8")
+    etag = utilities.get_etag(hashlib.blake2b(content).hexdigest())
+    headers = {
+        "Content-Disposition": f"attachment; filename={model_obj.name}",
+        "Access-Control-Expose-Headers": "Content-Disposition, Content-Range, ETag",
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+    }
+    if utilities.etag_matches(etag=etag, if_none_match=request.headers.get("if-none-match")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    byte_range = get_request_range(request=request, size=len(content), etag=etag, headers=headers)
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+        return Response(
+            content=content[start : end + 1],
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type="application/json",
+            headers=headers,
+        )
     # https://stackoverflow.com/a/69799463/295606
-    stream = io.StringIO(model_obj.model_dump_json(by_alias=True, exclude_unset=True))
-    return StreamingResponse(
-        iter([stream.getvalue()]),
-        media_type="application/json",
-        headers={
-            "Content-Disposition": f"attachment; filename={model_obj.name}",
-            "Access-Control-Expose-Headers": "Content-Disposition",
-        },
+    return StreamingResponse(iter([content]), media_type="application/json", headers=headers)
+
+
+def get_range_header(*, request: Request, etag: str | None) -> str | None:
+    # The requested `Range`, or None for the whole content. `If-Range` only permits a range if it still matches.
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        return None
+    return request.headers.get("range")
+
+
+def get_not_satisfiable(*, size: int, headers: dict[str, str]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        detail="Requested range not satisfiable.",
+        headers={**headers, "Content-Range": f"bytes */{size}"},
     )
 
 
-@router.get("/download/source/{id}", response_model=None)
-async def download_reference_data(
-    *,
-    db: Session = Depends(deps.get_db),
-    id: str,
-    current_user: models.User = Depends(deps.get_current_active_user),
-) -> StreamingResponse:
-    """
-    Download source data from a reference. Must be of "DATA" or "DATASOURCE" type.
-    """
-    stream = None
-    reference_obj = crud.reference.get(db=db, id=id, user=current_user)
+def get_request_range(
+    *, request: Request, size: int, etag: str | None, headers: dict[str, str]
+) -> tuple[int, int] | None:
+    # The requested byte range, or None for the whole content
+    try:
+        return utilities.get_byte_range(range_header=get_range_header(request=request, etag=etag), size=size)
+    except ValueError:
+        raise get_not_satisfiable(size=size, headers=headers)
+
+
+def get_download_source(db: Session, *, id: str, user: models.User) -> tuple[models.Reference | None, Any]:
+    # The DATASOURCE reference, and its model, for a DATA, TRANSFORMDATA or DATASOURCE reference
+    reference_obj = crud.reference.get(db=db, id=id, user=user)
     if reference_obj and reference_obj.model_type == schema_types.ReferenceType.DATA:
         # It will be either of DATA or TRANSFORMDATA
         resource_obj = reference_obj.data.first()
@@ -160,26 +409,96 @@ async def download_reference_data(
     if reference_obj and reference_obj.model_type == schema_types.ReferenceType.DATASOURCE:
         model_obj = crud.reference.get_model(db_obj=reference_obj)
         if model_obj:
-            mime = crud.files.reader.get_mimetype(mimetype=model_obj.mime)
-            if crud.files.use_spaces:
-                obj_name = f"{model_obj.uuid}.{mime.name}"
-                if crud.spaces.exists(filename=obj_name):
-                    stream = crud.spaces.get_stream(filename=obj_name, folder_id=None)
-            if not stream:
-                stream = crud.files.get_data_stream(obj_id=model_obj.uuid, mimetype=mime)
-    if not stream:
+            return reference_obj, model_obj
+    return None, None
+
+
+@router.get("/download/presigned/{id}", response_model=schemas.PresignedDownload)
+def read_presigned_reference_data(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get a short-lived presigned URL to download source data from a reference, directly from storage. Must be of
+    "DATA" or "DATASOURCE" type.
+    """
+    reference_obj, model_obj = get_download_source(db=db, id=id, user=current_user)
+    if not model_obj:
+        raise HTTPException(
+            status_code=400,
+            detail="Either the reference does not exist, or you do not have the rights for this request.",
+        )
+    mime = crud.files.reader.get_mimetype(mimetype=model_obj.mime)
+    obj_name = crud.files.get_source_name(obj_id=model_obj.uuid, mimetype=mime, checksum=reference_obj.hash)
+    return schemas.PresignedDownload(
+        url=crud.files.get_presigned_download(obj_name=obj_name, download_name=model_obj.name),
+        expires=settings.PRESIGNED_EXPIRE_SECONDS,
+    )
+
+
+@router.get("/download/source/{id}", response_model=None)
+async def download_reference_data(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: str,
+    request: Request,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> StreamingResponse:
+    """
+    Download source data from a reference. Must be of "DATA" or "DATASOURCE" type. Supports `If-None-Match`, and a
+    single byte `Range`.
+    """
+    reference_obj, model_obj = get_download_source(db=db, id=id, user=current_user)
+    if not model_obj:
         raise HTTPException(
             status_code=400,
             detail="Either the reference does not exist, or you do not have the rights for this request.",
         )
+    mime = crud.files.reader.get_mimetype(mimetype=model_obj.mime)
+    if settings.SPACES_PRESIGNED and crud.files.use_spaces:
+        obj_name = crud.files.get_source_name(obj_id=model_obj.uuid, mimetype=mime, checksum=reference_obj.hash)
+        return RedirectResponse(crud.files.get_presigned_download(obj_name=obj_name, download_name=model_obj.name))
+    headers = {
+        "Content-Disposition": f"attachment; filename={model_obj.name}",
+        "Access-Control-Expose-Headers": "Content-Disposition, Content-Range, ETag",
+        "Accept-Ranges": "bytes",
+        "Last-Modified": utilities.get_last_modified(reference_obj.created),
+    }
+    # The Blake2b checksum of the stored bytes is a strong validator. Sources are content addressed by it, in the
+    # reference hash. Transform outputs are stored by UUID, and only their data source model has it.
+    etag = None
+    checksum = reference_obj.hash or model_obj.checksum
+    if checksum:
+        etag = utilities.get_etag(checksum)
+        headers["ETag"] = etag
+        if utilities.etag_matches(etag=etag, if_none_match=request.headers.get("if-none-match")):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    # A single read, which gives the size, and range, of what is sent
+    response = crud.files.get_data_stream(
+        obj_id=model_obj.uuid,
+        mimetype=mime,
+        checksum=reference_obj.hash,
+        range_header=get_range_header(request=request, etag=etag),
+    )
+    if not response:
+        raise HTTPException(
+            status_code=400,
+            detail="Either the reference does not exist, or you do not have the rights for this request.",
+        )
+    stream, size, byte_range = response
+    if stream is None:
+        raise get_not_satisfiable(size=size, headers=headers)
     media_type = "application/octet-stream"
     if mime in [schema_types.MimeType.CSV, schema_types.MimeType.XLS, schema_types.MimeType.XLSX]:
         media_type = mime.value
-    return StreamingResponse(
-        content=stream,
-        media_type=media_type,
-        headers={
-            "Content-Disposition": f"attachment; filename={model_obj.name}",
-            "Access-Control-Expose-Headers": "Content-Disposition",
-        },
-    )
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            content=stream, status_code=status.HTTP_206_PARTIAL_CONTENT, media_type=media_type, headers=headers
+        )
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(content=stream, media_type=media_type, headers=headers)
@@ -110,11 +110,24 @@ def read_working_directory_size(
 @router.post("/working", response_model=schemas.Msg)
 def clear_working_directory(
     *,
+    db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
-    Clear current working directory.
+    Clear current working directory, and delete the bytes of any source no longer linked to a data source.
     """
     crud.files.delete_working_directory()
+    crud.blob.collect(db=db)
     working_size = ByteSize(sum(file.stat().st_size for file in Path(settings.WORKING_PATH).rglob("*")))
     return {"msg": str(working_size)}
+
+
+@router.get("/working/cache", response_model=schemas.CacheStatistics)
+def read_source_cache(
+    *,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Get source cache hit, miss and eviction statistics, and current cache size.
+    """
+    return crud.cache.get_stats()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import Any, Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from uuid import UUID
@@ -10,6 +10,7 @@ import whyqd as qd
 
 from app import crud, models, schemas, schema_types
 from app.api import deps
+from app.utilities import set_cursor_header
 from app.core.celery_app import celery_app
 
 router = APIRouter()
@@ -19,25 +20,35 @@ router = APIRouter()
 def read_all_projects(
     *,
     db: Session = Depends(deps.get_db),
+    response: Response,
     match: Optional[str] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     descending: bool = True,
     page: int = 0,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get all projects available for this researcher.
     """
-    return crud.project.get_multi(
-        db=db,
-        user=current_user,
-        match=match,
-        date_from=date_from,
-        date_to=date_to,
-        descending=descending,
-        page=page,
+    try:
+        db_objs = crud.project.get_multi(
+            db=db,
+            user=current_user,
+            match=match,
+            date_from=date_from,
+            date_to=date_to,
+            descending=descending,
+            page=page,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_cursor_header(
+        response=response, cursor=crud.project.get_next_cursor(db=db, db_objs=db_objs, descending=descending)
     )
+    return db_objs
 
 
 @router.post("/multi", response_model=List[schemas.Project])
@@ -1,12 +1,13 @@
 from __future__ import annotations
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from whyqd.parsers.datasource import DataSourceParser
 
 from app import crud, models, schemas, schema_types
 from app.api import deps
+from app.utilities import set_cursor_header
 
 router = APIRouter()
 
@@ -15,6 +16,7 @@ router = APIRouter()
 def read_all_references(
     *,
     db: Session = Depends(deps.get_db),
+    response: Response,
     match: Optional[str] = None,
     reference_type: Optional[schema_types.ReferenceType] = None,
     mime_type: Optional[str] = None,
@@ -23,6 +25,7 @@ def read_all_references(
     date_to: Optional[str] = None,
     descending: bool = True,
     page: int = 0,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -37,18 +40,29 @@ def read_all_references(
                 status_code=400,
                 detail=e,
             )
-    return crud.reference.get_multi(
-        db=db,
-        user=current_user,
-        reference_type=reference_type,
-        match=match,
-        mime_type=mime_type,
-        date_from=date_from,
-        date_to=date_to,
-        isFeatured=isFeatured,
-        descending=descending,
-        page=page,
+    try:
+        db_objs = crud.reference.get_multi(
+            db=db,
+            user=current_user,
+            reference_type=reference_type,
+            match=match,
+            mime_type=mime_type,
+            date_from=date_from,
+            date_to=date_to,
+            isFeatured=isFeatured,
+            descending=descending,
+            page=page,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_cursor_header(
+        response=response,
+        cursor=crud.reference.get_next_cursor(
+            db=db, db_objs=db_objs, descending=descending, reference_type=reference_type
+        ),
     )
+    return db_objs
 
 
 @router.get("/{id}", response_model=schemas.Reference)
@@ -1,12 +1,13 @@
 from __future__ import annotations
 from typing import Any, Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 import whyqd as qd
 
 from app import crud, models, schemas, schema_types
 from app.api import deps
+from app.utilities import set_cursor_header
 from app.core.celery_app import celery_app
 
 router = APIRouter()
@@ -16,33 +17,41 @@ router = APIRouter()
 def read_all_resources(
     *,
     db: Session = Depends(deps.get_db),
+    response: Response,
     match: Optional[str] = None,
     state: Optional[schema_types.StateType] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     descending: bool = True,
     page: int = 0,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get all resources available for this researcher.
     """
-    return crud.resource.get_multi(
-        db=db,
-        user=current_user,
-        match=match,
-        state=state,
-        date_from=date_from,
-        date_to=date_to,
-        descending=descending,
-        page=page,
-    )
+    try:
+        db_objs = crud.resource.get_multi(
+            db=db,
+            user=current_user,
+            match=match,
+            state=state,
+            date_from=date_from,
+            date_to=date_to,
+            page=page,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_cursor_header(response=response, cursor=crud.resource.get_next_cursor(db=db, db_objs=db_objs))
+    return db_objs
 
 
 @router.get("/task/{task_id}", response_model=List[schemas.Resource])
 def read_all_task_resources(
     *,
     db: Session = Depends(deps.get_db),
+    response: Response,
     task_id: str,
     match: Optional[str] = None,
     state: Optional[schema_types.StateType] = None,
@@ -50,6 +59,7 @@ def read_all_task_resources(
     date_to: Optional[str] = None,
     descending: bool = True,
     page: int = 0,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -61,17 +71,22 @@ def read_all_task_resources(
             status_code=400,
             detail="Either task does not exist, or user does not have the rights for this request.",
         )
-    return crud.resource.get_multi(
-        db=db,
-        user=current_user,
-        task_obj=task_obj,
-        match=match,
-        state=state,
-        date_from=date_from,
-        date_to=date_to,
-        descending=descending,
-        page=page,
-    )
+    try:
+        db_objs = crud.resource.get_multi(
+            db=db,
+            user=current_user,
+            task_obj=task_obj,
+            match=match,
+            state=state,
+            date_from=date_from,
+            date_to=date_to,
+            page=page,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_cursor_header(response=response, cursor=crud.resource.get_next_cursor(db=db, db_objs=db_objs))
+    return db_objs
 
 
 @router.get("/{id}", response_model=schemas.ResourceManager, response_model_exclude_unset=True)
@@ -89,6 +104,26 @@ def get_resource(
     )
 
 
+@router.get("/{id}/transform/profile", response_model=List[schemas.ActionProfile])
+def get_resource_transform_profile(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the per-action profile of a resource's transform: wall time, peak memory, and input and output rows and columns.
+    Empty unless the transform was processed with `profile` as `true`.
+    """
+    resource_obj = crud.resource.get(db=db, id=id, user=current_user, responsibility=schema_types.RoleType.SEEKER)
+    if not resource_obj or not resource_obj.transform:
+        raise HTTPException(
+            status_code=400,
+            detail="Either resource transform does not exist, or user does not have the rights for this request.",
+        )
+    return crud.files.get_transform_profile(obj_id=resource_obj.transform.id)
+
+
 @router.get("/template/{id}", response_model=schemas.DataSourceTemplateModel, response_model_exclude_unset=True)
 def get_resource_source_template(
     *,
@@ -163,6 +198,31 @@ def create_resource_schema_categorisation_as_terms(
     return {"msg": "Field categorisation processing. Check your activity log to see when complete."}
 
 
+@router.post("/{id}/categorise", response_model=schemas.Msg)
+def create_resource_schema_multi_categorisation(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: str,
+    objs_in: List[schemas.ResourceFieldCategorisation],
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Extract categories from source data as unique terms or as boolean Trues for several schema subject fields at once.
+    The source is read once, for only the fields requested, and the schema subject is updated once.
+    """
+    resource_obj = crud.resource.get(db=db, id=id, user=current_user)
+    if not resource_obj or not objs_in or any(obj_in.termType not in ["term", "boolean"] for obj_in in objs_in):
+        raise HTTPException(
+            status_code=400,
+            detail="Either resource does not exist, or user does not have the rights for this request.",
+        )
+    fields = {obj_in.name: obj_in.termType for obj_in in objs_in}
+    celery_app.send_task(
+        "app.worker.process_schema_multi_categorisation", args=[current_user.id, resource_obj.id, fields]
+    )
+    return {"msg": "Field categorisation processing. Check your activity log to see when complete."}
+
+
 @router.post("/{id}/dtype/{field_id}/{data_type}", response_model=schemas.Msg)
 def process_resource_schema_field_data_type(
     *,
@@ -198,10 +258,14 @@ def process_resource_transform(
     db: Session = Depends(deps.get_db),
     id: str,
     mimetype: str,
+    force: bool = False,
+    profile: bool = False,
     current_user: models.User = Depends(deps.get_subscribed_user),
 ) -> Any:
     """
-    Process resource transform to complete a crosswalk.
+    Process resource transform to complete a crosswalk. If a transform with identical source data, crosswalk and
+    `mimetype` has already completed, its outputs are reused, unless `force` is `true`. With `profile` as `true`, the
+    transform always runs, and the wall time, peak memory and shapes of each crosswalk action are recorded.
     """
     resource_obj = crud.resource.get(db=db, id=id, user=current_user)
     if (
@@ -213,10 +277,54 @@ def process_resource_transform(
             status_code=400,
             detail="Either resource does not exist, or user does not have the rights for this request.",
         )
-    celery_app.send_task("app.worker.process_transform", args=[current_user.id, resource_obj.id, mimetype])
+    celery_app.send_task(
+        "app.worker.process_transform", args=[current_user.id, resource_obj.id, mimetype, force, profile]
+    )
     return {"msg": "Transformation processing. Check your activity log to see when complete."}
 
 
+@router.post("/transform/batch/{id}/{mimetype}", response_model=schemas.Msg)
+def process_batch_transform(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: str,
+    mimetype: str,
+    force: bool = False,
+    current_user: models.User = Depends(deps.get_subscribed_user),
+) -> Any:
+    """
+    Process the transforms of every resource in a task, or project, which is ready to transform. Resources are
+    transformed in parallel, and a single activity reports progress as each completes, and which failed.
+    """
+    task_obj = crud.task.get(db=db, id=id, user=current_user, responsibility=schema_types.RoleType.WRANGLER)
+    project_obj = None
+    if not task_obj:
+        project_obj = crud.project.get(db=db, id=id, user=current_user, responsibility=schema_types.RoleType.WRANGLER)
+    resource_objs = []
+    if task_obj or project_obj:
+        resource_objs = crud.resource.get_multi(
+            db=db,
+            user=current_user,
+            responsibility=schema_types.RoleType.WRANGLER,
+            task_obj=task_obj,
+            project_obj=project_obj,
+            state=schema_types.StateType.TRANSFORM_READY,
+            page_break=True,
+        )
+    # Ordered by crosswalk, so that resources sharing one are transformed together
+    resource_ids = [str(r.id) for r in sorted(resource_objs, key=lambda r: str(r.crosswalk_id)) if r.crosswalk_id]
+    if not resource_ids:
+        raise HTTPException(
+            status_code=400,
+            detail="Either task or project does not exist, has no resources ready to transform, or user does not have "
+            "the rights for this request.",
+        )
+    celery_app.send_task(
+        "app.worker.process_batch_transform", args=[current_user.id, id, resource_ids, mimetype, force]
+    )
+    return {"msg": f"Transforming {len(resource_ids)} resources. Check your activity log to see when complete."}
+
+
 @router.delete("/{id}", response_model=schemas.Msg)
 def remove_resource(
     *,
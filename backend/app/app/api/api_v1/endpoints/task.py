@@ -1,11 +1,12 @@
 from __future__ import annotations
 from typing import Any, Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas, schema_types
 from app.api import deps
+from app.utilities import set_cursor_header
 
 router = APIRouter()
 
@@ -14,37 +15,49 @@ router = APIRouter()
 def read_all_tasks(
     *,
     db: Session = Depends(deps.get_db),
+    response: Response,
     match: Optional[str] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     descending: bool = True,
     page: int = 0,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get all tasks available for this researcher.
     """
-    return crud.task.get_multi(
-        db=db,
-        user=current_user,
-        match=match,
-        date_from=date_from,
-        date_to=date_to,
-        descending=descending,
-        page=page,
+    try:
+        db_objs = crud.task.get_multi(
+            db=db,
+            user=current_user,
+            match=match,
+            date_from=date_from,
+            date_to=date_to,
+            descending=descending,
+            page=page,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_cursor_header(
+        response=response, cursor=crud.task.get_next_cursor(db=db, db_objs=db_objs, descending=descending)
     )
+    return db_objs
 
 
 @router.get("/project/{project_id}", response_model=List[schemas.Task])
 def read_all_project_tasks(
     *,
     db: Session = Depends(deps.get_db),
+    response: Response,
     project_id: str,
     match: Optional[str] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     descending: bool = True,
     page: int = 0,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -56,22 +69,31 @@ def read_all_project_tasks(
             status_code=400,
             detail="Either project does not exist, or user does not have the rights for this request.",
         )
-    return crud.task.get_multi(
-        db=db,
-        user=current_user,
-        project_obj=project_obj,
-        match=match,
-        date_from=date_from,
-        date_to=date_to,
-        descending=descending,
-        page=page,
+    try:
+        db_objs = crud.task.get_multi(
+            db=db,
+            user=current_user,
+            project_obj=project_obj,
+            match=match,
+            date_from=date_from,
+            date_to=date_to,
+            descending=descending,
+            page=page,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_cursor_header(
+        response=response, cursor=crud.task.get_next_cursor(db=db, db_objs=db_objs, descending=descending)
     )
+    return db_objs
 
 
 @router.get("/scheduled", response_model=List[schemas.ScheduledTask])
 def read_all_scheduled_tasks(
     *,
     db: Session = Depends(deps.get_db),
+    response: Response,
     match: Optional[str] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
@@ -80,29 +102,39 @@ def read_all_scheduled_tasks(
     accrualPolicy: Optional[schema_types.DCAccrualPolicyType] = None,
     accrualPeriodicity: Optional[schema_types.DCFrequencyType] = None,
     page: int = 0,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get all scheduled tasks available for this researcher.
     """
-    return crud.task.get_scheduled_multi(
-        db=db,
-        user=current_user,
-        match=match,
-        scheduled=scheduled,
-        prioritised=prioritised,
-        accrualPolicy=accrualPolicy,
-        accrualPeriodicity=accrualPeriodicity,
-        date_from=date_from,
-        date_to=date_to,
-        page=page,
+    try:
+        db_objs = crud.task.get_scheduled_multi(
+            db=db,
+            user=current_user,
+            match=match,
+            scheduled=scheduled,
+            prioritised=prioritised,
+            accrualPolicy=accrualPolicy,
+            accrualPeriodicity=accrualPeriodicity,
+            date_from=date_from,
+            date_to=date_to,
+            page=page,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_cursor_header(
+        response=response, cursor=crud.task.get_next_scheduled_cursor(db=db, db_objs=db_objs, prioritised=prioritised)
     )
+    return db_objs
 
 
 @router.get("/scheduled/project/{project_id}", response_model=List[schemas.ScheduledTask])
 def read_all_scheduled_project_tasks(
     *,
     db: Session = Depends(deps.get_db),
+    response: Response,
     project_id: str,
     match: Optional[str] = None,
     scheduled: bool = False,
@@ -112,6 +144,7 @@ def read_all_scheduled_project_tasks(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     page: int = 0,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -123,19 +156,27 @@ def read_all_scheduled_project_tasks(
             status_code=400,
             detail="Either project does not exist, or user does not have the rights for this request.",
         )
-    return crud.task.get_scheduled_multi(
-        db=db,
-        user=current_user,
-        project_obj=project_obj,
-        match=match,
-        scheduled=scheduled,
-        prioritised=prioritised,
-        accrualPolicy=accrualPolicy,
-        accrualPeriodicity=accrualPeriodicity,
-        date_from=date_from,
-        date_to=date_to,
-        page=page,
+    try:
+        db_objs = crud.task.get_scheduled_multi(
+            db=db,
+            user=current_user,
+            project_obj=project_obj,
+            match=match,
+            scheduled=scheduled,
+            prioritised=prioritised,
+            accrualPolicy=accrualPolicy,
+            accrualPeriodicity=accrualPeriodicity,
+            date_from=date_from,
+            date_to=date_to,
+            page=page,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_cursor_header(
+        response=response, cursor=crud.task.get_next_scheduled_cursor(db=db, db_objs=db_objs, prioritised=prioritised)
     )
+    return db_objs
 
 
 @router.post("/multi", response_model=List[schemas.Task])
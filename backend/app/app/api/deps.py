@@ -1,6 +1,6 @@
 from typing import Generator
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
@@ -22,6 +22,12 @@ def get_db() -> Generator:
         db.close()
 
 
+async def get_request_body(request: Request) -> bytes:
+    # Read in the event loop, so that an endpoint taking a raw body can still be a plain `def`, and do blocking I/O in
+    # the threadpool
+    return await request.body()
+
+
 def get_token_payload(token: str) -> schemas.TokenPayload:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGO])
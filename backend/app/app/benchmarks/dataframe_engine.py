@@ -0,0 +1,84 @@
+"""Crossover benchmark for plain pandas and modin.
+
+Run on the hardware the workers use, with the same `WHYQD_MEMORY` and `WHYQD_CPUS`:
+
+    python -m app.benchmarks.dataframe_engine --rows 1000 100000 1000000 5000000
+
+For each row count, a generated CSV source is read, crosswalk-like row-local work is applied (coercion, a derived
+column and whyqd's data checksum), and the result is written to Parquet, with each engine. Modin's engine start-up is
+timed once, separately, since a worker pays it only once per process. The smallest row count (and file size) at which
+modin is faster is the point at which to set `DATAFRAME_MODIN_ROWS` (and `DATAFRAME_MODIN_BYTES`).
+"""
+from __future__ import annotations
+from pathlib import Path
+from types import ModuleType
+import argparse
+import tempfile
+import time
+import numpy as np
+import pandas
+import modin.pandas as mpd
+from whyqd.config.ray_init import ray_start
+from whyqd.parsers import CoreParser
+
+ROWS = [1000, 10000, 100000, 1000000, 5000000]
+
+
+def make_source(*, path: Path, rows: int) -> None:
+    rng = np.random.default_rng(42)
+    pandas.DataFrame(
+        {
+            "id": np.arange(rows),
+            "value": rng.random(rows),
+            "category": rng.choice(["alpha", "beta", "gamma", "delta"], rows),
+            "label": rng.integers(0, 10**9, rows).astype(str),
+        }
+    ).to_csv(path, index=False)
+
+
+def run_engine(*, engine: ModuleType, source_path: Path, target_path: Path) -> float:
+    start = time.perf_counter()
+    df = engine.read_csv(source_path, encoding_errors="ignore")
+    df["value"] = df["value"].astype("float64")
+    df["name"] = df["category"] + "-" + df["label"].astype(str)
+    CoreParser().get_data_checksum(df=df)
+    if engine is mpd:
+        df = df.modin.to_pandas()
+    df.to_parquet(target_path, engine="pyarrow", index=False)
+    return time.perf_counter() - start
+
+
+def run(*, rows: list[int]) -> None:
+    start = time.perf_counter()
+    ray_start()
+    print(f"modin engine start-up {time.perf_counter() - start:8.2f}s")
+    crossover = None
+    with tempfile.TemporaryDirectory() as directory:
+        for n in rows:
+            source_path = Path(directory) / f"benchmark-{n}.csv"
+            target_path = Path(directory) / f"benchmark-{n}.parquet"
+            make_source(path=source_path, rows=n)
+            size = source_path.stat().st_size
+            timing = {}
+            for label, engine in {"pandas": pandas, "modin": mpd}.items():
+                timing[label] = run_engine(engine=engine, source_path=source_path, target_path=target_path)
+                target_path.unlink(missing_ok=True)
+            faster = min(timing, key=timing.get)
+            print(
+                f"{n:>9} rows {size / 1024**2:9.1f} MB  pandas {timing['pandas']:8.2f}s  modin {timing['modin']:8.2f}s"
+                f"  -> {faster}"
+            )
+            if faster == "modin" and crossover is None:
+                crossover = (n, size)
+            source_path.unlink(missing_ok=True)
+    if crossover:
+        print(f"Modin is faster from {crossover[0]} rows ({crossover[1]} bytes).")
+    else:
+        print("Pandas is faster at every size tested.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plain pandas and modin crossover benchmark.")
+    parser.add_argument("--rows", nargs="+", type=int, default=ROWS)
+    args = parser.parse_args()
+    run(rows=args.rows)
@@ -0,0 +1,96 @@
+"""Throughput benchmark for Spaces multipart transfers.
+
+Runs against a local S3-compatible stand-in, never against production Spaces. For example, with MinIO:
+
+    docker run -p 9000:9000 -e MINIO_ROOT_USER=minio -e MINIO_ROOT_PASSWORD=minio123 minio/minio server /data
+
+    SPACES_ENDPOINT_URL=http://localhost:9000 SPACES_ACCESS_KEY=minio SPACES_SECRET_KEY=minio123 \\
+    SPACES_REGION_NAME=us-east-1 SPACES_BUCKET=benchmark python -m app.benchmarks.spaces_transfer
+
+Each object size is uploaded and downloaded with boto3 defaults, and with the configured multipart settings
+(`SPACES_MULTIPART_THRESHOLD`, `SPACES_MULTIPART_CHUNKSIZE`, `SPACES_MAX_CONCURRENCY`). `save_stream` is timed with a
+generated DataFrame of roughly the same size. Test files are written to a temporary directory and removed afterwards.
+"""
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from boto3.s3.transfer import TransferConfig
+
+from app.crud.crud_spaces import spaces
+
+SIZES = {"10MB": 10 * 1024**2, "1GB": 1024**3, "5GB": 5 * 1024**3}
+
+
+def make_file(*, path: Path, size: int) -> None:
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        for _ in range(size // len(block)):
+            f.write(block)
+        f.write(block[: size % len(block)])
+
+
+def make_dataframe(*, size: int) -> pd.DataFrame:
+    # Roughly 100 bytes per CSV row
+    rows = max(1, size // 100)
+    rng = np.random.default_rng(42)
+    return pd.DataFrame(
+        {
+            "id": np.arange(rows),
+            "value": rng.random(rows),
+            "category": rng.choice(["alpha", "beta", "gamma", "delta"], rows),
+            "label": rng.integers(0, 10**9, rows).astype(str),
+        }
+    )
+
+
+def throughput(*, size: int, seconds: float) -> str:
+    return f"{size / 1024**2 / seconds:8.1f} MB/s ({seconds:6.2f}s)"
+
+
+def run(*, sizes: list[str], dataframes: bool = True) -> None:
+    if not spaces.bucket.creation_date:
+        spaces.bucket.create()
+    configs = {"default": TransferConfig(), "configured": spaces.transfer_config}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in sizes:
+            size = SIZES[name]
+            source_path = Path(directory) / f"benchmark-{name}.bin"
+            make_file(path=source_path, size=size)
+            for label, config in configs.items():
+                key = f"benchmark/{name}-{label}.bin"
+                start = time.perf_counter()
+                spaces.bucket.upload_file(Filename=str(source_path), Key=key, Config=config)
+                upload = time.perf_counter() - start
+                target_path = Path(directory) / f"download-{name}.bin"
+                start = time.perf_counter()
+                spaces.bucket.download_file(Filename=str(target_path), Key=key, Config=config)
+                download = time.perf_counter() - start
+                print(
+                    f"{name:>5} {label:>10}  upload {throughput(size=size, seconds=upload)}"
+                    f"  download {throughput(size=size, seconds=download)}"
+                )
+                target_path.unlink(missing_ok=True)
+                spaces.bucket.Object(key).delete()
+            source_path.unlink(missing_ok=True)
+            if dataframes:
+                df = make_dataframe(size=size)
+                key = f"benchmark/{name}-stream.csv"
+                start = time.perf_counter()
+                spaces.save_stream(filename=key, df=df)
+                stream = time.perf_counter() - start
+                print(f"{name:>5} {'stream':>10}  upload {throughput(size=size, seconds=stream)}")
+                spaces.remove(filename=key)
+                del df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Spaces multipart transfer throughput benchmark.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--no-dataframes", action="store_true", help="Skip the streamed DataFrame upload.")
+    args = parser.parse_args()
+    run(sizes=args.sizes, dataframes=not args.no_dataframes)
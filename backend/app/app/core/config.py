@@ -34,6 +34,10 @@ class Settings(BaseSettings):
     # https://stackoverflow.com/a/70657621/295606
     # Set to 1Mb ... Starlette has 1Mb as default, so only use this if different
     CHUNK_SIZE: int = 1024 * 1024
+    # Largest accepted source upload, in bytes
+    UPLOAD_MAX_BYTES: int = 5 * 1024 * 1024 * 1024
+    # Largest accepted chunk for resumable uploads, in bytes
+    UPLOAD_CHUNK_MAX_BYTES: int = 64 * 1024 * 1024
 
     @field_validator("BACKEND_CORS_ORIGINS", mode="before")
     @classmethod
@@ -78,6 +82,13 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Celery worker connection pool, created once per worker process
+    WORKER_POOL_SIZE: int = 5
+    WORKER_POOL_OVERFLOW: int = 5
+    WORKER_POOL_RECYCLE: int = 3600
+    # Batch transforms run as at most this many chunks in parallel
+    TRANSFORM_BATCH_CONCURRENCY: int = 4
+
     SMTP_TLS: bool = True
     SMTP_PORT: Optional[int] = None
     SMTP_HOST: Optional[str] = None
@@ -116,6 +127,20 @@ class Settings(BaseSettings):
     WHYQD_DIRECTORY: str = "/app/working/tmp"
     WHYQD_DEFAULT_MIMETYPE: str = "application/vnd.apache.parquet"
     WHYQD_SUMMARY_ROWS: int = 50
+    # Data under either threshold is handled with plain pandas rather than modin. See `app.benchmarks.dataframe_engine`
+    DATAFRAME_MODIN_BYTES: int = 256 * 1024 * 1024
+    DATAFRAME_MODIN_ROWS: int = 1000000
+    # Transforms of sources with more rows than this are streamed in partitions of this size, where the crosswalk
+    # permits. Zero always transforms in memory.
+    WHYQD_STREAM_ROWS: int = 1000000
+    # Rows of the source sample crosswalked for an interactive transform preview
+    WHYQD_PREVIEW_ROWS: int = 1000
+    # Column statistics computed at import: top values kept, distinct values kept as categories (above which the
+    # column is scanned to categorise), distinct values parsed to infer type confidence, and numeric histogram bins
+    STATISTICS_TOP_VALUES: int = 10
+    STATISTICS_CATEGORIES: int = 1000
+    STATISTICS_TYPE_SAMPLE: int = 10000
+    STATISTICS_HISTOGRAM_BINS: int = 20
 
     # PAYMENT KEYS
     STRIPE_API_KEY: Optional[str] = None
@@ -133,6 +158,20 @@ class Settings(BaseSettings):
     WORKING_PATH: str = "/app/working"
     REFERENCE_PATH: str = "/references"
     SUMMARY_PATH: str = "/summary"
+    # Byte budget for the local cache of source files downloaded from Spaces, least recently used evicted first
+    CACHE_MAX_BYTES: int = 20 * 10**9
+    # Cached files used this recently are never evicted, so that a path got from the cache can still be opened
+    CACHE_GRACE_SECONDS: int = 60
+    # Cache metrics are counted in memory, and written to a file per process at most this often
+    CACHE_STATS_INTERVAL: int = 10
+    # In-process cache of parsed whyqd models, invalidated across processes by per-model stamps
+    MODEL_PATH: str = "/models"
+    MODEL_CACHE_SIZE: int = 256
+    MODEL_CACHE_TTL: int = 300
+    # In-process cache of activity reports, invalidated across processes by per-project and per-task stamps
+    REPORT_PATH: str = "/reports"
+    REPORT_CACHE_SIZE: int = 256
+    REPORT_CACHE_TTL: int = 3600
 
     # DIGITALOCEAN SPACES KEYS
     SPACES_ACCESS_KEY: Optional[str] = None
@@ -141,6 +180,18 @@ class Settings(BaseSettings):
     SPACES_ENDPOINT_URL: Optional[HttpUrl] = None
     SPACES_BUCKET: Optional[str] = None
     USE_SPACES: bool = False
+    # Multipart transfers. S3 requires parts of at least 5MB. Concurrency is the number of parallel parts per transfer,
+    # and the size of each worker process's thread pool for streamed uploads.
+    SPACES_MULTIPART_THRESHOLD: int = 64 * 1024 * 1024
+    SPACES_MULTIPART_CHUNKSIZE: int = 16 * 1024 * 1024
+    SPACES_MAX_CONCURRENCY: int = 8
+    # Hand out short-lived presigned URLs so that source bytes go directly between client and bucket, not via the API.
+    # Without Spaces, the API provides a local stand-in for the same flow.
+    SPACES_PRESIGNED: bool = False
+    PRESIGNED_EXPIRE_SECONDS: int = 900
+    # Optional in-process manifest of known keys, refreshed by a paginated listing every TTL seconds
+    SPACES_MANIFEST: bool = False
+    SPACES_MANIFEST_TTL: int = 60
 
     @model_validator(mode="after")
     def _get_use_spaces(self) -> Self:
@@ -113,3 +113,26 @@ def create_ogun_token(*, subject: Union[str, Any], expires_delta: timedelta = No
     to_encode = {"exp": expire, "sub": str(subject), "ogun": True}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.JWT_ALGO)
     return encoded_jwt
+
+
+###################################################################################################
+# PRESIGNED TOKEN
+###################################################################################################
+
+
+def create_presigned_token(*, key: str, method: str, filename: Optional[str] = None, max_bytes: int = 0) -> str:
+    # Local stand-in for a Spaces presigned URL. Deliberately has no `sub`, so it can never authenticate a user.
+    expire = datetime.utcnow() + timedelta(seconds=settings.PRESIGNED_EXPIRE_SECONDS)
+    to_encode = {"exp": expire, "key": key, "presigned": method, "filename": filename, "max_bytes": max_bytes}
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.JWT_ALGO)
+    return encoded_jwt
+
+
+def verify_presigned_token(*, token: str, method: str) -> Optional[dict]:
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGO])
+    except jwt.JWTError:
+        return None
+    if payload.get("presigned") != method or not payload.get("key"):
+        return None
+    return payload
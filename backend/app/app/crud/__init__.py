@@ -9,7 +9,10 @@ from .crud_subscription import subscription  # noqa: F401
 from .crud_transform_activity import transform_activity  # noqa: F401
 
 from .crud_spaces import spaces  # noqa: F401
+from .crud_cache import cache  # noqa: F401
 from .crud_files import files  # noqa: F401
+from .crud_blob import blob  # noqa: F401
+from .crud_upload import upload  # noqa: F401
 
 # from .crud_source import source  # noqa: F401
 
@@ -21,7 +24,10 @@ from .crud_task import task  # noqa: F401
 from .crud_project import project  # noqa: F401
 from .crud_invitation import invitation  # noqa: F401
 from .crud_role import role  # noqa: F401
+from .crud_access import access  # noqa: F401
+from .crud_cursor import cursor  # noqa: F401
 from .crud_activity import activity  # noqa: F401
+from .crud_transform_batch import transform_batch  # noqa: F401
 
 # For a new basic set of CRUD operations you could just do
 
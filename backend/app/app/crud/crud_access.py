@@ -0,0 +1,222 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any
+from sqlalchemy import Connection, ColumnElement, Select, delete, event, exists, func, inspect, select, union
+from sqlalchemy import union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from uuid import UUID
+
+from app.models.access import ReferenceAccess
+from app.models.project import Project
+from app.models.resource import Resource
+from app.models.role import Role
+from app.models.task import Task
+from app.schema_types import RoleType
+
+if TYPE_CHECKING:
+    from app.models.user import User  # noqa: F401
+
+# Every `Resource` link to a reference
+RESOURCE_LINKS = [
+    Resource.datasource_id,
+    Resource.data_id,
+    Resource.schema_subject_id,
+    Resource.crosswalk_id,
+    Resource.schema_object_id,
+    Resource.transform_id,
+    Resource.transformdata_id,
+    Resource.transformdatasource_id,
+]
+# Attributes (columns and their relationships) whose change alters who may access which references. Only changes made
+# through the session's unit of work are seen: bulk `query.update()` or `query.delete()` (and Core `update()` or
+# `delete()` statements) skip the flush events, and leave `reference_access` stale. After one of those on any of
+# these attributes, call `access.refresh` for the affected references, or `access.rebuild`.
+ACCESS_LINKS = {
+    Role: ["researcher_id", "is_validated", "responsibility", "project_id", "task_id", "resource_id", "reference_id"]
+    + ["researcher", "project", "task", "resource", "reference"],
+    Resource: [c.key for c in RESOURCE_LINKS]
+    + ["task_id", "datasource", "data", "schema_subject", "crosswalk", "schema_object", "transform"]
+    + ["transformdata", "transformdatasource", "task"],
+    Task: ["project_id", "schema_id", "project", "schema"],
+    Project: ["schema_id", "schema"],
+}
+
+
+class CRUDReferenceAccess:
+    # Maintains `reference_access`, so that a permission check is a single indexed semi-join, rather than an OR over
+    # every path from a role to a reference. Rows are derived in SQL, and refreshed only for the references whose
+    # paths a flush changes. `rebuild` derives every row again.
+    def __init__(self):
+        self.model = ReferenceAccess
+
+    ###################################################################################################
+    # PERMISSIONS
+    ###################################################################################################
+    def get_filter(self, *, db_model: Any, user: User, responsibilities: list[RoleType]) -> ColumnElement:
+        return exists().where(
+            (self.model.reference_id == db_model.id)
+            & (self.model.user_id == user.id)
+            & (self.model.max_responsibility.in_(responsibilities))
+        )
+
+    ###################################################################################################
+    # DERIVATION
+    ###################################################################################################
+    def _get_resource_links(self, *, where: Any = None) -> Any:
+        # One row for each link from a resource to a reference, with the resource's task
+        return union_all(
+            *[
+                select(
+                    Resource.id.label("resource_id"), Resource.task_id.label("task_id"), link.label("reference_id")
+                ).where(link.isnot(None) if where is None else (link.isnot(None) & where(link)))
+                for link in RESOURCE_LINKS
+            ]
+        ).subquery("resource_link")
+
+    def get_derivation(self, *, reference_ids: set[UUID] | None = None) -> Select:
+        # Every (user, reference, highest responsibility) granted by validated roles: on the reference; on a resource
+        # linked to it; on that resource's task or project; or on a task or project with it as schema
+        def restrict(column):
+            if reference_ids is None:
+                return column.isnot(None)
+            return column.in_(reference_ids)
+
+        is_granted = Role.is_validated.is_(True)
+        links = self._get_resource_links(where=None if reference_ids is None else restrict)
+        grants = union_all(
+            select(Role.researcher_id, Role.reference_id, Role.responsibility).where(
+                is_granted & restrict(Role.reference_id)
+            ),
+            select(Role.researcher_id, links.c.reference_id, Role.responsibility)
+            .join_from(links, Role, Role.resource_id == links.c.resource_id)
+            .where(is_granted),
+            select(Role.researcher_id, links.c.reference_id, Role.responsibility)
+            .join_from(links, Role, Role.task_id == links.c.task_id)
+            .where(is_granted),
+            select(Role.researcher_id, links.c.reference_id, Role.responsibility)
+            .join_from(links, Task, Task.id == links.c.task_id)
+            .join(Role, Role.project_id == Task.project_id)
+            .where(is_granted),
+            select(Role.researcher_id, Task.schema_id, Role.responsibility)
+            .join_from(Task, Role, Role.task_id == Task.id)
+            .where(is_granted & restrict(Task.schema_id)),
+            select(Role.researcher_id, Project.schema_id, Role.responsibility)
+            .join_from(Project, Role, Role.project_id == Project.id)
+            .where(is_granted & restrict(Project.schema_id)),
+        ).subquery("grant")
+        user_id, reference_id, responsibility = grants.c
+        return select(user_id, reference_id, func.min(responsibility)).group_by(user_id, reference_id)
+
+    def refresh(self, connection: Connection, *, reference_ids: set[UUID]) -> None:
+        # Derive the rows of only these references again. Another transaction refreshing the same references may have
+        # inserted rows this one's delete could not see, so the insert replaces them rather than fail the flush.
+        if not reference_ids:
+            return
+        connection.execute(delete(self.model).where(self.model.reference_id.in_(reference_ids)))
+        statement = insert(self.model).from_select(
+            ["user_id", "reference_id", "max_responsibility"], self.get_derivation(reference_ids=reference_ids)
+        )
+        connection.execute(
+            statement.on_conflict_do_update(
+                index_elements=["user_id", "reference_id"],
+                set_={"max_responsibility": statement.excluded.max_responsibility},
+            )
+        )
+
+    def rebuild(self, db: Session) -> int:
+        db.execute(delete(self.model))
+        db.execute(
+            insert(self.model).from_select(["user_id", "reference_id", "max_responsibility"], self.get_derivation())
+        )
+        db.commit()
+        return db.query(self.model).count()
+
+    ###################################################################################################
+    # INCREMENTAL MAINTENANCE
+    ###################################################################################################
+    def get_references(
+        self,
+        connection: Connection,
+        *,
+        role_ids: set[UUID],
+        resource_ids: set[UUID],
+        task_ids: set[UUID],
+        project_ids: set[UUID],
+    ) -> set[UUID]:
+        # References whose access may depend on these roles, resources, tasks and projects, as linked right now
+        reference_ids = set()
+        if role_ids:
+            for reference_id, resource_id, task_id, project_id in connection.execute(
+                select(Role.reference_id, Role.resource_id, Role.task_id, Role.project_id).where(Role.id.in_(role_ids))
+            ):
+                reference_ids.add(reference_id)
+                resource_ids.add(resource_id)
+                task_ids.add(task_id)
+                project_ids.add(project_id)
+        resource_ids, task_ids, project_ids = [{i for i in ids if i} for ids in [resource_ids, task_ids, project_ids]]
+        if not (resource_ids or task_ids or project_ids):
+            return {i for i in reference_ids if i}
+        links = self._get_resource_links()
+        queries = [
+            select(links.c.reference_id).where(
+                links.c.resource_id.in_(resource_ids)
+                | links.c.task_id.in_(task_ids)
+                | links.c.task_id.in_(select(Task.id).where(Task.project_id.in_(project_ids)))
+            ),
+            select(Task.schema_id).where(Task.id.in_(task_ids)),
+            select(Project.schema_id).where(Project.id.in_(project_ids)),
+        ]
+        reference_ids.update(connection.execute(union(*queries)).scalars())
+        return {i for i in reference_ids if i}
+
+    def get_changed(self, *, db_objs: Any, force: bool = False) -> dict[type, set[UUID]]:
+        # Roles, resources, tasks and projects whose links have changed, or all of them, if `force` (new or deleted)
+        changed = {db_model: set() for db_model in ACCESS_LINKS}
+        for db_obj in db_objs:
+            db_model = type(db_obj)
+            if db_model not in ACCESS_LINKS or not db_obj.id:
+                continue
+            state = inspect(db_obj)
+            if force or any(state.attrs[key].history.has_changes() for key in ACCESS_LINKS[db_model]):
+                changed[db_model].add(db_obj.id)
+        return changed
+
+    def get_changed_references(self, session: Session, *, changed: dict[type, set[UUID]]) -> set[UUID]:
+        return self.get_references(
+            session.connection(),
+            role_ids=set(changed[Role]),
+            resource_ids=set(changed[Resource]),
+            task_ids=set(changed[Task]),
+            project_ids=set(changed[Project]),
+        )
+
+
+access = CRUDReferenceAccess()
+
+
+###################################################################################################
+# SESSION EVENTS
+###################################################################################################
+# Links are read before the flush (so that references which lose access are found) and after it (so that references
+# which gain access are found). Only the references of changed roles, resources, tasks and projects are refreshed,
+# in the flush's own transaction.
+@event.listens_for(Session, "before_flush")
+def collect_access_changes(session: Session, flush_context, instances) -> None:
+    session.info.pop("reference_access", None)
+    changed = access.get_changed(db_objs=session.dirty)
+    for db_model, ids in access.get_changed(db_objs=session.deleted, force=True).items():
+        changed[db_model].update(ids)
+    if any(changed.values()):
+        session.info["reference_access"] = (changed, access.get_changed_references(session, changed=changed))
+
+
+@event.listens_for(Session, "after_flush")
+def refresh_access_changes(session: Session, flush_context) -> None:
+    changed, reference_ids = session.info.pop("reference_access", (None, set()))
+    if changed is None:
+        changed = {db_model: set() for db_model in ACCESS_LINKS}
+    for db_model, ids in access.get_changed(db_objs=session.new, force=True).items():
+        changed[db_model].update(ids)
+    if any(changed.values()):
+        reference_ids = reference_ids | access.get_changed_references(session, changed=changed)
+    access.refresh(session.connection(), reference_ids=reference_ids)
@@ -1,5 +1,8 @@
 from __future__ import annotations
+from typing import Any
 from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 # from sqlalchemy import and_, or_
@@ -11,10 +14,25 @@ from app.schemas import ActivityCreate, ActivityUpdate
 from app.schema_types.role import RoleType
 from app.schema_types.state import StateType
 from app.crud.crud_role import role as crud_role
-from app.core.config import settings
+from app.crud.crud_cursor import cursor as crud_cursor, SortKey
 
 
 class CRUDActivity(CRUDBase[Activity, ActivityCreate, ActivityUpdate]):
+    def create(self, db: Session, *, obj_in: ActivityCreate | dict[str, Any]) -> Activity:
+        # A resource activity also moves `Resource.latest_activity_at` on, in the same transaction. Both are `now()`,
+        # the start of the transaction, so they are equal.
+        obj_in_data = jsonable_encoder(obj_in)
+        db_obj = self.model(**obj_in_data)
+        db.add(db_obj)
+        if obj_in_data.get("resource_id"):
+            db.query(Resource).filter(Resource.id == obj_in_data["resource_id"]).update(
+                {Resource.latest_activity_at: func.greatest(Resource.latest_activity_at, func.now())},
+                synchronize_session=False,
+            )
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
     def get_for_researcher(
         self,
         db: Session,
@@ -29,6 +47,7 @@ class CRUDActivity(CRUDBase[Activity, ActivityCreate, ActivityUpdate]):
         descending: bool = True,
         page: int = 0,
         page_break: bool = False,
+        cursor: str | None = None,
     ) -> list[Activity]:
         db_objs = db.query(self.model)
         responsibilities = crud_role._get_responsibility(responsibility=responsibility)
@@ -61,14 +80,13 @@ class CRUDActivity(CRUDBase[Activity, ActivityCreate, ActivityUpdate]):
             db_objs = db_objs.filter(self.model.alert)
         if custodian:
             db_objs = db_objs.filter(self.model.custodians_only)
-        order_by = self.model.created
-        if descending:
-            order_by = order_by.desc()
-        db_objs = db_objs.distinct().order_by(order_by)
-        if not page_break:
-            if page > 0:
-                db_objs = db_objs.offset(page * settings.MULTI_MAX)
-            db_objs = db_objs.limit(settings.MULTI_MAX)
+        db_objs = crud_cursor.get_page(
+            db_objs.distinct(),
+            keys=self._get_sort_keys(descending=descending),
+            cursor=cursor,
+            page=page,
+            page_break=page_break,
+        )
         return db_objs.all()
 
     def get_by_researcher(
@@ -86,6 +104,7 @@ class CRUDActivity(CRUDBase[Activity, ActivityCreate, ActivityUpdate]):
         descending: bool = True,
         page: int = 0,
         page_break: bool = False,
+        cursor: str | None = None,
     ) -> list[Activity]:
         db_objs = db.query(self.model)
         responsibilities = crud_role._get_responsibility(responsibility=responsibility)
@@ -121,15 +140,20 @@ class CRUDActivity(CRUDBase[Activity, ActivityCreate, ActivityUpdate]):
             db_objs = db_objs.filter(self.model.alert)
         if custodian:
             db_objs = db_objs.filter(self.model.custodians_only)
-        order_by = self.model.created
-        if descending:
-            order_by = order_by.desc()
-        db_objs = db_objs.distinct().order_by(order_by)
-        if not page_break:
-            if page > 0:
-                db_objs = db_objs.offset(page * settings.MULTI_MAX)
-            db_objs = db_objs.limit(settings.MULTI_MAX)
+        db_objs = crud_cursor.get_page(
+            db_objs.distinct(),
+            keys=self._get_sort_keys(descending=descending),
+            cursor=cursor,
+            page=page,
+            page_break=page_break,
+        )
         return db_objs.all()
 
+    def _get_sort_keys(self, *, descending: bool = True) -> list[SortKey]:
+        return [(self.model.created, descending), (self.model.id, descending)]
+
+    def get_next_cursor(self, db: Session, *, db_objs: list[Activity], descending: bool = True) -> str | None:
+        return crud_cursor.get_next(db=db, db_objs=db_objs, keys=self._get_sort_keys(descending=descending))
+
 
 activity = CRUDActivity(Activity)
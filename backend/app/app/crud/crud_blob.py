@@ -0,0 +1,86 @@
+from __future__ import annotations
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from uuid import UUID, uuid4
+
+from app.crud.base import CRUDBase
+from app.crud.crud_files import files as crud_files
+from app.models.blob import Blob, BlobLink
+from app.schemas.blob import BlobCreate, BlobUpdate
+from app.schema_types import MimeType
+
+
+class CRUDBlob(CRUDBase[Blob, BlobCreate, BlobUpdate]):
+    # Links and unlinks are part of the caller's unit of work, and are only flushed. Each changes the count in a single
+    # statement, which also holds the blob row lock until the caller commits.
+    def get_by_checksum(self, db: Session, *, checksum: str) -> Blob | None:
+        return db.query(self.model).filter(self.model.checksum == checksum).first()
+
+    def get_by_model(self, db: Session, *, model_id: UUID | str) -> Blob | None:
+        return db.query(self.model).join(BlobLink).filter(BlobLink.model == model_id).first()
+
+    def link(
+        self,
+        db: Session,
+        *,
+        model_id: UUID | str,
+        checksum: str,
+        mime_type: MimeType,
+        size: int = 0,
+    ) -> Blob:
+        # Add a reference to a blob, creating the blob if this is the first time these bytes have been seen
+        db_obj = self.get_by_model(db=db, model_id=model_id)
+        if db_obj:
+            return db_obj
+        obj_in = BlobCreate(checksum=checksum, mime_type=mime_type, size=size)
+        blob_id = db.execute(
+            insert(self.model)
+            .values(id=uuid4(), checksum=obj_in.checksum, mime_type=obj_in.mimeType, size=obj_in.size, refcount=1)
+            .on_conflict_do_update(index_elements=[self.model.checksum], set_={"refcount": self.model.refcount + 1})
+            .returning(self.model.id)
+        ).scalar_one()
+        db.add(BlobLink(model=model_id, blob_id=blob_id))
+        db.flush()
+        return db.get(self.model, blob_id, populate_existing=True)
+
+    def unlink(self, db: Session, *, model_id: UUID | str) -> Blob | None:
+        # Remove a reference to a blob. Returns the blob only if it is now orphaned, and so deleted. Its bytes are left
+        # for `collect`, since an import in flight may have found them, and be about to link them again.
+        link_obj = db.query(BlobLink).filter(BlobLink.model == model_id).first()
+        if not link_obj:
+            return None
+        blob_id = link_obj.blob_id
+        db.delete(link_obj)
+        db.flush()
+        refcount = db.execute(
+            update(self.model)
+            .where(self.model.id == blob_id)
+            .values(refcount=self.model.refcount - 1)
+            .returning(self.model.refcount)
+        ).scalar_one()
+        db_obj = db.get(self.model, blob_id, populate_existing=True)
+        if refcount > 0:
+            return None
+        db.delete(db_obj)
+        db.flush()
+        return db_obj
+
+    def collect(self, db: Session, *, delay: int = 86400) -> int:
+        # Delete the bytes of blobs which nothing links to. Imports touch the bytes they reuse, and link them well
+        # within `delay` seconds, so only bytes untouched for longer, and with no blob, are deleted. Returns the count.
+        sources = crud_files.get_blob_sources(delay=delay)
+        if not sources:
+            return 0
+        linked = set(db.execute(select(self.model.checksum).where(self.model.checksum.in_(sources))).scalars())
+        count = 0
+        for checksum, obj_names in sources.items():
+            if checksum in linked:
+                continue
+            for obj_name in obj_names:
+                crud_files.delete_blob(obj_name=obj_name)
+                count += 1
+        return count
+
+
+blob = CRUDBlob(Blob)
@@ -0,0 +1,277 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, Hashable
+from pathlib import Path
+from uuid import UUID, uuid4
+from pydantic import BaseModel
+from typing import TextIO
+import atexit
+import threading
+import fcntl
+import json
+import logging
+import os
+import time
+
+from app.core.config import settings
+from app.crud.crud_spaces import spaces
+
+logger = logging.getLogger(__name__)
+
+
+class CRUDCache:
+    # Size-bounded, least-recently-used local disk cache for source files stored in Spaces.
+    # Entries are on the filesystem (recency is the file mtime, refreshed on every hit), so the API and every Celery
+    # worker process share a single cache and byte budget. Fills are written to a partial file and atomically renamed,
+    # and a per-file lock means concurrent misses result in a single download. Entries in use are pinned with a shared
+    # lock, which eviction respects. Metrics are counted in memory, and written to a file per process.
+    def __init__(self, *, directory: Path | str | None = None, max_bytes: int | None = None):
+        self.directory = Path(directory or settings.WORKING_PATH + settings.REFERENCE_PATH)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.CACHE_MAX_BYTES
+        self.grace = settings.CACHE_GRACE_SECONDS
+        self.locks = self.directory / ".locks"
+        self.locks.mkdir(parents=True, exist_ok=True)
+        self.stats = self.directory / ".stats"
+        self.stats.mkdir(parents=True, exist_ok=True)
+        self._stats_lock = threading.Lock()
+        self._stats_pid = None
+        atexit.register(self._save_stats)
+
+    ###################################################################################################
+    # LOCKS
+    ###################################################################################################
+    def _open_lock(self, lock_path: Path, *, operation: int) -> TextIO | None:
+        # Lock files may be removed by their holder, so a lock is only held once it is on the file still at that path.
+        # Returns None if non-blocking, and already held.
+        while True:
+            f = open(lock_path, "a")
+            try:
+                fcntl.flock(f, operation)
+            except BlockingIOError:
+                f.close()
+                return None
+            try:
+                if os.fstat(f.fileno()).st_ino == os.stat(lock_path).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            f.close()
+
+    def _close_lock(self, f: TextIO, *, remove: bool = False) -> None:
+        # Only remove a lock file while holding it exclusively, so that no other process is waiting on it unseen
+        if remove:
+            Path(f.name).unlink(missing_ok=True)
+        fcntl.flock(f, fcntl.LOCK_UN)
+        f.close()
+
+    @contextmanager
+    def _lock(self, name: str, *, remove: bool = False) -> Iterator[None]:
+        f = self._open_lock(self.locks / f"{name}.lock", operation=fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            self._close_lock(f, remove=remove)
+
+    @contextmanager
+    def pin(self, *, filename: str, folder_id: UUID | str | None = None) -> Iterator[Path]:
+        # Get a cached file, and keep it from eviction until the context exits
+        f = self._open_lock(self.locks / f"{filename}.pin", operation=fcntl.LOCK_SH)
+        try:
+            yield self.get(filename=filename, folder_id=folder_id)
+        finally:
+            self._close_lock(f)
+
+    def _touch(self, source_path: Path) -> bool:
+        try:
+            os.utime(source_path)
+            return True
+        except FileNotFoundError:
+            # Evicted in the meantime
+            return False
+
+    ###################################################################################################
+    # METRICS
+    ###################################################################################################
+    def _record(self, **kwargs) -> None:
+        with self._stats_lock:
+            if self._stats_pid != os.getpid():
+                # New process, e.g. a forked worker, with counts of its own
+                self._stats_pid = os.getpid()
+                self._stats_path = self.stats / f"{self._stats_pid}.{uuid4().hex}.json"
+                self._stats_counts = {}
+                self._stats_saved = time.monotonic()
+            for key, value in kwargs.items():
+                self._stats_counts[key] = self._stats_counts.get(key, 0) + value
+            if time.monotonic() - self._stats_saved < settings.CACHE_STATS_INTERVAL:
+                return
+        self._save_stats()
+
+    def _save_stats(self) -> None:
+        # Only this process writes its file, so no lock is needed between processes
+        with self._stats_lock:
+            if self._stats_pid != os.getpid():
+                return
+            partial_path = self._stats_path.with_suffix(f".{uuid4().hex}.part")
+            partial_path.write_text(json.dumps(self._stats_counts))
+            os.replace(partial_path, self._stats_path)
+            self._stats_saved = time.monotonic()
+
+    def _load_stats(self) -> dict:
+        self._save_stats()
+        stats = {}
+        for stats_path in self.stats.glob("*.json"):
+            try:
+                counts = json.loads(stats_path.read_text())
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+            for key, value in counts.items():
+                stats[key] = stats.get(key, 0) + value
+        return stats
+
+    ###################################################################################################
+    # ENTRIES
+    ###################################################################################################
+    def get_entries(self) -> list[tuple[os.stat_result, Path]]:
+        # Cached files, least recently used first. Hidden files are locks, metrics and partial fills.
+        entries = []
+        for source_path in self.directory.iterdir():
+            if source_path.name.startswith(".") or not source_path.is_file():
+                continue
+            try:
+                entries.append((source_path.stat(), source_path))
+            except FileNotFoundError:
+                continue
+        return sorted(entries, key=lambda x: x[0].st_mtime)
+
+    def get_size(self) -> int:
+        return sum(stat.st_size for stat, _ in self.get_entries())
+
+    def get(self, *, filename: str, folder_id: UUID | str | None = None) -> Path:
+        # The path is safe to open for `CACHE_GRACE_SECONDS`. Use `pin` to hold on to it for longer.
+        source_path = self.directory / filename
+        if source_path.exists() and self._touch(source_path):
+            self._record(hits=1)
+            return source_path
+        with self._lock(filename, remove=True):
+            # Another task may have filled it while we waited for the lock
+            if source_path.exists() and self._touch(source_path):
+                self._record(hits=1)
+                return source_path
+            partial_path = self.directory / f".{filename}.{uuid4().hex}.part"
+            try:
+                if not spaces.download_file(filename=filename, folder_id=folder_id, source_path=str(partial_path)):
+                    self._record(misses=1)
+                    return source_path
+                os.replace(partial_path, source_path)
+            finally:
+                partial_path.unlink(missing_ok=True)
+            self._record(misses=1, downloaded_bytes=source_path.stat().st_size)
+        self.evict(keep=filename)
+        return source_path
+
+    def put(self, *, source_path: Path | str) -> None:
+        # A file written straight into the cache directory, e.g. a source which has just been uploaded
+        self._touch(Path(source_path))
+        self.evict(keep=Path(source_path).name)
+
+    def _remove(self, *, source_path: Path) -> bool:
+        # Unlink an entry, unless it is pinned. The pin is held exclusively while unlinking, so none can start.
+        f = self._open_lock(self.locks / f"{source_path.name}.pin", operation=fcntl.LOCK_EX | fcntl.LOCK_NB)
+        if not f:
+            return False
+        try:
+            source_path.unlink(missing_ok=True)
+        finally:
+            self._close_lock(f, remove=True)
+        return True
+
+    def evict(self, *, keep: str | None = None, max_bytes: int | None = None) -> int:
+        # Remove least recently used files until the cache is within budget, other than those pinned, or used within
+        # the grace period. Returns the number of files evicted.
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        evicted = 0
+        evicted_bytes = 0
+        grace_time = time.time() - self.grace
+        with self._lock("__evict__"):
+            entries = self.get_entries()
+            cache_size = sum(stat.st_size for stat, _ in entries)
+            for stat, source_path in entries:
+                if cache_size <= max_bytes:
+                    break
+                if source_path.name == keep or stat.st_mtime > grace_time:
+                    continue
+                if not self._remove(source_path=source_path):
+                    continue
+                cache_size -= stat.st_size
+                evicted += 1
+                evicted_bytes += stat.st_size
+        if evicted:
+            self._record(evictions=evicted, evicted_bytes=evicted_bytes)
+            logger.info(f"Evicted {evicted} file(s) ({evicted_bytes} bytes) from the source cache.")
+        return evicted
+
+    def get_stats(self) -> dict:
+        stats = {"hits": 0, "misses": 0, "evictions": 0, "downloaded_bytes": 0, "evicted_bytes": 0}
+        stats.update(self._load_stats())
+        entries = self.get_entries()
+        stats["files"] = len(entries)
+        stats["size"] = sum(stat.st_size for stat, _ in entries)
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+class ModelCache:
+    # In-process LRU cache, with a time-to-live, for parsed pydantic models.
+    # Models are copied on the way in and out, so callers (e.g. websocket editing sessions) may mutate what they get
+    # without corrupting the cached state. The cache is versioned, and every invalidation bumps the version, so that a
+    # slow load which started before an update cannot write stale data back into the cache.
+    def __init__(self, *, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = 0
+        self._data: OrderedDict[Hashable, tuple[float, BaseModel]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> BaseModel | None:
+        with self._lock:
+            cached = self._data.get(key)
+            if cached and time.monotonic() - cached[0] <= self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return cached[1].model_copy(deep=True)
+            if cached:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, obj_in: BaseModel, *, version: int) -> None:
+        # `version` is the cache version read before the model was loaded
+        if not self.max_size:
+            return
+        obj_in = obj_in.model_copy(deep=True)
+        with self._lock:
+            if version != self.version:
+                return
+            self._data[key] = (time.monotonic(), obj_in)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, match: Callable[[Hashable], bool]) -> None:
+        # Drop every key for which `match(key)` is True
+        with self._lock:
+            self.version += 1
+            for key in [k for k in self._data if match(k)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._data.clear()
+
+
+cache = CRUDCache()
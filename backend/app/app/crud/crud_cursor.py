@@ -0,0 +1,126 @@
+from __future__ import annotations
+from typing import Any
+from datetime import date, datetime
+from enum import Enum
+from uuid import UUID
+import base64
+import json
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import ColumnElement, false, literal, true, tuple_
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+
+# A sort key is a column (or column expression) and whether it is descending. Nulls always sort last.
+SortKey = tuple[Any, bool]
+
+
+class CRUDCursor:
+    # Keyset pagination. A cursor is the opaque encoding of the sort keys of the last row of a page, and the next page
+    # is the rows after it in sort order. Unlike an offset, no skipped rows are read, so deep pages are as fast as the
+    # first. Every sort must end on a unique key (usually `id`), so that a page boundary is never ambiguous.
+
+    ###################################################################################################
+    # ENCODING
+    ###################################################################################################
+    def encode(self, *, values: list[Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(jsonable_encoder(values)).encode("utf-8")).decode("utf-8")
+
+    def decode(self, *, cursor: str, keys: list[SortKey]) -> list[Any]:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode("utf-8")))
+        except ValueError:
+            raise ValueError("Invalid cursor.")
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("Invalid cursor, or it is for a different sort order.")
+        try:
+            return [self._load(value=value, column=column) for value, (column, _) in zip(values, keys)]
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor.")
+
+    def _load(self, *, value: Any, column: Any) -> Any:
+        # JSON values back to the column's type, since they are bound as parameters
+        if value is None:
+            return None
+        try:
+            python_type = column.type.python_type
+        except (AttributeError, NotImplementedError):
+            return value
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        if issubclass(python_type, (Enum, UUID)):
+            return python_type(value)
+        return value
+
+    ###################################################################################################
+    # PAGINATION
+    ###################################################################################################
+    def get_order_by(self, *, keys: list[SortKey]) -> list[ColumnElement]:
+        return [column.desc().nulls_last() if descending else column.asc().nulls_last() for column, descending in keys]
+
+    def _is_nullable(self, *, column: Any) -> bool:
+        # Expressions (e.g. a scalar subquery) may always be null
+        return getattr(getattr(column, "expression", column), "nullable", True)
+
+    def get_filter(self, *, keys: list[SortKey], values: list[Any]) -> ColumnElement:
+        # Rows after `values` in sort order
+        directions = {descending for _, descending in keys}
+        if len(directions) == 1 and None not in values and not any(self._is_nullable(column=c) for c, _ in keys):
+            # A row comparison, e.g. (created, id) < (:created, :id), is a range read on a matching index
+            columns = tuple_(*[column for column, _ in keys])
+            values = tuple_(*[literal(value) for value in values])
+            return columns < values if directions.pop() else columns > values
+        # Otherwise: (k1 after v1) or (k1 = v1 and k2 after v2) or ...
+        db_filter = false()
+        is_equal = true()
+        for (column, descending), value in zip(keys, values):
+            if value is None:
+                # Nulls are last, so only another null can follow
+                is_after = false()
+                is_same = column.is_(None)
+            else:
+                # As a bound literal, since SQLAlchemy refuses to compare booleans with `<` or `>`
+                value = literal(value)
+                is_after = column < value if descending else column > value
+                if self._is_nullable(column=column):
+                    is_after = is_after | column.is_(None)
+                is_same = column == value
+            db_filter = db_filter | (is_equal & is_after)
+            is_equal = is_equal & is_same
+        return db_filter
+
+    def get_page(
+        self,
+        db_query: Query,
+        *,
+        keys: list[SortKey],
+        cursor: str | None = None,
+        page: int = 0,
+        page_break: bool = False,
+    ) -> Query:
+        # Keyset pagination if there is a `cursor`, else offset by `page`, for compatibility
+        db_query = db_query.order_by(*self.get_order_by(keys=keys))
+        if page_break:
+            return db_query
+        if cursor:
+            db_query = db_query.filter(self.get_filter(keys=keys, values=self.decode(cursor=cursor, keys=keys)))
+        elif page > 0:
+            db_query = db_query.offset(page * settings.MULTI_MAX)
+        return db_query.limit(settings.MULTI_MAX)
+
+    def get_next(self, db: Session, *, db_objs: list[Any], keys: list[SortKey]) -> str | None:
+        # The cursor after the last row of a full page. Sort keys are read from the database, since some are
+        # expressions (e.g. latest activity) with no equivalent attribute.
+        if len(db_objs) < settings.MULTI_MAX:
+            return None
+        db_obj = db_objs[-1]
+        values = db.query(*[column for column, _ in keys]).filter(type(db_obj).id == db_obj.id).first()
+        if values is None:
+            return None
+        return self.encode(values=list(values))
+
+
+cursor = CRUDCursor()
@@ -2,28 +2,57 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 from fastapi import UploadFile
 import base64
+import codecs
+import hashlib
+import json
+import logging
+import os
 from uuid import UUID, uuid4
 from pathlib import Path
 import posixpath
+from contextlib import contextmanager
+import re
 import urllib
 import time
+import tracemalloc
 import modin.pandas as pd
 import numpy as np
-from io import BufferedReader
+import pyarrow as pa
+import pyarrow.parquet as pq
 from collections.abc import Iterator
 from botocore.response import StreamingBody
-from whyqd.parsers import CoreParser, DataSourceParser
-from whyqd.models import DataSourceModel, SchemaModel, CrosswalkModel, TransformModel, VersionModel
+from whyqd.parsers import CoreParser
+from whyqd.models import (
+    DataSourceModel,
+    DataSourceAttributeModel,
+    SchemaModel,
+    CrosswalkModel,
+    TransformModel,
+    VersionModel,
+)
 
 from app.core.config import settings
+from app.core.security import create_presigned_token
 from app.schema_types import MimeType, ReferenceType
 from app.schemas.templates import DataSourceTemplateModel, CrosswalkTemplateModel
 from app.schemas.resource import ResourceDataReference
 from app.crud.crud_spaces import spaces
+from app.crud.crud_cache import cache, ModelCache
+from app.utilities.dataframe import DataSourceReader, get_engine, to_pandas, get_column_statistics
+from app.utilities.http import parse_byte_range, get_byte_range
 
 if TYPE_CHECKING:
+    from whyqd import CrosswalkDefinition, TransformDefinition
     from app.models.user import User
 
+logger = logging.getLogger(__name__)
+
+# Crosswalk actions whose result for a row depends only on that row, and so are the same partition by partition.
+# SEPARATE is not, since it checks the number of destination fields against the widest split it sees.
+STREAMABLE_ACTIONS = {"NEW", "RENAME", "CATEGORISE", "COLLATE", "UNITE", "CALCULATE", "SELECT"}
+
+# `{checksum}.{MIME}`, where the checksum is a Blake2b hex digest
+BLOB_NAME = re.compile(r"^[0-9a-f]{128}\.[A-Z]+$")
 
 class CRUDFiles:
     def __init__(self):
@@ -31,11 +60,13 @@ class CRUDFiles:
         CRUD object with default methods to Create, Read, Update, Delete (CRUD) working data on the local drive.
         """
         self.core = CoreParser()
-        self.reader = DataSourceParser()
+        self.reader = DataSourceReader()
         self.directory = self.core.check_path(directory=settings.WORKING_PATH + settings.REFERENCE_PATH)
         self.summary = self.core.check_path(directory=settings.WORKING_PATH + settings.SUMMARY_PATH)
         self.temporary = self.core.check_path(directory=settings.WHYQD_DIRECTORY)
         self.use_spaces = settings.USE_SPACES
+        self.models = ModelCache(max_size=settings.MODEL_CACHE_SIZE, ttl=settings.MODEL_CACHE_TTL)
+        self.model_stamps = Path(settings.WORKING_PATH + settings.MODEL_PATH)
 
     def import_source_from_upload(
         self,
@@ -43,21 +74,170 @@ class CRUDFiles:
         source: UploadFile,
         datasource_in: DataSourceTemplateModel,
     ) -> DataSourceTemplateModel:
+        # A single pass over the upload: hashed, counted and sniffed as it streams to its content-addressed location
         datasource_in.uuid = uuid4()
-        mimetype = self.reader.get_mimetype(mimetype=datasource_in.mime)
-        datasource_name = f"{datasource_in.uuid}.{mimetype.name}"
-        datasource_in.path = datasource_name
+        try:
+            mimetype = self.reader.get_mimetype(mimetype=datasource_in.mime)
+        except ValueError:
+            raise ValueError(f"Source type ({datasource_in.mime}) is not supported.")
+        if source.size and source.size > settings.UPLOAD_MAX_BYTES:
+            raise ValueError(f"Source ({source.filename}) is larger than the {settings.UPLOAD_MAX_BYTES} byte limit.")
+        partial_path = self.directory / f".{datasource_in.uuid}.{mimetype.name}.part"
+        checksum = hashlib.blake2b()
+        size = 0
         # https://stackoverflow.com/questions/63048825/how-to-upload-file-using-fastapi/70657621#70657621
         try:
-            with open(self.temporary / datasource_name, "wb") as f:
-                while contents := source.file.read():
-                    f.write(contents)
+            with open(partial_path, "wb") as f:
+                while chunk := source.file.read(settings.CHUNK_SIZE):
+                    if not size:
+                        encoding = self.validate_upload(chunk=chunk, mimetype=mimetype)
+                        if encoding and isinstance(datasource_in.attributes, dict):
+                            datasource_in.attributes.setdefault("encoding", encoding)
+                    size += len(chunk)
+                    if size > settings.UPLOAD_MAX_BYTES:
+                        raise ValueError(
+                            f"Source ({source.filename}) is larger than the {settings.UPLOAD_MAX_BYTES} byte limit."
+                        )
+                    checksum.update(chunk)
+                    f.write(chunk)
+            if not size:
+                raise ValueError(f"Source ({source.filename}) is empty.")
+            datasource_in = self.store_source(
+                source=partial_path, datasource_in=datasource_in, mimetype=mimetype, checksum=checksum.hexdigest()
+            )
         except Exception as e:
             raise ValueError(e)
         finally:
+            partial_path.unlink(missing_ok=True)
             source.file.close()
         return datasource_in
 
+    def store_source(
+        self, *, source: Path, datasource_in: DataSourceTemplateModel, mimetype: MimeType, checksum: str
+    ) -> DataSourceTemplateModel:
+        # Move a complete, hashed, upload in the reference directory to its content address. No copy is made.
+        datasource_in.mime = mimetype
+        datasource_in.checksum = checksum
+        datasource_in.path = self.get_source_name(obj_id=datasource_in.uuid, mimetype=mimetype, checksum=checksum)
+        source_path = self.directory / datasource_in.path
+        if self.core.check_source(source=source_path):
+            # Duplicate bytes. Touched, so they are not collected before the import links them.
+            source.unlink(missing_ok=True)
+            os.utime(source_path)
+        else:
+            source.rename(source_path)
+        if self.use_spaces and not spaces.exists(filename=datasource_in.path):
+            spaces.upload_file(filename=datasource_in.path, source_path=source_path)
+        return datasource_in
+
+    ###################################################################################################
+    # RESUMABLE UPLOADS
+    ###################################################################################################
+    def get_upload_path(self, *, upload_id: UUID | str) -> Path:
+        # Hidden, so never treated as a cached source, and swept as a partial upload once abandoned
+        return self.directory / f".{upload_id}.upload.part"
+
+    def create_upload(self, *, upload_id: UUID | str, size: int) -> None:
+        # Sparse file of the final size, so chunks can be written at their offsets in any order
+        with open(self.get_upload_path(upload_id=upload_id), "wb") as f:
+            f.truncate(size)
+
+    def write_upload_chunk(self, *, upload_id: UUID | str, offset: int, data: bytes) -> None:
+        with open(self.get_upload_path(upload_id=upload_id), "r+b") as f:
+            os.pwrite(f.fileno(), data, offset)
+
+    def store_upload(
+        self, *, upload_id: UUID | str, datasource_in: DataSourceTemplateModel, mimetype: MimeType, checksum: str
+    ) -> DataSourceTemplateModel:
+        upload_path = self.get_upload_path(upload_id=upload_id)
+        with open(upload_path, "rb") as f:
+            encoding = self.validate_upload(chunk=f.read(settings.CHUNK_SIZE), mimetype=mimetype)
+        if encoding and isinstance(datasource_in.attributes, dict):
+            datasource_in.attributes.setdefault("encoding", encoding)
+        datasource_in.uuid = uuid4()
+        return self.store_source(source=upload_path, datasource_in=datasource_in, mimetype=mimetype, checksum=checksum)
+
+    def delete_upload(self, *, upload_id: UUID | str) -> None:
+        self.core.delete_file(source=self.get_upload_path(upload_id=upload_id))
+
+    ###################################################################################################
+    # PRESIGNED TRANSFERS
+    ###################################################################################################
+    def get_presigned_url(self, *, token: str) -> str:
+        return f"{str(settings.SERVER_HOST).rstrip('/')}{settings.API_V1_STR}/data/presigned/{token}"
+
+    def get_presigned_download(self, *, obj_name: str, download_name: str | None = None) -> str:
+        if self.use_spaces:
+            return spaces.get_presigned_download(filename=obj_name, download_name=download_name)
+        token = create_presigned_token(key=obj_name, method="GET", filename=download_name)
+        return self.get_presigned_url(token=token)
+
+    def get_presigned_upload(self, *, upload_id: UUID | str, mimetype: MimeType, size: int) -> dict:
+        # Uploads are staged in the bucket under `uploads/`, or locally as a partial upload, until imported
+        if self.use_spaces:
+            return spaces.get_presigned_upload(filename=f"uploads/{upload_id}.{mimetype.name}", size=size)
+        token = create_presigned_token(key=str(upload_id), method="POST", max_bytes=size)
+        return {"url": self.get_presigned_url(token=token), "fields": {}}
+
+    def import_source_from_presigned(
+        self,
+        *,
+        upload_id: UUID | str,
+        datasource_in: DataSourceTemplateModel,
+        checksum: str | None = None,
+    ) -> DataSourceTemplateModel:
+        # Runs in the worker, so the API never carries the bytes. Hashed as it is fetched from staging.
+        mimetype = self.reader.get_mimetype(mimetype=datasource_in.mime)
+        upload_path = self.get_upload_path(upload_id=upload_id)
+        try:
+            if self.use_spaces:
+                key = f"uploads/{upload_id}.{mimetype.name}"
+                obj = spaces.get_object(filename=key)
+                if not obj:
+                    raise ValueError(f"Upload ({datasource_in.name}) was not received.")
+                with open(upload_path, "wb") as f:
+                    for chunk in obj["Body"].iter_chunks(chunk_size=settings.CHUNK_SIZE):
+                        f.write(chunk)
+                spaces.remove(filename=key)
+            if not self.core.check_source(source=upload_path):
+                raise ValueError(f"Upload ({datasource_in.name}) was not received.")
+            received_checksum, _ = self.get_source_checksum(source=upload_path)
+            if checksum and received_checksum != checksum:
+                raise ValueError(f"Upload ({datasource_in.name}) checksum does not match.")
+            return self.store_upload(
+                upload_id=upload_id, datasource_in=datasource_in, mimetype=mimetype, checksum=received_checksum
+            )
+        finally:
+            self.delete_upload(upload_id=upload_id)
+
+    def validate_upload(self, *, chunk: bytes, mimetype: MimeType) -> str | None:
+        # Sniff the file type from the first chunk of an upload, and reject it if it is not what it claims to be.
+        # Returns the text encoding, for CSV sources which are not UTF-8.
+        signatures = {
+            MimeType.PARQUET.value: [b"PAR1"],
+            MimeType.FEATHER.value: [b"ARROW1"],
+            MimeType.XLSX.value: [b"PK\x03\x04"],
+            MimeType.XLS.value: [b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"],
+        }
+        if mimetype.value in signatures:
+            if not any(chunk.startswith(signature) for signature in signatures[mimetype.value]):
+                raise ValueError(f"Source does not appear to be of the type declared ({mimetype.name}).")
+            return None
+        if mimetype.value != MimeType.CSV.value:
+            raise ValueError(f"Source type ({mimetype.name}) is not supported.")
+        if chunk.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        if chunk.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return "utf-16"
+        if b"\x00" in chunk or any(chunk.startswith(s) for v in signatures.values() for s in v):
+            raise ValueError(f"Source does not appear to be of the type declared ({mimetype.name}).")
+        try:
+            # Incremental, so a multi-byte character split at the end of the chunk is not an error
+            codecs.getincrementaldecoder("utf-8")().decode(chunk, final=False)
+        except UnicodeDecodeError:
+            return "latin-1"
+        return None
+
     def import_source(
         self,
         *,
@@ -95,7 +275,10 @@ class CRUDFiles:
         *,
         data: pd.DataFrame,
         mimetype: MimeType | str | None = None,
-    ) -> DataSourceTemplateModel:
+    ) -> tuple[DataSourceTemplateModel, DataSourceModel, str]:
+        # Materialise a transform output from the DataFrame already in memory: the stored file (with the checksum of
+        # its bytes), its data model (checksum, columns and row count), and its summary rows. Nothing is written and
+        # then read back. Outputs are stored by UUID, so the checksum is only a validator, not a content address.
         if not mimetype:
             mimetype = settings.WHYQD_DEFAULT_MIMETYPE
         mimetype = self.reader.get_mimetype(mimetype=mimetype)
@@ -103,21 +286,282 @@ class CRUDFiles:
         datasource_in.name = f"{datasource_in.uuid}.{mimetype.name}"
         datasource_in.mime = mimetype
         datasource_in.path = f"{datasource_in.uuid}.{mimetype.name}"
-        self.reader.set(df=data, source=self.temporary / datasource_in.path, mimetype=mimetype)
-        self.save_source(obj_id=datasource_in.uuid, mimetype=mimetype)
-        return datasource_in
+        if self.use_spaces and mimetype == MimeType.CSV:
+            # Stream straight to the bucket, part by part. The local cache is filled on first read.
+            datasource_in.checksum = spaces.save_stream(filename=datasource_in.path, df=data)
+        else:
+            source_path = self.temporary / datasource_in.path
+            if mimetype in [MimeType.PARQUET, MimeType.PRQ]:
+                # Modin writes Parquet as a directory of partitions, but a stored source must be a single file
+                to_pandas(data).to_parquet(path=source_path, engine="pyarrow", index=False)
+            else:
+                self.reader.set(df=data, source=source_path, mimetype=mimetype)
+            datasource_in.checksum, _ = self.get_source_checksum(source=source_path)
+            self.save_source(obj_id=datasource_in.uuid, mimetype=mimetype)
+        data_in = self.reader.get_source_data_model(df=data, source=datasource_in.path, mimetype=mimetype)
+        summary = self.get_summary(df=data.iloc[: settings.WHYQD_SUMMARY_ROWS])
+        return datasource_in, data_in, summary
+
+    ###################################################################################################
+    # PROFILED TRANSFORMS
+    ###################################################################################################
+    def apply_actions(
+        self, *, crosswalk: CrosswalkDefinition, df: pd.DataFrame, profile: list[dict] | None = None
+    ) -> pd.DataFrame:
+        # As for whyqd's `transform_all`, but if a `profile` list is given, each action's wall time, peak memory, and
+        # shapes are recorded. Called once per partition, the profile accumulates: times and rows are summed, and peak
+        # memory is the largest of any partition. Only allocations in this process are traced, so memory held by Ray
+        # for modin partitions is not counted.
+        if profile is None:
+            return crosswalk.crud.transform_all(df=df)
+        for i, script in enumerate(crosswalk.actions.get_all()):
+            if len(profile) <= i:
+                profile.append(
+                    {
+                        "uuid": str(script.uuid),
+                        "action": crosswalk.actions.get_action(script=script.script).name,
+                        "seconds": 0.0,
+                        "peakMemory": 0,
+                        "rowsIn": 0,
+                        "rowsOut": 0,
+                        "columnsIn": 0,
+                        "columnsOut": 0,
+                    }
+                )
+            rows_in, columns_in = df.shape
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            df = crosswalk.actions.transform(df=df, script=script)
+            seconds = time.perf_counter() - start
+            _, peak_memory = tracemalloc.get_traced_memory()
+            if not tracing:
+                tracemalloc.stop()
+            profile[i]["seconds"] += seconds
+            profile[i]["peakMemory"] = max(profile[i]["peakMemory"], peak_memory)
+            profile[i]["rowsIn"] += rows_in
+            profile[i]["rowsOut"] += len(df)
+            profile[i]["columnsIn"] = columns_in
+            profile[i]["columnsOut"] = len(df.columns)
+        return df
+
+    def profile_transform(self, *, transform: TransformDefinition) -> list[dict]:
+        # Instrumented counterpart to `transform.process`, which leaves the crosswalked DataFrame at `transform.data`
+        # and returns the profile of each action
+        profile = []
+        crosswalk = transform.crosswalk
+        crosswalk.validate()
+        df = transform.reader.get(source=transform.data_source)
+        df = transform.reader.coerce_to_schema(df=df, schema=crosswalk.schema_source)
+        df = self.apply_actions(crosswalk=crosswalk, df=df, profile=profile)
+        destination_names = [f.name for f in crosswalk.schema_destination.fields.get_all() if f.name in df.columns]
+        df = transform.reader.coerce_to_schema(df=df[destination_names], schema=crosswalk.schema_destination)
+        required_names = {f.name for f in crosswalk.schema_destination.fields.get_required()}
+        if required_names - set(df.columns):
+            raise ValueError(
+                f"Missing required destination fields in crosswalked data: {required_names - set(df.columns)}"
+            )
+        transform.data = df
+        return profile
+
+    def save_transform_profile(self, *, obj_id: UUID | str, profile: list[dict]) -> None:
+        self.save_json(obj_name=f"{obj_id}.PROFILE", source=profile)
+
+    def get_transform_profile(self, *, obj_id: UUID | str) -> list:
+        # Only profiled transforms have one
+        return self.get_json(obj_name=f"{obj_id}.PROFILE") or []
+
+    def delete_transform_profile(self, *, obj_id: UUID | str) -> None:
+        self.delete_json(obj_name=f"{obj_id}.PROFILE")
+
+    ###################################################################################################
+    # STREAMED TRANSFORMS
+    ###################################################################################################
+    def is_streamable(self, *, transform: TransformDefinition, mimetype: MimeType | str | None = None) -> bool:
+        # Only large Parquet sources (i.e. canonical copies) can be read a partition at a time, and only row-local
+        # crosswalks give the same result partition by partition
+        data_in = transform.data_source
+        if not settings.WHYQD_STREAM_ROWS or not data_in or (data_in.index or 0) <= settings.WHYQD_STREAM_ROWS:
+            return False
+        if self.reader.get_mimetype(mimetype=data_in.mime) not in [MimeType.PARQUET, MimeType.PRQ]:
+            return False
+        mimetype = self.reader.get_mimetype(mimetype=mimetype or settings.WHYQD_DEFAULT_MIMETYPE)
+        if mimetype not in [MimeType.PARQUET, MimeType.PRQ, MimeType.CSV]:
+            return False
+        crud = transform.crosswalk.crud
+        return all(crud.get_action(script=script.script).name in STREAMABLE_ACTIONS for script in crud.get_all())
 
-    def get_transform_datamodel(
+    def stream_transform(
         self,
         *,
-        data: pd.DataFrame,
-        datasource_in: DataSourceTemplateModel,
-    ) -> DataSourceModel:
-        data_in = self.reader.get_source_data_model(
-            df=data, source=self.temporary / datasource_in.path, mimetype=datasource_in.mime
+        transform: TransformDefinition,
+        mimetype: MimeType | str | None = None,
+        profile: list[dict] | None = None,
+    ) -> tuple[DataSourceTemplateModel, DataSourceModel, str]:
+        # Out-of-core counterpart to `transform.process` and `import_transform`. Each partition of the source is
+        # crosswalked and appended to the output, so only one partition is ever in memory. The data model checksum is
+        # of the stored file, since whyqd's data checksum needs the whole DataFrame.
+        if not mimetype:
+            mimetype = settings.WHYQD_DEFAULT_MIMETYPE
+        mimetype = self.reader.get_mimetype(mimetype=mimetype)
+        crosswalk = transform.crosswalk
+        crosswalk.validate()
+        data_in = transform.data_source
+        attributes = data_in.attributes.terms if data_in.attributes else {}
+        destination_fields = crosswalk.schema_destination.fields.get_all()
+        required_names = {f.name for f in crosswalk.schema_destination.fields.get_required()}
+        datasource_in = DataSourceTemplateModel()
+        datasource_in.name = f"{datasource_in.uuid}.{mimetype.name}"
+        datasource_in.mime = mimetype
+        datasource_in.path = f"{datasource_in.uuid}.{mimetype.name}"
+        source_path = self.temporary / datasource_in.path
+        parquet = pq.ParquetFile(data_in.path)
+        writer = None
+        destination_names = []
+        columns = []
+        summary = "[]"
+        rows = 0
+        try:
+            for batch in parquet.iter_batches(batch_size=settings.WHYQD_STREAM_ROWS, columns=attributes.get("columns")):
+                df = batch.to_pandas()
+                if get_engine(nrows=len(df)) is pd:
+                    df = pd.DataFrame(df)
+                df = self.reader.coerce_to_schema(df=df, schema=crosswalk.schema_source)
+                df = self.apply_actions(crosswalk=crosswalk, df=df, profile=profile)
+                names = [f.name for f in destination_fields if f.name in df.columns]
+                # Coercion aligns on the index, which some actions (e.g. RENAME) turn into strings
+                df = self.reader.coerce_to_schema(
+                    df=df[names].reset_index(drop=True), schema=crosswalk.schema_destination
+                )
+                if required_names - set(df.columns):
+                    raise ValueError(
+                        f"Missing required destination fields in crosswalked data: {required_names - set(df.columns)}"
+                    )
+                if not rows:
+                    destination_names = names
+                    columns = self.reader.get_header_columns(df=df)
+                    summary = self.get_summary(df=df.iloc[: settings.WHYQD_SUMMARY_ROWS])
+                elif names != destination_names:
+                    raise ValueError(f"Crosswalked partitions have inconsistent fields: {names} != {destination_names}")
+                df = to_pandas(df)
+                if mimetype == MimeType.CSV:
+                    df.to_csv(source_path, mode="a", header=not rows, index=False)
+                else:
+                    table = pa.Table.from_pandas(df, preserve_index=False)
+                    if writer is None:
+                        # A column which is empty throughout the first partition has no type, so is written as string
+                        schema = pa.schema(
+                            [f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in table.schema]
+                        )
+                        writer = pq.ParquetWriter(source_path, schema=schema)
+                    writer.write_table(table.cast(writer.schema))
+                rows += len(df)
+                del df
+        except Exception:
+            if writer is not None:
+                writer.close()
+            self.delete_source(obj_id=datasource_in.uuid, mimetype=mimetype, is_temporary=True)
+            raise
+        if writer is not None:
+            writer.close()
+        if not rows:
+            raise ValueError("Crosswalked data are empty.")
+        checksum, _ = self.get_source_checksum(source=source_path)
+        datasource_in.checksum = checksum
+        self.save_source(obj_id=datasource_in.uuid, mimetype=mimetype)
+        data_in = DataSourceModel(
+            path=datasource_in.path,
+            mime=mimetype,
+            columns=columns,
+            preserve=[c.name for c in columns if c.dtype == "string"],
+            checksum=checksum,
+            header=0,
+            index=rows,
         )
-        data_in.path = f"{datasource_in.uuid}.{datasource_in.mime.name}"
-        return data_in
+        return datasource_in, data_in, summary
+
+    ###################################################################################################
+    # CANONICAL COLUMNAR COPIES
+    ###################################################################################################
+    def save_canonical(self, *, data_in: DataSourceModel) -> tuple[str, int] | None:
+        # Typed Parquet copy of a single data model (i.e. one sheet) of a stored source, so that later reads need not
+        # parse CSV or Excel again. Content addressed, like the source. Returns its checksum and size, or None if it
+        # cannot be written, in which case reads fall back to the original source.
+        obj_id = uuid4()
+        temporary_path = self.get_source_path(obj_id=obj_id, mimetype=MimeType.PARQUET, is_temporary=True)
+        try:
+            df = self.reader.get(source=data_in)
+            df.columns = [str(c) for c in df.columns]
+            # Modin writes Parquet as a directory of partitions, but a blob must be a single file
+            df = to_pandas(df)
+            df.to_parquet(path=temporary_path, engine="pyarrow", index=False)
+            # While the data are in memory, so that nothing need scan them again
+            self.save_column_statistics(obj_id=data_in.uuid, df=df)
+            del df
+        except Exception as e:
+            logger.warning(f"Canonical copy of data source ({data_in.uuid}) could not be written: {e}")
+            self.delete_source(obj_id=obj_id, mimetype=MimeType.PARQUET, is_temporary=True)
+            return None
+        checksum, size = self.get_source_checksum(source=temporary_path)
+        self.save_source(obj_id=obj_id, mimetype=MimeType.PARQUET, checksum=checksum)
+        return checksum, size
+
+    ###################################################################################################
+    # COLUMN STATISTICS
+    ###################################################################################################
+    def save_column_statistics(self, *, obj_id: UUID | str, df: pd.DataFrame) -> None:
+        # Keyed by the DATA model, and never fatal to an import. Anything reading them falls back to the data.
+        try:
+            self.save_json(obj_name=f"{obj_id}.STATISTICS", source=get_column_statistics(df=df))
+        except Exception as e:
+            logger.warning(f"Column statistics of data model ({obj_id}) could not be computed: {e}")
+
+    def get_column_statistics(self, *, obj_id: UUID | str, name: str | None = None) -> list | dict | None:
+        # All columns, or the column `name`, if it has statistics
+        statistics = self.get_json(obj_name=f"{obj_id}.STATISTICS") or []
+        if name is None:
+            return statistics
+        return next((c for c in statistics if c["name"] == name), None)
+
+    def delete_column_statistics(self, *, obj_id: UUID | str) -> None:
+        self.delete_json(obj_name=f"{obj_id}.STATISTICS")
+
+    def get_canonical_model(
+        self, *, data_in: DataSourceModel, checksum: str, columns: list[str] | None = None
+    ) -> DataSourceModel:
+        # The data model, redirected to its canonical copy. `columns` limits the read to only those columns.
+        source_path = self.get_source_path(obj_id=data_in.uuid, mimetype=MimeType.PARQUET, checksum=checksum)
+        update = {
+            "path": str(source_path),
+            "mime": self.reader.get_mimetype(mimetype=MimeType.PARQUET),
+            "header": 0,
+            "names": None,
+            "attributes": DataSourceAttributeModel({}),
+        }
+        if columns:
+            update["columns"] = [c for c in data_in.columns if c.name in columns]
+            update["preserve"] = [c for c in data_in.preserve or [] if c in columns]
+            update["attributes"] = DataSourceAttributeModel({"columns": columns})
+        return data_in.model_copy(update=update)
+
+    def get_source_checksum(self, *, source: Path | str) -> tuple[str, int]:
+        # Streaming Blake2b hash of the stored file bytes, and the byte count, as the content address of a source
+        checksum = hashlib.blake2b()
+        size = 0
+        with open(source, "rb") as f:
+            while chunk := f.read(settings.CHUNK_SIZE):
+                checksum.update(chunk)
+                size += len(chunk)
+        return checksum.hexdigest(), size
+
+    def get_source_name(self, *, obj_id: UUID | str, mimetype: MimeType, checksum: str | None = None) -> str:
+        # Sources with a checksum are content-addressed blobs, shared by every data source with the same bytes.
+        # Legacy sources, and transform outputs, are still stored by their own UUID.
+        if checksum:
+            return f"{checksum}.{mimetype.name}"
+        return f"{obj_id}.{mimetype.name}"
 
     def get_source_path(
         self,
@@ -125,47 +569,104 @@ class CRUDFiles:
         obj_id: str,
         mimetype: MimeType,
         is_temporary: bool = False,
+        checksum: str | None = None,
     ) -> Path | None:
-        obj_name = f"{obj_id}.{mimetype.name}"
+        obj_name = self.get_source_name(obj_id=obj_id, mimetype=mimetype, checksum=checksum)
         source_path = self.directory
         if is_temporary:
+            # Temporary imports have not been hashed yet, and are always named by UUID
+            obj_name = f"{obj_id}.{mimetype.name}"
             source_path = self.temporary
-        source_path = source_path / obj_name
-        if self.core.check_source(source=source_path):
-            return source_path
-        if self.use_spaces:
-            if spaces.exists(filename=obj_name):
-                spaces.download_file(filename=obj_name, source_path=source_path)
-        return source_path
+        elif self.use_spaces:
+            # Local copies of Spaces sources are a bounded cache
+            return cache.get(filename=obj_name)
+        return source_path / obj_name
+
+    @contextmanager
+    def pin_source(self, *, obj_id: str, mimetype: MimeType, checksum: str | None = None) -> Iterator[Path]:
+        # A source path which stays on disk, i.e. out of cache eviction, until the context exits
+        if not self.use_spaces:
+            yield self.get_source_path(obj_id=obj_id, mimetype=mimetype, checksum=checksum)
+            return
+        with cache.pin(filename=self.get_source_name(obj_id=obj_id, mimetype=mimetype, checksum=checksum)) as path:
+            yield path
 
     def save_source(
         self,
         *,
         obj_id: str,
         mimetype: MimeType,
+        checksum: str | None = None,
     ) -> Path:
         # After import, and all validations, save for storage
-        # Assumption is that it is currently in temporary storage
-        obj_name = f"{obj_id}.{mimetype.name}"
+        # Assumption is that it is currently in temporary storage, unless it was streamed to its content address
+        obj_name = self.get_source_name(obj_id=obj_id, mimetype=mimetype, checksum=checksum)
         temporary_path = self.get_source_path(obj_id=obj_id, mimetype=mimetype, is_temporary=True)
         source_path = self.directory
+        if checksum and self.core.check_source(source=source_path / obj_name):
+            # Already stored, either on upload or as a duplicate of an existing blob
+            os.utime(source_path / obj_name)
+            if self.use_spaces and not spaces.exists(filename=obj_name):
+                spaces.upload_file(filename=obj_name, source_path=source_path / obj_name)
+            self.delete_source(obj_id=obj_id, mimetype=mimetype, is_temporary=True)
+            return source_path / obj_name
+        if checksum and self.blob_exists(obj_name=obj_name):
+            # Duplicate bytes cost nothing extra. Keep the blob we already have.
+            self.delete_source(obj_id=obj_id, mimetype=mimetype, is_temporary=True)
+            return source_path / obj_name
         if self.use_spaces:
             spaces.upload_file(filename=obj_name, source_path=temporary_path)
         # We still need it
         Path(temporary_path).rename(source_path / obj_name)
         self.delete_source(obj_id=obj_id, mimetype=mimetype, is_temporary=True)
+        if self.use_spaces:
+            cache.put(source_path=source_path / obj_name)
         return source_path / obj_name
 
+    def blob_exists(self, *, obj_name: str) -> bool:
+        if self.core.check_source(source=self.directory / obj_name):
+            return True
+        if self.use_spaces:
+            return spaces.exists(filename=obj_name)
+        return False
+
     def delete_source(
         self,
         *,
         obj_id: str,
         mimetype: MimeType,
         is_temporary: bool = False,
+        checksum: str | None = None,
     ) -> None:
-        source_path = self.get_source_path(obj_id=obj_id, mimetype=mimetype, is_temporary=is_temporary)
-        if source_path:
-            self.core.delete_file(source=source_path)
+        if is_temporary:
+            source_path = self.temporary / f"{obj_id}.{mimetype.name}"
+        else:
+            obj_name = self.get_source_name(obj_id=obj_id, mimetype=mimetype, checksum=checksum)
+            source_path = self.directory / obj_name
+            if self.use_spaces:
+                spaces.remove(filename=obj_name)
+        self.core.delete_file(source=source_path)
+
+    def get_blob_sources(self, *, delay: int = 86400) -> dict[str, set[str]]:
+        # Content-addressed sources, locally or in Spaces, not modified for `delay` seconds, by checksum
+        epoch_time = time.time() - delay
+        obj_names = [
+            source.name
+            for source in Path(self.directory).iterdir()
+            if source.is_file() and source.stat().st_mtime <= epoch_time
+        ]
+        if self.use_spaces:
+            obj_names.extend(spaces.get_keys(modified=epoch_time))
+        sources = {}
+        for obj_name in obj_names:
+            if BLOB_NAME.match(obj_name):
+                sources.setdefault(obj_name.partition(".")[0], set()).add(obj_name)
+        return sources
+
+    def delete_blob(self, *, obj_name: str) -> None:
+        if self.use_spaces:
+            spaces.remove(filename=obj_name)
+        self.core.delete_file(source=self.directory / obj_name)
 
     def get(
         self,
@@ -186,9 +687,12 @@ class CRUDFiles:
         resource_model = resource_models[obj_type.name]
         if is_template and obj_type.name == "CROSSWALK":
             resource_model = CrosswalkTemplateModel
+        cache_key = (str(obj_id), self._get_model_stamp(obj_id=obj_id), obj_type.name, resource_model.__name__)
+        cache_version = self.models.version
+        if cached := self.models.get(cache_key):
+            return cached
         if self.use_spaces:
-            if spaces.exists(filename=obj_name):
-                obj_in = spaces.get(filename=obj_name)
+            obj_in = spaces.get(filename=obj_name)
         else:
             source = self.directory
             obj_in = self.core.load_json(source=str(source / obj_name))
@@ -203,20 +707,49 @@ class CRUDFiles:
                         if not isinstance(field["constraints"].get("enum"), list):
                             field["constraints"]["enum"] = []
             obj_in = resource_model(**obj_in)
+            self.models.set(cache_key, obj_in, version=cache_version)
         return obj_in
 
+    def _read_source(self, *, source: Path, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        # `start` and `end` are inclusive byte offsets, as for an HTTP Range
+        with open(source, mode="rb") as stream:
+            stream.seek(start)
+            remaining = float("inf") if end is None else end - start + 1
+            while remaining > 0 and (chunk := stream.read(int(min(settings.CHUNK_SIZE, remaining)))):
+                remaining -= len(chunk)
+                yield chunk
+
     def get_data_stream(
-        self, *, obj_id: str, mimetype: MimeType | str, folder_id: UUID | str | None = None
-    ) -> StreamingBody | Iterator[BufferedReader]:
+        self,
+        *,
+        obj_id: str,
+        mimetype: MimeType | str,
+        folder_id: UUID | str | None = None,
+        checksum: str | None = None,
+        range_header: str | None = None,
+    ) -> tuple[StreamingBody | Iterator[bytes] | None, int, tuple[int, int] | None] | None:
+        # One read of the source, or of one HTTP `Range` of it, as (stream, size, range), where range is the inclusive
+        # (start, end) sent, or None for the whole. The stream is None if the range is not satisfiable, and the whole is
+        # None if there is no source.
         mimetype = self.reader.get_mimetype(mimetype=mimetype)
-        obj_name = f"{obj_id}.{mimetype.name}"
+        obj_name = self.get_source_name(obj_id=obj_id, mimetype=mimetype, checksum=checksum)
         if self.use_spaces:
-            if spaces.exists(filename=obj_name):
-                return spaces.get_stream(filename=obj_name, folder_id=folder_id)
-        if self.core.check_source(source=self.directory / obj_name):
-            with open(self.directory / obj_name, mode="rb") as stream:
-                while chunk := stream.read(settings.CHUNK_SIZE):
-                    yield chunk
+            byte_range = range_header if parse_byte_range(range_header) else None
+            response = spaces.get_stream(filename=obj_name, folder_id=folder_id, byte_range=byte_range)
+            if response:
+                return response
+        source = self.directory / obj_name
+        if not self.core.check_source(source=source):
+            return None
+        size = source.stat().st_size
+        try:
+            byte_range = get_byte_range(range_header=range_header, size=size)
+        except ValueError:
+            return None, size, None
+        if byte_range:
+            start, end = byte_range
+            return self._read_source(source=source, start=start, end=end), size, byte_range
+        return self._read_source(source=source), size, None
 
     def create_or_update(
         self,
@@ -246,6 +779,8 @@ class CRUDFiles:
         else:
             source = self.directory
             self.core.save_file(data=jsn_obj, source=str(source / obj_name))
+        # After the save, so that no concurrent read can cache the previous version
+        self.invalidate_model(obj_id=obj_in.uuid, obj_type=obj_type)
         return obj_in
 
     def remove(
@@ -260,13 +795,29 @@ class CRUDFiles:
             obj_name = f"{obj_name}.{obj_type.name}"
         if not is_temporary and self.use_spaces:
             # `is_temporary` forces for temporary files
-            if spaces.exists(filename=obj_name):
-                spaces.remove(filename=obj_name)
+            spaces.remove(filename=obj_name)
         else:
             source = self.directory
             if is_temporary:
                 source = self.temporary
             self.core.delete_file(source=str(source / obj_name))
+        self.invalidate_model(obj_id=obj_id, obj_type=obj_type)
+
+    def _get_model_stamp(self, *, obj_id: UUID | str) -> str:
+        # Stamps are files in the working directory, so that the API and every worker share them
+        try:
+            return (self.model_stamps / str(obj_id)).read_text()
+        except FileNotFoundError:
+            return ""
+
+    def invalidate_model(self, *, obj_id: UUID | str, obj_type: ReferenceType | None = None) -> None:
+        # A new stamp, so that no process reads its cached parse of this model again, and any cached parse in this
+        # process, as any model class
+        self.model_stamps.mkdir(parents=True, exist_ok=True)
+        partial_path = self.model_stamps / f".{obj_id}.{uuid4().hex}.part"
+        partial_path.write_text(uuid4().hex)
+        os.replace(partial_path, self.model_stamps / str(obj_id))
+        self.models.invalidate(lambda key: key[0] == str(obj_id) and (not obj_type or key[2] == obj_type.name))
 
     def download_uri_source(self, source: str, directory: Path | str | None = None) -> Path:
         """Downloads a source at a remote uri, and returns a Path for that downloaded source.
@@ -298,27 +849,50 @@ class CRUDFiles:
             urllib.request.urlretrieve(source, local_source)
         return local_source
 
-    def save_data_summary(self, *, obj_id: UUID | str, obj_in: DataSourceTemplateModel):
-        mimetype = self.reader.get_mimetype(mimetype=obj_in.mime)
-        datasource_path = self.get_source_path(obj_id=obj_in.uuid, mimetype=mimetype)
-        df = self.reader.get(source=datasource_path, mimetype=mimetype, nrows=settings.WHYQD_SUMMARY_ROWS)
-        if isinstance(df, dict):
-            for sheet_name, dfs in df.items():
-                dfs = dfs.fillna(np.nan).replace([np.nan], [None])
-                jsn_obj = dfs.to_json(path_or_buf=None, orient="records")
-                obj_name = f"{obj_id}-{sheet_name.lower()}.SUMMARY"
-                if self.use_spaces:
-                    spaces.update(source=jsn_obj, filename=obj_name)
-                else:
-                    self.core.save_file(data=jsn_obj, source=str(self.summary / obj_name))
+    def get_summary(self, *, df: pd.DataFrame) -> str:
+        df = df.fillna(np.nan).replace([np.nan], [None])
+        return df.to_json(path_or_buf=None, orient="records")
+
+    def save_summary(self, *, obj_id: UUID | str, summary: str, sheet_name: str | None = None) -> None:
+        obj_name = f"{obj_id}.SUMMARY"
+        if sheet_name:
+            obj_name = f"{obj_id}-{sheet_name.lower()}.SUMMARY"
+        if self.use_spaces:
+            spaces.update(source=summary, filename=obj_name)
         else:
-            df = df.fillna(np.nan).replace([np.nan], [None])
-            jsn_obj = df.to_json(path_or_buf=None, orient="records")
-            obj_name = f"{obj_id}.SUMMARY"
-            if self.use_spaces:
-                spaces.update(source=jsn_obj, filename=obj_name)
-            else:
-                self.core.save_file(data=jsn_obj, source=str(self.summary / obj_name))
+            self.core.save_file(data=summary, source=str(self.summary / obj_name))
+
+    def save_json(self, *, obj_name: str, source: list | dict) -> None:
+        # Small JSON catalogues kept with the summaries, e.g. transform profiles and column statistics
+        source = json.dumps(source)
+        if self.use_spaces:
+            spaces.update(source=source, filename=obj_name)
+        else:
+            self.core.save_file(data=source, source=str(self.summary / obj_name))
+
+    def get_json(self, *, obj_name: str) -> list | dict | None:
+        if self.use_spaces:
+            return spaces.get(filename=obj_name)
+        if not self.core.check_source(source=self.summary / obj_name):
+            return None
+        return self.core.load_json(source=str(self.summary / obj_name))
+
+    def delete_json(self, *, obj_name: str) -> None:
+        if self.use_spaces:
+            spaces.remove(filename=obj_name)
+        self.core.delete_file(source=str(self.summary / obj_name))
+
+    def save_data_summary(
+        self, *, obj_id: UUID | str, obj_in: DataSourceTemplateModel, sheet_name: str | None = None
+    ):
+        # `sheet_name` names the summary of a single sheet, e.g. when read from its canonical copy
+        mimetype = self.reader.get_mimetype(mimetype=obj_in.mime)
+        with self.pin_source(obj_id=obj_in.uuid, mimetype=mimetype, checksum=obj_in.checksum) as datasource_path:
+            df = self.reader.get(source=datasource_path, mimetype=mimetype, nrows=settings.WHYQD_SUMMARY_ROWS)
+        if not isinstance(df, dict):
+            df = {sheet_name: df}
+        for sheet_name, dfs in df.items():
+            self.save_summary(obj_id=obj_id, summary=self.get_summary(df=dfs), sheet_name=sheet_name)
 
     def get_data_summary(self, *, obj_id, sheet_name: str | None = None) -> list:
         obj_in = None
@@ -326,8 +900,7 @@ class CRUDFiles:
         if sheet_name:
             obj_name = f"{obj_id}-{sheet_name.lower()}.SUMMARY"
         if self.use_spaces:
-            if spaces.exists(filename=obj_name):
-                obj_in = spaces.get(filename=obj_name)
+            obj_in = spaces.get(filename=obj_name)
         else:
             obj_in = self.core.load_json(source=str(self.summary / obj_name))
         if not obj_in:
@@ -335,13 +908,23 @@ class CRUDFiles:
         return obj_in
 
     def recreate_data_summary(
-        self, *, obj_id: UUID | str, datasource_id: UUID | str, obj_in: DataSourceModel | ResourceDataReference
+        self,
+        *,
+        obj_id: UUID | str,
+        datasource_id: UUID | str,
+        obj_in: DataSourceModel | ResourceDataReference,
+        checksum: str | None = None,
     ):
         data_in = DataSourceTemplateModel(**obj_in.model_dump(by_alias=True, exclude_unset=True))
         data_in.uuid = obj_id  # db_obj.datasource.model ... db_obj.datasource.id
+        data_in.checksum = checksum
         if "mimeType" in obj_in.model_dump(by_alias=True, exclude_unset=True):
             data_in.mime = obj_in.mimeType
-        self.save_data_summary(obj_id=datasource_id, obj_in=data_in)
+        sheet_name = None
+        if data_in.mime == MimeType.PARQUET:
+            # Canonical copy of a single sheet
+            sheet_name = obj_in.sheet_name
+        self.save_data_summary(obj_id=datasource_id, obj_in=data_in, sheet_name=sheet_name)
         return self.get_data_summary(obj_id=datasource_id, sheet_name=obj_in.sheet_name)
 
     def delete_data_summary(self, *, obj_id) -> dict | None:
@@ -350,12 +933,18 @@ class CRUDFiles:
 
     def delete_working_directory(self, *, delay: int = 86400, keep_summary: bool = True) -> bool:
         # Delay is 24 hours expressed in seconds ... trying not to interfere too much with working data
+        # Sources are either canonical (local storage), or held in the LRU cache (Spaces), which manages its own budget
+        if self.use_spaces:
+            cache.evict()
         epoch_time = int(time.time()) - delay
         for source in Path(settings.WORKING_PATH).rglob("*"):
+            if source.is_relative_to(Path(self.directory)) and source.suffix != ".part":
+                # Except for abandoned partial uploads
+                continue
             if source.is_file() and source.stat().st_mtime <= epoch_time:
                 if (
                     keep_summary
-                    and source.suffix == ".SUMMARY"
+                    and source.suffix in [".SUMMARY", ".PROFILE", ".STATISTICS"]
                     and not any(x.startswith(".Trash") for x in source.parts)
                 ):
                     continue
@@ -4,6 +4,8 @@ from datetime import datetime
 from uuid import UUID, uuid4
 from sqlalchemy.orm import Session, Query  # , aliased
 import hashlib
+import json
+import modin.pandas as pd
 import whyqd as qd
 from whyqd.parsers import CoreParser
 from whyqd.models import (
@@ -14,6 +16,7 @@ from whyqd.models import (
     FieldModel,
     ColumnModel,
     ActionScriptModel,
+    VersionModel,
 )
 
 from app.crud.whyqd_base import CRUDWhyqdBase
@@ -42,6 +45,9 @@ from app.crud.crud_resource import resource as crud_resource
 from app.crud.crud_task import task as crud_task
 from app.crud.crud_activity import activity as crud_activity
 from app.crud.crud_files import files as crud_files
+from app.crud.crud_blob import blob as crud_blob
+from app.crud.crud_access import access as crud_access
+from app.crud.crud_cursor import cursor as crud_cursor, SortKey
 from app.crud.crud_subscription import subscription as crud_subscription
 from app.crud.crud_role import role as crud_role
 from app.crud.crud_referencetemplate import referencetemplate as crud_referencetemplate
@@ -50,6 +56,17 @@ from app.core.config import settings
 if TYPE_CHECKING:
     from app.models.user import User
 
+# Column statistics type confidence terms for each field type which can be checked
+DTYPE_CONFIDENCE = {
+    qd.dtypes.FieldType.INTEGER: "integer",
+    qd.dtypes.FieldType.YEAR: "integer",
+    qd.dtypes.FieldType.NUMBER: "number",
+    qd.dtypes.FieldType.BOOLEAN: "boolean",
+    qd.dtypes.FieldType.DATE: "datetime",
+    qd.dtypes.FieldType.USDATE: "datetime",
+    qd.dtypes.FieldType.DATETIME: "datetime",
+}
+
 
 class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
     ###################################################################################################
@@ -70,14 +87,12 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
         descending: bool = True,
         page: int = 0,
         page_break: bool = False,
+        cursor: str | None = None,
     ) -> list[Reference]:
         db_objs = db.query(self.model)
         if not user.is_superuser:
             responsibilities = crud_role._get_responsibility(responsibility=responsibility)
-            if reference_type == ReferenceType.SCHEMA:
-                db_objs = self._get_schema_query(db_query=db_objs, user=user, responsibilities=responsibilities)
-            else:
-                db_objs = self._get_query(db_query=db_objs, user=user, responsibilities=responsibilities)
+            db_objs = self._get_query(db_query=db_objs, user=user, responsibilities=responsibilities)
         if reference_type:
             db_objs = db_objs.filter(self.model.model_type == reference_type)
         else:
@@ -104,18 +119,20 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
                     | self.model.description_vector.match(str(match))
                 )
             )
-        order_by = self.model.created
-        if descending:
-            order_by = order_by.desc()
-        if reference_type == ReferenceType.SCHEMA:
-            order_by = self.model.title
-        db_objs = db_objs.distinct().order_by(order_by)
-        if not page_break:
-            if page > 0:
-                db_objs = db_objs.offset(page * settings.MULTI_MAX)
-            db_objs = db_objs.limit(settings.MULTI_MAX)
+        db_objs = crud_cursor.get_page(
+            db_objs.distinct(),
+            keys=self._get_sort_keys(descending=descending, reference_type=reference_type),
+            cursor=cursor,
+            page=page,
+            page_break=page_break,
+        )
         return db_objs.all()
 
+    def _get_sort_keys(self, *, descending: bool = True, reference_type: ReferenceType | None = None) -> list[SortKey]:
+        if reference_type == ReferenceType.SCHEMA:
+            return [(self.model.title, False), (self.model.id, False)]
+        return super()._get_sort_keys(descending=descending)
+
     def create(
         self,
         db: Session,
@@ -124,7 +141,11 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
         reference_in: DataSourceModel | SchemaModel | CrosswalkModel | TransformModel,
         reference_type: ReferenceType,
         branch: bool = False,
+        summary: str | None = None,
+        is_transform: bool = False,
     ) -> Reference:
+        # `summary` is given when the summary rows of a data source are already known, e.g. for a transform output.
+        # Transform output data sources are stored by UUID, so their checksum is not their content address.
         reference_in = crud_files.create_or_update(
             user=user, obj_in=reference_in, obj_type=reference_type, branch=branch
         )
@@ -146,11 +167,17 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
             obj_in["hash"] = self.get_term_hash(terms=reference_in.fields)
         if reference_type == ReferenceType.CROSSWALK:
             obj_in["hash"] = self.get_term_hash(terms=reference_in.actions)
+        if reference_type == ReferenceType.DATASOURCE and not is_transform:
+            # Content address of the stored source file
+            obj_in["hash"] = reference_in.checksum
         obj_in = ReferenceCreate(**obj_in)
         db_obj = super().create(db=db, obj_in=obj_in, user=user)
         if reference_type == ReferenceType.DATASOURCE:
             # Because we need the id
-            crud_files.save_data_summary(obj_id=db_obj.id, obj_in=reference_in)
+            if summary:
+                crud_files.save_summary(obj_id=db_obj.id, summary=summary)
+            else:
+                crud_files.save_data_summary(obj_id=db_obj.id, obj_in=reference_in)
         return db_obj
 
     def create_multi_tasks_from_project(
@@ -279,8 +306,19 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
                 remove_history=remove_history,
             )
         if db_obj.model_type == ReferenceType.DATASOURCE:
-            crud_files.delete_source(obj_id=db_obj.model, mimetype=db_obj.mime_type)
+            if crud_blob.get_by_model(db=db, model_id=db_obj.model):
+                # Shared blob, whose bytes are collected once nothing refers to them
+                crud_blob.unlink(db=db, model_id=db_obj.model)
+            else:
+                crud_files.delete_source(obj_id=db_obj.model, mimetype=db_obj.mime_type)
             crud_files.delete_data_summary(obj_id=db_obj.id)
+        if db_obj.model_type == ReferenceType.DATA and db_obj.blob:
+            # Canonical Parquet copy, which may be shared by identical data
+            crud_blob.unlink(db=db, model_id=db_obj.model)
+        if db_obj.model_type == ReferenceType.DATA:
+            crud_files.delete_column_statistics(obj_id=db_obj.model)
+        if db_obj.model_type == ReferenceType.TRANSFORM:
+            crud_files.delete_transform_profile(obj_id=db_obj.id)
         crud_files.remove(obj_id=db_obj.model, obj_type=db_obj.model_type)
         db.delete(db_obj)
         db.commit()
@@ -322,6 +360,16 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
     ) -> Resource | None:
         if not (db_obj.transform_id and db_obj.transformdata_id and db_obj.transformdatasource_id):
             return None
+        if db_obj.transform.transforms.filter(Resource.id != db_obj.id).first():
+            # Transform outputs reused from a cached transform are shared, so only unlink them from this resource
+            resource_in = ResourceUpdate.model_validate(db_obj)
+            resource_in.transform_id = None
+            resource_in.transformdata_id = None
+            resource_in.transformdatasource_id = None
+            resource_in.state = StateType.TRANSFORM_READY
+            return crud_resource.update(
+                db=db, id=db_obj.id, user=user, obj_in=resource_in.model_dump(), responsibility=responsibility
+            )
         self.remove(db=db, id=db_obj.transform_id, user=user)
         self.remove(db=db, id=db_obj.transformdata_id, user=user)
         self.remove(db=db, id=db_obj.transformdatasource_id, user=user)
@@ -474,9 +522,16 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
                 pass
             if not reference_in.summary:
                 datamodel_in = self.get_data_model(resource_obj=db_obj)
+                checksum = db_obj.datasource.hash
+                if db_obj.data.blob:
+                    checksum = db_obj.data.blob.checksum
                 reference_in.summary = crud_files.recreate_data_summary(
-                    obj_id=db_obj.datasource.model, datasource_id=db_obj.datasource.id, obj_in=datamodel_in
+                    obj_id=db_obj.datasource.model,
+                    datasource_id=db_obj.datasource.id,
+                    obj_in=datamodel_in,
+                    checksum=checksum,
                 )
+            reference_in.statistics = crud_files.get_column_statistics(obj_id=db_obj.data.model)
             db_model.data = reference_in
         # 2. Schema subject
         if db_obj.schema_subject_id:
@@ -569,6 +624,7 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
             reference_in.summary = crud_files.get_data_summary(
                 obj_id=db_obj.datasource.id, sheet_name=reference_in.sheet_name
             )
+            reference_in.statistics = crud_files.get_column_statistics(obj_id=db_obj.data.model)
             db_model.data = reference_in
         # 2. Schema subject
         if db_obj.schema_subject:
@@ -619,6 +675,9 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
             uuid = action.uuid
             action = obj_dfn.actions.parse(script=action.script)
             reference_in.actions.append(self.parse_action_model(uuid=uuid, term=action))
+        if db_obj.transform:
+            # Of the latest profiled transform, if any
+            reference_in.profile = crud_files.get_transform_profile(obj_id=db_obj.transform.id)
         db_model.crosswalk = reference_in
         return db_model
 
@@ -636,144 +695,15 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
     # ROLES AND RIGHTS
     ###################################################################################################
     def _get_query(self, *, db_query: Query, user: User, responsibilities: list[RoleType]) -> Query:
-        db_filter = (
-            ~(self.model.is_private)
-            | (self._get_filter(db_model=self.model, user=user, responsibilities=responsibilities))
-            | (
-                (Resource.datasource_id == self.model.id)
-                & self._get_filter(db_model=Resource, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.datasource_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & self._get_filter(db_model=Task, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.datasource_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & (Task.project_id == Project.id)
-                & self._get_filter(db_model=Project, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.data_id == self.model.id)
-                & self._get_filter(db_model=Resource, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.data_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & self._get_filter(db_model=Task, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.data_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & (Task.project_id == Project.id)
-                & self._get_filter(db_model=Project, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.schema_subject_id == self.model.id)
-                & self._get_filter(db_model=Resource, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.schema_subject_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & self._get_filter(db_model=Task, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.schema_subject_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & (Task.project_id == Project.id)
-                & self._get_filter(db_model=Project, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.crosswalk_id == self.model.id)
-                & self._get_filter(db_model=Resource, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.crosswalk_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & self._get_filter(db_model=Task, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.crosswalk_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & (Task.project_id == Project.id)
-                & self._get_filter(db_model=Project, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.schema_object_id == self.model.id)
-                & self._get_filter(db_model=Resource, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.schema_object_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & self._get_filter(db_model=Task, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.schema_object_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & (Task.project_id == Project.id)
-                & self._get_filter(db_model=Project, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.transform_id == self.model.id)
-                & self._get_filter(db_model=Resource, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.transform_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & self._get_filter(db_model=Task, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.transform_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & (Task.project_id == Project.id)
-                & self._get_filter(db_model=Project, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.transformdata_id == self.model.id)
-                & self._get_filter(db_model=Resource, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.transformdata_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & self._get_filter(db_model=Task, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.transformdata_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & (Task.project_id == Project.id)
-                & self._get_filter(db_model=Project, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.transformdatasource_id == self.model.id)
-                & self._get_filter(db_model=Resource, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.transformdatasource_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & self._get_filter(db_model=Task, user=user, responsibilities=responsibilities)
-            )
-            | (
-                (Resource.transformdatasource_id == self.model.id)
-                & (Resource.task_id == Task.id)
-                & (Task.project_id == Project.id)
-                & self._get_filter(db_model=Project, user=user, responsibilities=responsibilities)
-            )
-            | (
-                self.model.task_schema.any(Task.schema).where(
-                    self._get_filter(db_model=Task, user=user, responsibilities=responsibilities)
-                )
-            )
-            | (
-                self.model.project_schema.any(Project.schema).where(
-                    self._get_filter(db_model=Project, user=user, responsibilities=responsibilities)
-                )
-            )
+        # Public, or materialised in `reference_access` by any role path. See `_get_filters` for those paths.
+        db_filter = ~(self.model.is_private) | crud_access.get_filter(
+            db_model=self.model, user=user, responsibilities=responsibilities
         )
         return db_query.filter(db_filter)
 
     def _get_filters(self, *, user: User, responsibilities: list[RoleType]) -> list[Any]:
-        # Join-based conditions for Task and Project (only create joins when necessary)
+        # Join-based conditions for Task and Project (only create joins when necessary). Every path by which a role
+        # grants access to a reference, as derived for `reference_access`, and used to check it.
         reference_filter = self._get_filter(db_model=self.model, user=user, responsibilities=responsibilities)
         resource_filter = self._get_filter(db_model=Resource, user=user, responsibilities=responsibilities)
         task_filter = self._get_filter(db_model=Task, user=user, responsibilities=responsibilities)
@@ -850,6 +780,29 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
             (self.model.project_schema.any(Project.schema).where(project_filter)),
         ]
 
+    def check_access(self, db: Session, *, user: User) -> list[dict]:
+        # Compare the references `reference_access` grants this user with those the role paths in `_get_filters`
+        # grant, at each responsibility. Any difference means the table has drifted, and needs a rebuild.
+        differences = []
+        for responsibility in RoleType:
+            responsibilities = crud_role._get_responsibility(responsibility=responsibility)
+            db_query = db.query(self.model.id)
+            expected = set()
+            for db_filter in self._get_filters(user=user, responsibilities=responsibilities):
+                expected.update(db_obj.id for db_obj in db_query.filter(db_filter).all())
+            db_objs = self._get_query(db_query=db_query, user=user, responsibilities=responsibilities).all()
+            found = {db_obj.id for db_obj in db_objs}
+            if expected != found:
+                differences.append(
+                    {
+                        "user_id": user.id,
+                        "responsibility": responsibility,
+                        "missing": sorted(str(i) for i in expected - found),
+                        "unexpected": sorted(str(i) for i in found - expected),
+                    }
+                )
+        return differences
+
     # def _has_role(self, db: Session, *, user: User, responsibility: RoleType, resource_objs: list[Resource]) -> bool:
     #     for db_obj in resource_objs:
     #         if crud_resource.has_role(db=db, user=user, responsibility=responsibility, db_obj=db_obj):
@@ -971,6 +924,25 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
                         schema_object_in = None
         if schema_object_in:
             resource_in.schema_object_id = schema_object_in.id
+        # Hash the source file, and reject it early if it is already available to this user ###########################
+        if datasource_in.checksum:
+            # Uploads are hashed as they stream to their content address
+            source_path = crud_files.get_source_path(
+                obj_id=datasource_in.uuid, mimetype=datasource_in.mime, checksum=datasource_in.checksum
+            )
+            source_size = source_path.stat().st_size
+        else:
+            source_path = crud_files.get_source_path(
+                obj_id=datasource_in.uuid, mimetype=datasource_in.mime, is_temporary=True
+            )
+            datasource_in.checksum, source_size = crud_files.get_source_checksum(source=source_path)
+        if self.record_existing_source(
+            db=db,
+            user=user,
+            source_name=datasource_in.name,
+            sources=self.get_existing_sources(db=db, datasource_in=datasource_in, user=user),
+        ):
+            return self.discard_source(db=db, datasource_in=datasource_in)
         # Create a temporary BUSY resource so if anything goes wrong it is still flagged ###############################
         resource_in.id = uuid4()
         resource_in.state = StateType.BUSY
@@ -979,9 +951,7 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
         self._record_activity(db=db, user=user, db_obj=temporary_resource_obj, message=message)
         # Import source and derive data model, or identify duplicate ###################################################
         datasource = qd.DataSourceDefinition()
-        source_path = crud_files.get_source_path(
-            obj_id=datasource_in.uuid, mimetype=datasource_in.mime, is_temporary=True
-        )
+        datasource.reader = crud_files.reader
         # This seems to crash under weird circumstances
         attributes = datasource_in.attributes
         if not isinstance(attributes, dict):
@@ -1034,8 +1004,17 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
         # Save the data models, data source models and data source #####################################################
         if not data_models:
             # delete the source file from temp
-            return crud_files.delete_source(obj_id=datasource_in.uuid, mimetype=datasource_in.mime, is_temporary=True)
-        source_path = crud_files.save_source(obj_id=datasource_in.uuid, mimetype=datasource_in.mime)
+            return self.discard_source(db=db, datasource_in=datasource_in)
+        source_path = crud_files.save_source(
+            obj_id=datasource_in.uuid, mimetype=datasource_in.mime, checksum=datasource_in.checksum
+        )
+        crud_blob.link(
+            db=db,
+            model_id=datasource_in.uuid,
+            checksum=datasource_in.checksum,
+            mime_type=datasource_in.mime,
+            size=source_size,
+        )
         datasource_obj = self.create(
             db=db, user=user, reference_in=datasource_in, reference_type=ReferenceType.DATASOURCE
         )
@@ -1045,14 +1024,22 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
         for data_in in data_models:
             # Each data model requires its own resource, even if there is a single source file (multi-sheet excel)
             resource_in.id = uuid4()
+            # Typed Parquet copy, from which all later reads are made. The original is kept only for download.
+            data_in.path = str(source_path)
+            canonical = crud_files.save_canonical(data_in=data_in)
             if datasource_in.path:
                 data_in.path = str(datasource_in.path)  # maintain original path in storage
             else:
-                data_in.path = f"{datasource_in.uuid}.{datasource_in.mime.name}"
+                data_in.path = crud_files.get_source_name(
+                    obj_id=datasource_in.uuid, mimetype=datasource_in.mime, checksum=datasource_in.checksum
+                )
             data_in.title = resource_in.title
             data_in.description = resource_in.description
             data_obj = self.create(db=db, user=user, reference_in=data_in, reference_type=ReferenceType.DATA)
             resource_in.data_id = data_obj.id
+            if canonical:
+                checksum, size = canonical
+                crud_blob.link(db=db, model_id=data_in.uuid, checksum=checksum, mime_type=MimeType.PARQUET, size=size)
             # Check for a unique schema subject, or derive one #########################################################
             hash = self.get_term_hash(terms=data_in.columns)
             schema_prospects = self.get_multi_by_hash(db=db, hash=hash, user=user, task=task)
@@ -1155,22 +1142,56 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
     def derive_schema_categories(
         self, *, db: Session, resource_obj: Resource, user: User, field_name: str, as_bool: bool = False
     ) -> None:
+        term_type = "boolean" if as_bool else "term"
+        self.derive_multi_schema_categories(db=db, resource_obj=resource_obj, user=user, fields={field_name: term_type})
+
+    def derive_multi_schema_categories(
+        self, *, db: Session, resource_obj: Resource, user: User, fields: dict[str, str]
+    ) -> None:
+        # `fields` maps schema subject field names to their term type, either `term` or `boolean`. Catalogued categories
+        # are used where there are any, and only the remaining columns are read, once, for a single schema update.
         data_in = self.get_data_model(resource_obj=resource_obj)
         if not data_in or not resource_obj.schema_subject:
             message = f"Schema subject for resource ({resource_obj.name}) categorisation is not found."
             self._record_activity(db=db, user=user, db_obj=resource_obj, message=message, alert=True)
             return None
-        datasource = qd.DataSourceDefinition(source=data_in)
         schema_in = crud_files.get(
             obj_id=resource_obj.schema_subject.model,
             obj_type=resource_obj.schema_subject.model_type,
         )
         schema_subject = qd.SchemaDefinition(source=schema_in)
         try:
-            field = schema_subject.fields.get(name=field_name)
-            if not field:
-                raise ValueError(f"Field ({field_name}) for schema subject not found.")
-            schema_subject.fields.set_categories(name=field.name, terms=datasource.get_data(), as_bool=as_bool)
+            terms = {}
+            columns = []
+            for field_name, term_type in fields.items():
+                field = schema_subject.fields.get(name=field_name)
+                if not field:
+                    raise ValueError(f"Field ({field_name}) for schema subject not found.")
+                if term_type == "boolean":
+                    continue
+                statistics = crud_files.get_column_statistics(obj_id=resource_obj.data.model, name=field.name)
+                if (
+                    statistics
+                    and statistics.get("categories") is not None
+                    and field.dtype != qd.dtypes.FieldType.ARRAY
+                ):
+                    # Every distinct value was catalogued at import
+                    terms[field.name] = statistics["categories"]
+                else:
+                    columns.append(field.name)
+            if columns:
+                # Only the columns without catalogued categories are needed
+                data_in = self.get_data_model(resource_obj=resource_obj, columns=columns)
+                datasource = qd.DataSourceDefinition(source=data_in)
+                datasource.reader = crud_files.reader
+                df = datasource.get_data()
+                for name in columns:
+                    terms[name] = df[[name]]
+                del df
+            for field_name, term_type in fields.items():
+                schema_subject.fields.set_categories(
+                    name=field_name, terms=terms.get(field_name), as_bool=term_type == "boolean"
+                )
         except ValueError as e:
             message = e
             self._record_activity(db=db, user=user, db_obj=resource_obj, message=message, alert=True)
@@ -1183,7 +1204,9 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
             reference_type=ReferenceType.SCHEMA,
             responsibility=RoleType.WRANGLER,
         )
-        message = f"Schema subject field ({field.name}) successfully categorised."
+        message = f"Schema subject field ({', '.join(fields)}) successfully categorised."
+        if len(fields) > 1:
+            message = f"Schema subject fields ({', '.join(fields)}) successfully categorised."
         self._record_activity(db=db, user=user, db_obj=resource_obj, message=message)
 
     def modify_schema_field_dtype(
@@ -1198,9 +1221,15 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
             obj_type=resource_obj.schema_subject.model_type,
         )
         schema_subject = qd.SchemaDefinition(source=schema_in)
+        confidence = None
         try:
             dtype = qd.dtypes.FieldType(dtype).value
             field = schema_subject.fields.get(name=field_name)
+            if not field:
+                raise ValueError(f"Field ({field_name}) for schema subject not found.")
+            confidence = self.get_dtype_confidence(resource_obj=resource_obj, field_name=field.name, dtype=dtype)
+            if confidence == 0:
+                raise ValueError(f"No values in schema subject field ({field.name}) can be read as {dtype}.")
             field.dtype = dtype
         except ValueError as e:
             message = e
@@ -1215,7 +1244,26 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
             responsibility=RoleType.WRANGLER,
         )
         message = f"Schema subject field ({field.name}) data type successfully updated."
-        self._record_activity(db=db, user=user, db_obj=resource_obj, message=message)
+        alert = confidence is not None and confidence < 1
+        if alert:
+            message = (
+                f"Schema subject field ({field.name}) data type updated, but only {confidence:.1%} of values can be"
+                f" read as {dtype}."
+            )
+        self._record_activity(db=db, user=user, db_obj=resource_obj, message=message, alert=alert)
+
+    def get_dtype_confidence(self, *, resource_obj: Resource, field_name: str, dtype: str) -> float | None:
+        # Share of the field's values which fit `dtype`, from the column statistics catalogued at import. None where
+        # there are no statistics, or nothing to check (e.g. any type can be read as a string).
+        if not resource_obj.data:
+            return None
+        statistics = crud_files.get_column_statistics(obj_id=resource_obj.data.model, name=field_name)
+        if not statistics or statistics["nullCount"] == statistics["count"]:
+            return None
+        term = DTYPE_CONFIDENCE.get(qd.dtypes.FieldType(dtype))
+        if not term:
+            return None
+        return statistics["typeConfidence"].get(term)
 
     def get_schema_definition(
         self, *, resource_obj: Resource | None = None, as_subject: bool = True
@@ -1318,6 +1366,45 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
         # This isn't the place to define a schema
         return None
 
+    def get_preview_sample(
+        self, *, resource_obj: Resource, crosswalk_dfn: qd.CrosswalkDefinition
+    ) -> pd.DataFrame | None:
+        # For websocket use: the first rows of the source, coerced to the source schema, held for the session
+        data_in = self.get_data_model(resource_obj=resource_obj)
+        if not data_in:
+            return None
+        df = crud_files.reader.get(source=data_in, nrows=settings.WHYQD_PREVIEW_ROWS)
+        return crud_files.reader.coerce_to_schema(df=df, schema=crosswalk_dfn.schema_source)
+
+    def preview_transform(
+        self,
+        *,
+        crosswalk_dfn: qd.CrosswalkDefinition,
+        sample: pd.DataFrame,
+        steps: list[tuple[str, pd.DataFrame]] | None = None,
+    ) -> tuple[list[dict], list[tuple[str, pd.DataFrame]]]:
+        # Crosswalk the sample. `steps` are the sample after each action, from a previous preview. Those before the
+        # first changed action are reused, and only the rest are applied again. Returns the rows, and the new steps.
+        scripts = [action.script for action in crosswalk_dfn.actions.get_all()]
+        steps = steps or []
+        unchanged = 0
+        for script, (step_script, _) in zip(scripts, steps):
+            if script != step_script:
+                break
+            unchanged += 1
+        steps = steps[:unchanged]
+        df = steps[-1][1] if steps else sample
+        for script in scripts[unchanged:]:
+            # Actions modify the DataFrame in place, so each step is a copy
+            df = crosswalk_dfn.actions.transform(df=df.copy(), script=script)
+            steps.append((script, df))
+        destination_names = [f.name for f in crosswalk_dfn.schema_destination.fields.get_all() if f.name in df.columns]
+        # Coercion aligns on the index, which some actions (e.g. RENAME) turn into strings
+        df = crud_files.reader.coerce_to_schema(
+            df=df[destination_names].reset_index(drop=True), schema=crosswalk_dfn.schema_destination
+        )
+        return json.loads(crud_files.get_summary(df=df)), steps
+
     def perform_transform(
         self,
         db: Session,
@@ -1325,44 +1412,76 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
         resource_obj: Resource,
         mimetype: MimeType | None = None,
         user: User,
+        force: bool = False,
+        profile: bool = False,
     ) -> bool:
-        data_in = self.get_data_model(resource_obj=resource_obj)
-        if not data_in or not resource_obj.crosswalk:
-            # if already has a transform, this is forcing it again - like a validation
+        # A transform with identical inputs is reused, rather than run again, unless `force`. A `profile` run records
+        # each action's time, memory and shapes against the TRANSFORM reference, so is never reused either.
+        if not resource_obj.crosswalk:
             return False
         crosswalk_in = crud_files.get(
             obj_id=resource_obj.crosswalk.model,
             obj_type=resource_obj.crosswalk.model_type,
         )
+        mimetype = crud_files.reader.get_mimetype(mimetype=mimetype or settings.WHYQD_DEFAULT_MIMETYPE)
+        transform_hash = self.get_transform_hash(
+            resource_obj=resource_obj, crosswalk_in=crosswalk_in, mimetype=mimetype
+        )
+        if transform_hash and not (force or profile):
+            prospect_obj = self.find_transform_prospect(db=db, hash=transform_hash, user=user)
+            if prospect_obj:
+                return self.link_transform(db=db, resource_obj=resource_obj, prospect_obj=prospect_obj, user=user)
+        # Only now is the source needed, which may mean fetching it from storage
+        data_in = self.get_data_model(resource_obj=resource_obj)
+        if not data_in:
+            # if already has a transform, this is forcing it again - like a validation
+            return False
         transform = qd.TransformDefinition(crosswalk=crosswalk_in, data_source=data_in)
+        # Large sources with row-local crosswalks are streamed a partition at a time, otherwise transformed in memory
+        is_streamed = False
+        profile_in = [] if profile else None
         try:
-            transform.process()
-            transform.data.empty
+            is_streamed = crud_files.is_streamable(transform=transform, mimetype=mimetype)
+            if is_streamed:
+                transformdatasource_in, transformdata_in, summary = crud_files.stream_transform(
+                    transform=transform, mimetype=mimetype, profile=profile_in
+                )
+            elif profile:
+                profile_in = crud_files.profile_transform(transform=transform)
+            else:
+                transform.process()
+                transform.data.empty
         except Exception as e:
             resource_obj = crud_resource.update_state(
                 db=db, db_obj=resource_obj, user=user, state=StateType.TRANSFORM_ERROR, responsibility=RoleType.WRANGLER
             )
             self.record_error(db=db, user=user, db_obj=resource_obj, error=e, state=StateType.TRANSFORM_ERROR)
             return False
-        if not transform.data.empty:
+        if is_streamed or not transform.data.empty:
             # Schema models
-            transformdatasource_in = crud_files.import_transform(data=transform.data, mimetype=mimetype)
+            if not is_streamed:
+                transformdatasource_in, transformdata_in, summary = crud_files.import_transform(
+                    data=transform.data, mimetype=mimetype
+                )
             transformdatasource_in.title = resource_obj.title
             transformdatasource_in.description = resource_obj.description
-            transformdata_in = crud_files.get_transform_datamodel(
-                data=transform.data, datasource_in=transformdatasource_in
-            )
             transformdata_in.title = resource_obj.title
             transformdata_in.description = resource_obj.description
             transform_in = transform.get
             transform_in.title = resource_obj.title
             transform_in.description = resource_obj.description
+            transform_path = "in memory"
+            if is_streamed:
+                transform_path = f"streamed in partitions of {settings.WHYQD_STREAM_ROWS} rows"
+            transform_in.version.append(VersionModel(description=f"Transform {transform_path}."))
             # Create model objects
             transformdatasource_obj = self.create(
                 db=db,
                 user=user,
                 reference_in=transformdatasource_in,
                 reference_type=ReferenceType.DATASOURCE,
+                summary=summary,
+                is_transform=True,
             )
             transformdata_obj = self.create(
                 db=db,
@@ -1376,6 +1495,12 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
                 reference_in=transform_in,
                 reference_type=ReferenceType.TRANSFORM,
             )
+            if transform_hash:
+                transform_obj.hash = transform_hash
+                db.add(transform_obj)
+                db.commit()
+            if profile:
+                crud_files.save_transform_profile(obj_id=transform_obj.id, profile=profile_in)
             # Update Resource
             resource_in = ResourceUpdate.model_validate(resource_obj)
             resource_in.transformdatasource_id = transformdatasource_obj.id
@@ -1393,7 +1518,9 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
                 db=db,
                 user=user,
                 db_obj=resource_obj,
-                message=f"Transform `{resource_obj.name}` is complete and data are ready for export.",
+                message=(
+                    f"Transform `{resource_obj.name}` ({transform_path}) is complete and data are ready for export."
+                ),
             )
             return True
         resource_obj = crud_resource.update_state(
@@ -1407,6 +1534,28 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
         )
         return False
 
+    def link_transform(self, db: Session, *, resource_obj: Resource, prospect_obj: Resource, user: User) -> bool:
+        # Reuse the outputs of a completed transform with identical inputs
+        resource_in = ResourceUpdate.model_validate(resource_obj)
+        resource_in.transformdatasource_id = prospect_obj.transformdatasource_id
+        resource_in.transformdata_id = prospect_obj.transformdata_id
+        resource_in.transform_id = prospect_obj.transform_id
+        resource_in.state = StateType.COMPLETE
+        resource_obj = crud_resource.update(
+            db=db,
+            id=resource_obj.id,
+            user=user,
+            obj_in=resource_in.model_dump(exclude_unset=True),
+            responsibility=RoleType.WRANGLER,
+        )
+        self._record_activity(
+            db=db,
+            user=user,
+            db_obj=resource_obj,
+            message=f"Transform `{resource_obj.name}` is unchanged, and data are ready for export.",
+        )
+        return True
+
     ###################################################################################################
     # UTILITIES AND HASHING
     ###################################################################################################
@@ -1414,16 +1563,10 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
         self, db: Session, *, model_id: UUID | str, user: User, responsibility: RoleType = RoleType.SEEKER
     ) -> Reference | None:
         db_obj = db.query(self.model).filter(self.model.model == model_id)
-        if user.is_superuser:
-            return db_obj.first()
-        responsibilities = crud_role._get_responsibility(responsibility=responsibility)
-        # db_obj = self._get_query(db_query=db_obj, user=user, responsibilities=responsibilities)
-        db_filters = self._get_filters(user=user, responsibilities=responsibilities)
-        for db_filter in db_filters:
-            db_response = db_obj.filter(db_filter).first()
-            if db_response:
-                return db_response
-        return None
+        if not user.is_superuser:
+            responsibilities = crud_role._get_responsibility(responsibility=responsibility)
+            db_obj = self._get_query(db_query=db_obj, user=user, responsibilities=responsibilities)
+        return db_obj.first()
 
     def get_model(
         self,
@@ -1440,14 +1583,20 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
             return crud_files.get(obj_id=db_obj.model, obj_type=db_obj.model_type)
         return None
 
-    def get_data_model(self, *, resource_obj: Resource) -> DataSourceModel | None:
+    def get_data_model(self, *, resource_obj: Resource, columns: list[str] | None = None) -> DataSourceModel | None:
+        # Reads are from the canonical Parquet copy where there is one, projected to `columns` if given
         if not resource_obj.datasource and not resource_obj.data:
             return None
+        data_in = crud_files.get(obj_id=resource_obj.data.model, obj_type=resource_obj.data.model_type)
+        canonical_obj = resource_obj.data.blob
+        if canonical_obj and canonical_obj.mime_type == MimeType.PARQUET:
+            return crud_files.get_canonical_model(data_in=data_in, checksum=canonical_obj.checksum, columns=columns)
         datasource_in = crud_files.get(
             obj_id=resource_obj.datasource.model, obj_type=resource_obj.datasource.model_type
         )
-        datasource_path = crud_files.get_source_path(obj_id=datasource_in.uuid, mimetype=datasource_in.mime)
-        data_in = crud_files.get(obj_id=resource_obj.data.model, obj_type=resource_obj.data.model_type)
+        datasource_path = crud_files.get_source_path(
+            obj_id=datasource_in.uuid, mimetype=datasource_in.mime, checksum=resource_obj.datasource.hash
+        )
         data_in.path = str(datasource_path)
         return data_in
 
@@ -1462,6 +1611,34 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
             terms = str(sorted([term.name for term in terms])).encode("utf-8")
         return hashlib.blake2b(terms).hexdigest()
 
+    def get_transform_hash(
+        self, *, resource_obj: Resource, crosswalk_in: CrosswalkModel, mimetype: MimeType
+    ) -> str | None:
+        # Identity of the inputs to a transform: the source data, the crosswalk schemas and actions, and the output
+        # mimetype. Stored as the TRANSFORM reference hash. Names, descriptions and versions do not affect the output.
+        data_hash = None
+        if resource_obj.data and resource_obj.data.blob:
+            data_hash = resource_obj.data.blob.checksum
+        elif resource_obj.data and resource_obj.datasource and resource_obj.datasource.hash:
+            # No canonical copy, so the sheets of a source can only be told apart by their data model
+            data_hash = f"{resource_obj.datasource.hash}-{resource_obj.data.model}"
+        if not data_hash:
+            return None
+        crosswalk_hash = crosswalk_in.model_dump_json(include={"schemaSource", "schemaDestination", "actions"})
+        return hashlib.blake2b(f"{data_hash}:{crosswalk_hash}:{mimetype.name}".encode("utf-8")).hexdigest()
+
+    def find_transform_prospect(self, db: Session, *, hash: str, user: User) -> Resource | None:
+        # A resource with completed transform outputs for the same inputs
+        for transform_obj in self.get_multi_by_hash(db=db, hash=hash, user=user, responsibility=RoleType.WRANGLER):
+            if transform_obj.model_type != ReferenceType.TRANSFORM:
+                continue
+            resource_obj = transform_obj.transforms.filter(
+                Resource.transformdata_id.isnot(None), Resource.transformdatasource_id.isnot(None)
+            ).first()
+            if resource_obj:
+                return resource_obj
+        return None
+
     def get_multi_by_hash(
         self,
         db: Session,
@@ -1470,22 +1647,38 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
         user: User,
         responsibility: RoleType = RoleType.SEEKER,
         task: Task | None = None,
-    ) -> set[Reference]:
+    ) -> list[Reference]:
         db_objs = db.query(self.model).filter(self.model.hash == hash)
         if task:
             db_objs = db_objs.filter(self.model.schema_subjects.any(Resource.task_id == task.id))
-        if user.is_superuser:
-            return db_objs.all()
-        # For everyone else
-        responsibilities = crud_role._get_responsibility(responsibility=responsibility)
-        # db_objs = self._get_query(db_query=db_objs, user=user, responsibilities=responsibilities)
-        db_filters = self._get_filters(user=user, responsibilities=responsibilities)
-        db_response = set()
-        for db_filter in db_filters:
-            response = set(db_objs.filter(db_filter).all())
-            if response:
-                db_response.update(response)
-        return list(db_response)
+        if not user.is_superuser:
+            responsibilities = crud_role._get_responsibility(responsibility=responsibility)
+            db_objs = self._get_query(db_query=db_objs, user=user, responsibilities=responsibilities)
+        return db_objs.all()
+
+    def discard_source(self, db: Session, *, datasource_in: DataSourceTemplateModel) -> None:
+        # A rejected import. Delete the temporary source. If it was stored on upload, its bytes may be shared with
+        # another import in flight, which has not linked them yet, so they are left for `blob.collect`.
+        crud_files.delete_source(obj_id=datasource_in.uuid, mimetype=datasource_in.mime, is_temporary=True)
+
+    def get_existing_sources(
+        self, db: Session, *, datasource_in: DataSourceTemplateModel, user: User
+    ) -> list[Resource]:
+        # Resources derived from the same source file bytes, read with the same parser settings
+        existing_sources = []
+        for source_obj in self.get_multi_by_hash(
+            db=db, hash=datasource_in.checksum, user=user, responsibility=RoleType.WRANGLER
+        ):
+            if source_obj.model_type != ReferenceType.DATASOURCE:
+                continue
+            source_in = crud_files.get(obj_id=source_obj.model, obj_type=source_obj.model_type)
+            if (
+                source_in
+                and source_in.header == datasource_in.header
+                and source_in.attributes == datasource_in.attributes
+            ):
+                existing_sources.extend(source_obj.datasource.all())
+        return existing_sources
 
     def find_crosswalk_prospects(
         self,
@@ -1497,23 +1690,17 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
         responsibility: RoleType = RoleType.SEEKER,
         task: Task | None = None,
     ) -> set[Reference]:
-        db_objs = db.query(Resource).filter(
-            (Resource.schema_subject_id == schema_subject.id) & (Resource.schema_object_id == schema_object.id)
+        # Crosswalks used by resources between these schemas, as one query on the crosswalk references themselves
+        resource_filter = (Resource.schema_subject_id == schema_subject.id) & (
+            Resource.schema_object_id == schema_object.id
         )
         if task:
-            db_objs = db_objs.filter(self.model.schema_subjects.any(Resource.task_id == task.id))
-        if user.is_superuser:
-            db_response = db_objs.all()
-        else:
+            resource_filter = resource_filter & (Resource.task_id == task.id)
+        db_objs = db.query(self.model).filter(self.model.crosswalks.any(resource_filter))
+        if not user.is_superuser:
             responsibilities = crud_role._get_responsibility(responsibility=responsibility)
-            # db_objs = self._get_query(db_query=db_objs, user=user, responsibilities=responsibilities)
-            db_filters = self._get_filters(user=user, responsibilities=responsibilities)
-            db_response = set()
-            for db_filter in db_filters:
-                response = set(db_objs.filter(db_filter).all())
-                if response:
-                    db_response.update(response)
-        return {db_obj.crosswalk for db_obj in db_response}
+            db_objs = self._get_query(db_query=db_objs, user=user, responsibilities=responsibilities)
+        return set(db_objs.all())
 
     def find_schema_prospects(
         self,
@@ -1570,6 +1757,10 @@ class CRUDReference(CRUDWhyqdBase[Reference, ReferenceCreate, ReferenceUpdate]):
         self._record_activity(db=db, user=user, db_obj=sources[0], alert=True, message=message)
         return True
 
+    def record_rejected_source(self, db: Session, *, user: User, message: str) -> bool:
+        self._record_activity(db=db, user=user, alert=True, message=message)
+        return True
+
     def record_exceeds_limits(
         self,
         db: Session,
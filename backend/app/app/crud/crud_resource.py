@@ -1,21 +1,28 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
-from sqlalchemy import func
+from typing import TYPE_CHECKING, Any
+from sqlalchemy import Float, cast, event, func, inspect, literal, select
+from sqlalchemy.dialects.postgresql import INTERVAL
 from sqlalchemy.orm import Session
 from datetime import datetime
-import pandas as pd
+from pathlib import Path
+from uuid import uuid4
+import os
 
 from app.crud.whyqd_base import CRUDWhyqdBase
 from app.models.project import Project
 from app.models.task import Task
 from app.models.resource import Resource
+from app.models.activity import Activity
+from app.models.role import Role
 from app.schemas.resource import ResourceCreate, ResourceUpdate
-from app.schemas.report import ReportData
+from app.schemas.report import ReportData, ChartData
 from app.schema_types import RoleType, StateType, FrequencyType
 
 # from app.crud.crud_task import task as crud_task
 from app.crud.crud_activity import activity as crud_activity
 from app.crud.crud_role import role as crud_role
+from app.crud.crud_cursor import cursor as crud_cursor, SortKey
+from app.crud.crud_cache import ModelCache
 from app.core.config import settings
 
 if TYPE_CHECKING:
@@ -23,6 +30,11 @@ if TYPE_CHECKING:
 
 
 class CRUDResource(CRUDWhyqdBase[Resource, ResourceCreate, ResourceUpdate]):
+    def __init__(self, model: type[Resource], joins: list[tuple] | None = None):
+        super().__init__(model=model, joins=joins or [])
+        self.reports = ModelCache(max_size=settings.REPORT_CACHE_SIZE, ttl=settings.REPORT_CACHE_TTL)
+        self.report_stamps = Path(settings.WORKING_PATH + settings.REPORT_PATH)
+
     def get_multi(
         self,
         db: Session,
@@ -41,6 +53,7 @@ class CRUDResource(CRUDWhyqdBase[Resource, ResourceCreate, ResourceUpdate]):
         prioritised: bool = True,
         page: int = 0,
         page_break: bool = False,
+        cursor: str | None = None,
     ) -> list[Resource]:
         db_objs = db.query(self.model)
         if not user.is_superuser:
@@ -59,11 +72,11 @@ class CRUDResource(CRUDWhyqdBase[Resource, ResourceCreate, ResourceUpdate]):
         if date_to:
             if isinstance(date_to, str):
                 date_to = datetime.strptime(date_to, "%Y-%m-%d")
-            db_objs = db_objs.filter(self.model.latest_activity <= date_to)
+            db_objs = db_objs.filter(self.model.latest_activity_at <= date_to)
         if date_from:
             if isinstance(date_from, str):
                 date_from = datetime.strptime(date_from, "%Y-%m-%d")
-            db_objs = db_objs.filter(self.model.latest_activity >= date_from)
+            db_objs = db_objs.filter(self.model.latest_activity_at >= date_from)
         if match:
             db_objs = db_objs.filter(
                 (
@@ -73,19 +86,29 @@ class CRUDResource(CRUDWhyqdBase[Resource, ResourceCreate, ResourceUpdate]):
                 )
             )
         if alert:
-            db_objs = db_objs.filter(self.model.latest_activity.alert)
+            db_objs = db_objs.filter(
+                self.model.activities.any((Activity.created == self.model.latest_activity_at) & Activity.alert)
+            )
         if custodian:
-            db_objs = db_objs.filter(self.model.latest_activity.custodians_only)
-        if prioritised:
-            db_objs = db_objs.order_by(self.model.latest_activity.desc(), self.model.title)
-        else:
-            db_objs = db_objs.order_by(self.model.title, self.model.latest_activity)
-        if not page_break:
-            if page > 0:
-                db_objs = db_objs.offset(page * settings.MULTI_MAX)
-            db_objs = db_objs.limit(settings.MULTI_MAX)
+            db_objs = db_objs.filter(
+                self.model.activities.any(
+                    (Activity.created == self.model.latest_activity_at) & Activity.custodians_only
+                )
+            )
+        db_objs = crud_cursor.get_page(
+            db_objs,
+            keys=self._get_sort_keys(prioritised=prioritised),
+            cursor=cursor,
+            page=page,
+            page_break=page_break,
+        )
         return db_objs.all()
 
+    def _get_sort_keys(self, *, prioritised: bool = True) -> list[SortKey]:
+        if prioritised:
+            return [(self.model.latest_activity_at, True), (self.model.title, False), (self.model.id, False)]
+        return [(self.model.title, False), (self.model.latest_activity_at, False), (self.model.id, False)]
+
     def get_report(
         self,
         db: Session,
@@ -118,11 +141,18 @@ class CRUDResource(CRUDWhyqdBase[Resource, ResourceCreate, ResourceUpdate]):
         else:
             response.task_id = task_obj.id
             response.task_name = task_obj.title
-        # Generate subquery
+        # Cached per scope, user, state, frequency and range. The scope's stamp changes whenever its resource states do
+        scope_id = str(project_obj.id if project_obj else task_obj.id)
+        cache_key = (scope_id, self._get_report_stamp(scope_id=scope_id), str(user.id), responsibility.name)
+        cache_key += (state.name if state else None, frequency.name, str(date_from), str(date_to))
+        cache_version = self.reports.version
+        if cached := self.reports.get(cache_key):
+            return cached
+        # Distinct tasks with resources in this state, by the period of their latest activity
         # https://www.postgresql.org/docs/current/functions-datetime.html#FUNCTIONS-DATETIME-TRUNC
         subquery = db.query(
-            self.model,
-            func.date_trunc(frequency.value.lower(), self.model.latest_activity).label("frequency"),
+            self.model.task_id,
+            func.date_trunc(frequency.value.lower(), self.model.latest_activity_at).label("frequency"),
         )
         if not user.is_superuser:
             responsibilities = crud_role._get_responsibility(responsibility=responsibility)
@@ -139,41 +169,65 @@ class CRUDResource(CRUDWhyqdBase[Resource, ResourceCreate, ResourceUpdate]):
         if date_to:
             if isinstance(date_to, str):
                 date_to = datetime.strptime(date_to, "%Y-%m-%d")
-            subquery = subquery.filter(self.model.latest_activity <= date_to)
+            subquery = subquery.filter(self.model.latest_activity_at <= date_to)
         if date_from:
             if isinstance(date_from, str):
                 date_from = datetime.strptime(date_from, "%Y-%m-%d")
-            subquery = subquery.filter(self.model.latest_activity >= date_from)
-        # Distinct subquery
-        subquery = subquery.distinct(self.model.task_id, "frequency").subquery()
-        query = db.query(subquery.c.frequency, func.count(subquery.c.frequency)).group_by(subquery.c.frequency).all()
-        if not query:
-            return response
-        # Periods
-        periods = [query[0][0]]
-        if len(query) > 1:
-            periods = (
-                pd.date_range(start=query[0][0], end=query[-1][0], inclusive="both", freq=frequency.drange())
-                .to_pydatetime()
-                .tolist()
+            subquery = subquery.filter(self.model.latest_activity_at >= date_from)
+        subquery = subquery.distinct().subquery()
+        buckets = (
+            select(subquery.c.frequency, func.count().label("value"))
+            .where(subquery.c.frequency.isnot(None))
+            .group_by(subquery.c.frequency)
+            .cte("bucket")
+        )
+        # Every period from the first bucket to the last, with empty periods as zero, labelled by its last day
+        # https://www.postgresql.org/docs/current/functions-srf.html
+        interval = cast(literal(frequency.interval()), INTERVAL)
+        series = (
+            func.generate_series(
+                select(func.min(buckets.c.frequency)).scalar_subquery(),
+                select(func.max(buckets.c.frequency)).scalar_subquery(),
+                interval,
             )
-        # Response
-        for period in periods:
-            has_period = False
-            for q_period, q_count in query:
-                if period == q_period:
-                    has_period = True
-                    break
-            if not has_period:
-                q_period = period
-                q_count = 0
-            q_period = pd.to_datetime(q_period + frequency.offset()).date().isoformat()
-            data = {"period": q_period, "value": q_count, "proportion": None}
-            if response.count:
-                data["proportion"] = q_count / response.count
-            response.data.append(data)
+            .table_valued("period")
+            .render_derived(name="series")
+        )
+        value = func.coalesce(buckets.c.value, 0)
+        query = (
+            select(
+                func.to_char(series.c.period + interval - cast(literal("1 day"), INTERVAL), "YYYY-MM-DD"),
+                value,
+                cast(value, Float) / cast(func.nullif(response.count, 0), Float),
+            )
+            .select_from(series.outerjoin(buckets, buckets.c.frequency == series.c.period))
+            .order_by(series.c.period)
+        )
+        response.data = [
+            ChartData(period=period, value=value, proportion=proportion)
+            for period, value, proportion in db.execute(query)
+        ]
+        self.reports.set(cache_key, response, version=cache_version)
         return response
 
+    def _get_report_stamp(self, *, scope_id: str) -> str:
+        # Stamps are files in the working directory, so that the API and every worker share them
+        try:
+            return (self.report_stamps / scope_id).read_text()
+        except FileNotFoundError:
+            return ""
+
+    def invalidate_reports(self, *, scope_ids: set[str]) -> None:
+        # New stamps for these projects and tasks, so that no process reads its cached reports again
+        if not scope_ids:
+            return
+        self.report_stamps.mkdir(parents=True, exist_ok=True)
+        for scope_id in scope_ids:
+            partial_path = self.report_stamps / f".{scope_id}.{uuid4().hex}.part"
+            partial_path.write_text(uuid4().hex)
+            os.replace(partial_path, self.report_stamps / scope_id)
+        self.reports.invalidate(lambda key: key[0] in scope_ids)
+
     # def has_role(self, db: Session, *, user: User, responsibility: RoleType, db_obj: Resource) -> bool:
     #     if super().has_role(db=db, user=user, responsibility=responsibility, db_obj=db_obj):
     #         return True
@@ -181,6 +235,38 @@ class CRUDResource(CRUDWhyqdBase[Resource, ResourceCreate, ResourceUpdate]):
     #         return crud_task.has_role(db=db, user=user, responsibility=responsibility, db_obj=db_obj.task)
     #     return False
 
+    ###################################################################################################
+    # LATEST ACTIVITY
+    ###################################################################################################
+    def _get_latest_activity(self) -> Any:
+        return (
+            select(func.max(Activity.created))
+            .where(Activity.resource_id == self.model.id)
+            .correlate(self.model)
+            .scalar_subquery()
+        )
+
+    def refresh_latest_activity(self, db: Session) -> int:
+        # Derive `latest_activity_at` again from activities, for every resource where it differs
+        latest_activity = self._get_latest_activity()
+        count = (
+            db.query(self.model)
+            .filter(self.model.latest_activity_at.is_distinct_from(latest_activity))
+            .update({self.model.latest_activity_at: latest_activity}, synchronize_session=False)
+        )
+        db.commit()
+        return count
+
+    def check_latest_activity(self, db: Session) -> list[dict]:
+        # Resources whose `latest_activity_at` differs from their latest activity
+        latest_activity = self._get_latest_activity()
+        return [
+            {"id": resource_id, "latest_activity_at": stored, "latest_activity": actual}
+            for resource_id, stored, actual in db.query(
+                self.model.id, self.model.latest_activity_at, latest_activity
+            ).filter(self.model.latest_activity_at.is_distinct_from(latest_activity))
+        ]
+
     def update_state(
         self,
         db: Session,
@@ -218,3 +304,67 @@ class CRUDResource(CRUDWhyqdBase[Resource, ResourceCreate, ResourceUpdate]):
 
 
 resource = CRUDResource(Resource, [(Resource.task, Task), (Task.project, Project)])
+
+
+###################################################################################################
+# SESSION EVENTS
+###################################################################################################
+# Reports are invalidated for the tasks and projects whose resource states (or latest activity, or tasks, or roles) a
+# flush changes, once the transaction commits, so that a report computed in between is never cached as current.
+@event.listens_for(Session, "after_flush")
+def collect_report_changes(session: Session, flush_context) -> None:
+    task_ids = set()
+    project_ids = set()
+    resource_ids = set()
+    role_project_ids = set()
+    for db_obj in session.new | session.dirty | session.deleted:
+        # Read through the instance state, so that nothing is loaded (or refreshed after a delete) mid-flush
+        state = inspect(db_obj)
+        is_changed = db_obj in session.new or db_obj in session.deleted
+        if isinstance(db_obj, Resource):
+            if is_changed or any(state.attrs[key].history.has_changes() for key in ["state", "task_id"]):
+                task_ids.update([state.dict.get("task_id"), *state.attrs.task_id.history.deleted])
+        elif isinstance(db_obj, Activity) and db_obj in session.new and state.dict.get("resource_id"):
+            task_ids.add(state.dict.get("task_id"))
+            project_ids.add(state.dict.get("project_id"))
+        elif isinstance(db_obj, Task):
+            if is_changed or state.attrs.project_id.history.has_changes():
+                task_ids.add(state.dict.get("id"))
+                project_ids.update([state.dict.get("project_id"), *state.attrs.project_id.history.deleted])
+        elif isinstance(db_obj, Role):
+            # Reports count only the resources the user has a role for
+            keys = ["researcher_id", "is_validated", "responsibility", "project_id", "task_id", "resource_id"]
+            if is_changed or any(state.attrs[key].history.has_changes() for key in keys):
+                role_project_ids.update([state.dict.get("project_id"), *state.attrs.project_id.history.deleted])
+                task_ids.update([state.dict.get("task_id"), *state.attrs.task_id.history.deleted])
+                resource_ids.update([state.dict.get("resource_id"), *state.attrs.resource_id.history.deleted])
+    resource_ids.discard(None)
+    if resource_ids:
+        task_ids.update(
+            session.connection().execute(select(Resource.task_id).where(Resource.id.in_(resource_ids))).scalars()
+        )
+    task_ids.discard(None)
+    if task_ids:
+        project_ids.update(
+            session.connection().execute(select(Task.project_id).where(Task.id.in_(task_ids))).scalars()
+        )
+    role_project_ids.discard(None)
+    if role_project_ids:
+        # A project role reaches every task in the project
+        project_ids.update(role_project_ids)
+        task_ids.update(
+            session.connection().execute(select(Task.id).where(Task.project_id.in_(role_project_ids))).scalars()
+        )
+    project_ids.discard(None)
+    if task_ids or project_ids:
+        session.info.setdefault("report_scopes", set()).update(str(i) for i in task_ids | project_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_report_changes(session: Session) -> None:
+    resource.invalidate_reports(scope_ids=session.info.pop("report_scopes", set()))
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_report_changes(session: Session) -> None:
+    session.info.pop("report_scopes", None)
@@ -1,16 +1,23 @@
 from __future__ import annotations
 import logging
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.response import StreamingBody
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 from uuid import UUID
 import base64
+import hashlib
 import json
-from io import StringIO
+import os
 import pandas as pd
+import threading
+import time
 from typing import BinaryIO
 
 from app.core.config import settings
+from app.utilities.http import get_content_range
 
 
 # https://tenacity.readthedocs.io/en/latest/
@@ -38,13 +45,81 @@ class CRUDSpaces:
             endpoint_url=str(settings.SPACES_ENDPOINT_URL),
             aws_access_key_id=settings.SPACES_ACCESS_KEY,
             aws_secret_access_key=settings.SPACES_SECRET_KEY,
+            # Enough pooled connections for every concurrent part
+            config=Config(max_pool_connections=max(10, settings.SPACES_MAX_CONCURRENCY * 2)),
         )
         self.bucket = self.space.Bucket(settings.SPACES_BUCKET)
+        # Multipart transfers, in parallel parts, for large sources
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.SPACES_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.SPACES_MULTIPART_CHUNKSIZE,
+            max_concurrency=settings.SPACES_MAX_CONCURRENCY,
+            use_threads=settings.SPACES_MAX_CONCURRENCY > 1,
+        )
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_pid: int | None = None
+        # Optional manifest of known keys, so that misses can be answered without a network call
+        self.use_manifest = settings.SPACES_MANIFEST
+        self.manifest: set[str] = set()
+        self.manifest_refreshed = 0.0
+        self.manifest_lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # One thread pool per worker process for streamed part uploads. Threads do not survive a fork.
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.SPACES_MAX_CONCURRENCY, thread_name_prefix="spaces-part"
+            )
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _is_missing(self, e: ClientError) -> bool:
+        # GET raises `NoSuchKey`, HEAD raises a bare `404`
+        return e.response.get("Error", {}).get("Code") in ["NoSuchKey", "404", "NotFound"]
+
+    def refresh_manifest(self) -> None:
+        # Paginated listing of every key in the bucket
+        keys = set()
+        for obj in self.bucket.objects.page_size(1000):
+            keys.add(obj.key)
+        with self.manifest_lock:
+            self.manifest = keys
+            self.manifest_refreshed = time.monotonic()
+
+    def get_keys(self, *, modified: float) -> list[str]:
+        # Keys at the root of the bucket, last modified no later than the `modified` timestamp
+        return [
+            obj.key
+            for obj in self.bucket.objects.page_size(1000)
+            if "/" not in obj.key and obj.last_modified.timestamp() <= modified
+        ]
+
+    def in_manifest(self, *, key: str) -> bool:
+        # Without a manifest, assume the key may exist. Keys written by other processes since the last refresh are
+        # only seen after the next one, so the manifest is off by default, and `SPACES_MANIFEST_TTL` bounds staleness.
+        if not self.use_manifest:
+            return True
+        if time.monotonic() - self.manifest_refreshed > settings.SPACES_MANIFEST_TTL:
+            self.refresh_manifest()
+        return key in self.manifest
+
+    def _add_to_manifest(self, *, key: str) -> None:
+        if self.use_manifest:
+            with self.manifest_lock:
+                self.manifest.add(key)
+
+    def _remove_from_manifest(self, *, key: str) -> None:
+        if self.use_manifest:
+            with self.manifest_lock:
+                self.manifest.discard(key)
 
     def exists(self, *, folder_id: UUID | str | None = None, filename: str) -> bool:
         key = f"{filename}"
         if folder_id:
             key = f"{folder_id}/{filename}"
+        if not self.in_manifest(key=key):
+            return False
         obj = self.bucket.Object(key)
         try:
             obj.load()
@@ -52,19 +127,37 @@ class CRUDSpaces:
         except ClientError:
             return False
 
+    def get_object(
+        self, *, folder_id: UUID | str | None = None, filename: str, byte_range: str | None = None
+    ) -> dict | None:
+        # A single GET. A missing key is a miss, not an error, so there is no need to check `exists` first.
+        key = f"{filename}"
+        if folder_id:
+            key = f"{folder_id}/{filename}"
+        if not self.in_manifest(key=key):
+            return None
+        try:
+            if byte_range:
+                return self.bucket.Object(key).get(Range=byte_range)
+            return self.bucket.Object(key).get()
+        except ClientError as e:
+            if self._is_missing(e):
+                self._remove_from_manifest(key=key)
+                return None
+            raise e
+
     @retry(
         stop=stop_after_attempt(max_tries),
         wait=wait_fixed(wait_seconds),
         after=after_log(logger, logging.WARN),
         retry_error_callback=lambda retry_state: return_value_on_error,
     )
-    def get(self, *, folder_id: UUID | str | None = None, filename: str) -> BinaryIO:
+    def get(self, *, folder_id: UUID | str | None = None, filename: str) -> BinaryIO | None:
         # https://stackoverflow.com/a/35376156/295606
-        key = f"{filename}"
-        if folder_id:
-            key = f"{folder_id}/{filename}"
-        obj = self.bucket.Object(key)
-        source = obj.get()["Body"].read().decode("utf-8")
+        obj = self.get_object(folder_id=folder_id, filename=filename)
+        if not obj:
+            return None
+        source = obj["Body"].read().decode("utf-8")
         # Convert base64 to binary
         # return base64.b64decode(source)
         # source = base64.b64decode(source)
@@ -86,31 +179,102 @@ class CRUDSpaces:
         save_obj = base64.b64encode(json.dumps(obj_in).encode())
         self.update(folder_id=folder_id, filename=filename, source=save_obj)
 
-    def get_stream(self, *, folder_id: UUID | str | None = None, filename: str) -> StreamingBody:
+    def get_stream(
+        self, *, folder_id: UUID | str | None = None, filename: str, byte_range: str | None = None
+    ) -> tuple[StreamingBody | None, int, tuple[int, int] | None] | None:
         # https://stackoverflow.com/questions/69617252/response-file-stream-from-s3-fastapi
-        key = f"{filename}"
-        if folder_id:
-            key = f"{folder_id}/{filename}"
+        # A single GET, of the whole object or of one HTTP `Range`, as (stream, size, range). The size, and inclusive
+        # range sent, are read from the response, so there is no need for a HEAD first. The stream is None if the range
+        # is not satisfiable.
         try:
-            obj = self.bucket.Object(key)
-            return obj.get()["Body"].iter_chunks()
+            obj = self.get_object(folder_id=folder_id, filename=filename, byte_range=byte_range)
+            if not obj:
+                return None
+            if obj.get("ContentRange"):
+                start, end, size = get_content_range(obj["ContentRange"])
+                return obj["Body"].iter_chunks(), size, (start, end)
+            return obj["Body"].iter_chunks(), obj["ContentLength"], None
+        except ClientError as e:
+            error = e.response.get("Error", {})
+            if error.get("Code") == "InvalidRange":
+                return None, int(error.get("ActualObjectSize", 0)), None
+            raise e
         except Exception as e:
             print("-----------------------------------------------------------")
             print(f"ERROR: Spaces Stream     -     {filename}")
             print("-----------------------------------------------------------")
             raise e
 
-    def save_stream(self, *, folder_id: UUID | str | None = None, filename: str, df: pd.DataFrame) -> None:
+    def _get_row_chunks(self, *, df: pd.DataFrame) -> int:
+        # Rows per CSV chunk, so that each chunk is roughly a tenth of a part
+        sample = df.iloc[:100].to_csv(index=False, header=False).encode("utf-8")
+        row_size = max(1, len(sample) // max(1, len(df.iloc[:100])))
+        return max(1, settings.SPACES_MULTIPART_CHUNKSIZE // (row_size * 10))
+
+    def save_stream(self, *, folder_id: UUID | str | None = None, filename: str, df: pd.DataFrame) -> str:
+        # Stream a DataFrame to the bucket as CSV, one multipart part at a time, rather than buffering all of it.
+        # At most `SPACES_MAX_CONCURRENCY` parts are held in memory, and uploaded in parallel. Returns the Blake2b
+        # checksum of the uploaded bytes, as for a stored source.
         key = f"{filename}"
         if folder_id:
             key = f"{folder_id}/{filename}"
+        client = self.space.meta.client
+        upload_id = None
+        checksum = hashlib.blake2b()
         try:
-            obj = self.bucket.Object(key)
-            source = StringIO()
-            df.to_csv(source, index=False)
-            source.seek(0)
-            obj.put(Body=source.getvalue())
+            part_size = settings.SPACES_MULTIPART_CHUNKSIZE
+            row_chunks = self._get_row_chunks(df=df)
+            buffer = bytearray()
+            parts: dict[int, Future] = {}
+            pending = set()
+            for i in range(0, max(1, len(df)), row_chunks):
+                chunk = df.iloc[i : i + row_chunks].to_csv(index=False, header=i == 0).encode("utf-8")
+                checksum.update(chunk)
+                buffer += chunk
+                if len(buffer) < part_size:
+                    continue
+                if not upload_id:
+                    upload_id = client.create_multipart_upload(Bucket=settings.SPACES_BUCKET, Key=key)["UploadId"]
+                if len(pending) >= settings.SPACES_MAX_CONCURRENCY:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                part_number = len(parts) + 1
+                parts[part_number] = self.executor.submit(
+                    client.upload_part,
+                    Bucket=settings.SPACES_BUCKET,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=bytes(buffer),
+                )
+                pending.add(parts[part_number])
+                buffer = bytearray()
+            if not upload_id:
+                # Smaller than a single part
+                self.bucket.Object(key).put(Body=bytes(buffer))
+            else:
+                if buffer:
+                    part_number = len(parts) + 1
+                    parts[part_number] = self.executor.submit(
+                        client.upload_part,
+                        Bucket=settings.SPACES_BUCKET,
+                        Key=key,
+                        UploadId=upload_id,
+                        PartNumber=part_number,
+                        Body=bytes(buffer),
+                    )
+                client.complete_multipart_upload(
+                    Bucket=settings.SPACES_BUCKET,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={
+                        "Parts": [{"ETag": part.result()["ETag"], "PartNumber": n} for n, part in parts.items()]
+                    },
+                )
+            self._add_to_manifest(key=key)
+            return checksum.hexdigest()
         except Exception as e:
+            if upload_id:
+                client.abort_multipart_upload(Bucket=settings.SPACES_BUCKET, Key=key, UploadId=upload_id)
             print("-----------------------------------------------------------")
             print(f"Spaces Save     -     {filename}")
             print("-----------------------------------------------------------")
@@ -120,13 +284,49 @@ class CRUDSpaces:
         key = f"{filename}"
         if folder_id:
             key = f"{folder_id}/{filename}"
-        self.bucket.upload_file(Filename=source_path, Key=key)
+        self.bucket.upload_file(Filename=str(source_path), Key=key, Config=self.transfer_config)
+        self._add_to_manifest(key=key)
 
-    def download_file(self, *, folder_id: UUID | str | None = None, filename: str, source_path: str) -> None:
+    def download_file(self, *, folder_id: UUID | str | None = None, filename: str, source_path: str) -> bool:
+        # Returns False if there is no such key
         key = f"{filename}"
         if folder_id:
             key = f"{folder_id}/{filename}"
-        self.bucket.download_file(Filename=source_path, Key=key)
+        if not self.in_manifest(key=key):
+            return False
+        try:
+            self.bucket.download_file(Filename=str(source_path), Key=key, Config=self.transfer_config)
+        except ClientError as e:
+            if self._is_missing(e):
+                self._remove_from_manifest(key=key)
+                return False
+            raise e
+        return True
+
+    def get_presigned_download(
+        self, *, folder_id: UUID | str | None = None, filename: str, download_name: str | None = None
+    ) -> str:
+        key = f"{filename}"
+        if folder_id:
+            key = f"{folder_id}/{filename}"
+        params = {"Bucket": settings.SPACES_BUCKET, "Key": key}
+        if download_name:
+            params["ResponseContentDisposition"] = f'attachment; filename="{download_name}"'
+        return self.space.meta.client.generate_presigned_url(
+            "get_object", Params=params, ExpiresIn=settings.PRESIGNED_EXPIRE_SECONDS
+        )
+
+    def get_presigned_upload(self, *, folder_id: UUID | str | None = None, filename: str, size: int) -> dict:
+        # Presigned POST, restricted to exactly the declared size. Returns the `url` and form `fields` to send.
+        key = f"{filename}"
+        if folder_id:
+            key = f"{folder_id}/{filename}"
+        return self.space.meta.client.generate_presigned_post(
+            Bucket=settings.SPACES_BUCKET,
+            Key=key,
+            Conditions=[["content-length-range", size, size]],
+            ExpiresIn=settings.PRESIGNED_EXPIRE_SECONDS,
+        )
 
     def create(self, *, folder_id: UUID | str | None = None, filename: str, source: str) -> int:
         key = f"{filename}"
@@ -134,6 +334,7 @@ class CRUDSpaces:
             key = f"{folder_id}/{filename}"
         obj = self.bucket.Object(key)
         obj.put(Body=source)
+        self._add_to_manifest(key=key)
 
     @retry(
         stop=stop_after_attempt(max_tries),
@@ -157,6 +358,8 @@ class CRUDSpaces:
             new_key = f"{folder_id}/{newname}"
         self.bucket.copy(old_obj, new_key)
         self.bucket.Object(old_key).delete()
+        self._add_to_manifest(key=new_key)
+        self._remove_from_manifest(key=old_key)
 
     def remove(self, *, folder_id: UUID | str | None = None, filename: str) -> int:
         key = f"{filename}"
@@ -164,6 +367,7 @@ class CRUDSpaces:
             key = f"{folder_id}/{filename}"
         obj = self.bucket.Object(key)
         obj.delete()
+        self._remove_from_manifest(key=key)
 
 
 spaces = CRUDSpaces()
@@ -2,7 +2,6 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
-from sqlalchemy import nullslast
 from uuid import UUID
 from datetime import datetime
 
@@ -17,7 +16,7 @@ from app.schema_types import RoleType, ReferenceType, DCAccrualPolicyType, DCFre
 # from app.crud.crud_project import project as crud_project
 from app.crud.crud_role import role as crud_role
 from app.crud.crud_activity import activity as crud_activity
-from app.core.config import settings
+from app.crud.crud_cursor import cursor as crud_cursor, SortKey
 
 if TYPE_CHECKING:
     from app.models.resource import Resource
@@ -124,6 +123,7 @@ class CRUDTask(CRUDWhyqdBase[Task, TaskCreate, TaskUpdate]):
         descending: bool = True,
         page: int = 0,
         page_break: bool = False,
+        cursor: str | None = None,
     ) -> list[Task]:
         db_objs = db.query(self.model)
         if not user.is_superuser:
@@ -149,14 +149,13 @@ class CRUDTask(CRUDWhyqdBase[Task, TaskCreate, TaskUpdate]):
                     | self.model.description_vector.match(str(match))
                 )
             )
-        order_by = self.model.created
-        if descending:
-            order_by = order_by.desc()
-        db_objs = db_objs.distinct().order_by(order_by)
-        if not page_break:
-            if page > 0:
-                db_objs = db_objs.offset(page * settings.MULTI_MAX)
-            db_objs = db_objs.limit(settings.MULTI_MAX)
+        db_objs = crud_cursor.get_page(
+            db_objs.distinct(),
+            keys=self._get_sort_keys(descending=descending),
+            cursor=cursor,
+            page=page,
+            page_break=page_break,
+        )
         return db_objs.all()
 
     def get_scheduled_multi(
@@ -175,6 +174,7 @@ class CRUDTask(CRUDWhyqdBase[Task, TaskCreate, TaskUpdate]):
         prioritised: bool = True,
         page: int = 0,
         page_break: bool = False,
+        cursor: str | None = None,
     ) -> list[Task]:
         db_objs = db.query(self.model)
         if scheduled:
@@ -226,18 +226,28 @@ class CRUDTask(CRUDWhyqdBase[Task, TaskCreate, TaskUpdate]):
                     | self.model.description_vector.match(str(match))
                 )
             )
-        if prioritised:
-            db_objs = db_objs.order_by(
-                self.model.scheduled.desc(), nullslast(self.model.accrualPriority.desc()), self.model.title
-            )
-        else:
-            db_objs = db_objs.order_by(self.model.title)
-        if not page_break:
-            if page > 0:
-                db_objs = db_objs.offset(page * settings.MULTI_MAX)
-            db_objs = db_objs.limit(settings.MULTI_MAX)
+        db_objs = crud_cursor.get_page(
+            db_objs,
+            keys=self._get_scheduled_sort_keys(prioritised=prioritised),
+            cursor=cursor,
+            page=page,
+            page_break=page_break,
+        )
         return db_objs.all()
 
+    def _get_scheduled_sort_keys(self, *, prioritised: bool = True) -> list[SortKey]:
+        if prioritised:
+            return [
+                (self.model.scheduled, True),
+                (self.model.accrualPriority, True),
+                (self.model.title, False),
+                (self.model.id, False),
+            ]
+        return [(self.model.title, False), (self.model.id, False)]
+
+    def get_next_scheduled_cursor(self, db: Session, *, db_objs: list[Task], prioritised: bool = True) -> str | None:
+        return crud_cursor.get_next(db=db, db_objs=db_objs, keys=self._get_scheduled_sort_keys(prioritised=prioritised))
+
     def record_activity(
         self,
         db: Session,
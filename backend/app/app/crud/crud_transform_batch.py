@@ -0,0 +1,73 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from uuid import UUID
+
+from app.models.activity import Activity
+from app.models.task import Task
+from app.models.project import Project
+from app.models.transform_batch import TransformBatch
+from app.crud.crud_task import task as crud_task
+from app.crud.crud_project import project as crud_project
+
+if TYPE_CHECKING:
+    from app.models.user import User
+
+
+class CRUDTransformBatch:
+    # Batch transform progress is counted in the database, since the members of a batch run in parallel workers
+    def __init__(self):
+        self.model = TransformBatch
+
+    def get_message(self, *, name: str, total: int, complete: int = 0, failed: list[str] | None = None) -> str:
+        failed = failed or []
+        message = f"Batch transform of `{name}`: {complete} of {total} resources complete"
+        remaining = total - complete - len(failed)
+        if remaining > 0:
+            message += f", {remaining} in progress"
+        message += "."
+        if failed:
+            message += " Failed: " + ", ".join(f"`{n}`" for n in failed) + "."
+        return message
+
+    def create(self, db: Session, *, user: User, db_obj: Task | Project, total: int) -> TransformBatch:
+        message = self.get_message(name=db_obj.name, total=total)
+        if isinstance(db_obj, Task):
+            activity_obj = crud_task.record_activity(db=db, user=user, db_obj=db_obj, message=message)
+        else:
+            activity_obj = crud_project.record_activity(db=db, user=user, db_obj=db_obj, message=message)
+        batch_obj = self.model(activity_id=activity_obj.id, name=db_obj.name, total=total)
+        db.add(batch_obj)
+        db.commit()
+        db.refresh(batch_obj)
+        return batch_obj
+
+    def record(self, db: Session, *, id: UUID | str, name: str, complete: bool) -> bool:
+        # Add a finished resource, and report the counts so far. The batch row stays locked until the activity is
+        # updated, so members report in turn, and the last report has the final counts. Returns whether the batch is
+        # finished.
+        values = {self.model.complete: self.model.complete + 1}
+        if not complete:
+            values = {self.model.failed: func.array_append(self.model.failed, name)}
+        batch = self.model
+        row = db.execute(
+            update(batch)
+            .where(batch.id == id)
+            .values(values)
+            .returning(batch.activity_id, batch.name, batch.total, batch.complete, batch.failed)
+        ).first()
+        if not row:
+            db.rollback()
+            return False
+        activity_id, batch_name, total, complete, failed = row
+        is_finished = complete + len(failed) >= total
+        message = self.get_message(name=batch_name, total=total, complete=complete, failed=failed)
+        db.query(Activity).filter(Activity.id == activity_id).update(
+            {Activity.message: message, Activity.alert: is_finished and bool(failed)}, synchronize_session=False
+        )
+        db.commit()
+        return is_finished
+
+
+transform_batch = CRUDTransformBatch()
@@ -0,0 +1,156 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from uuid import UUID
+import json
+
+from app.crud.base import CRUDBase
+from app.crud.crud_files import files as crud_files
+from app.models.upload import UploadSession, UploadChunk
+from app.schemas.upload import (
+    UploadSessionCreate,
+    UploadSessionUpdate,
+    UploadSession as UploadSessionView,
+    PresignedUpload,
+)
+from app.schemas.templates import DataSourceTemplateModel
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.models.user import User  # noqa: F401
+
+
+class CRUDUpload(CRUDBase[UploadSession, UploadSessionCreate, UploadSessionUpdate]):
+    def get(self, db: Session, *, id: UUID | str, user: User) -> UploadSession | None:
+        return db.query(self.model).filter(self.model.id == id, self.model.researcher_id == user.id).first()
+
+    def create(
+        self, db: Session, *, obj_in: UploadSessionCreate, user: User, presigned: bool = False
+    ) -> UploadSession:
+        try:
+            mimetype = crud_files.reader.get_mimetype(mimetype=obj_in.datasource.mime)
+        except ValueError:
+            raise ValueError(f"Source type ({obj_in.datasource.mime}) is not supported.")
+        if obj_in.size <= 0 or obj_in.size > settings.UPLOAD_MAX_BYTES:
+            raise ValueError(f"Source size must be between 1 and {settings.UPLOAD_MAX_BYTES} bytes.")
+        db_obj = self.model(
+            researcher_id=user.id,
+            task_id=obj_in.task_id,
+            size=obj_in.size,
+            checksum=obj_in.checksum,
+            mime_type=mimetype.name,
+            datasource=json.loads(obj_in.datasource.model_dump_json(by_alias=True, exclude_unset=True)),
+            sourceURL=obj_in.sourceURL,
+        )
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        if not presigned:
+            crud_files.create_upload(upload_id=db_obj.id, size=db_obj.size)
+        return db_obj
+
+    def write_chunk(self, db: Session, *, db_obj: UploadSession, offset: int, data: bytes) -> UploadSession:
+        # Chunks may arrive in any order, and in parallel. A chunk resent at the same offset replaces the original.
+        if not data or len(data) > settings.UPLOAD_CHUNK_MAX_BYTES:
+            raise ValueError(f"Chunks must be between 1 and {settings.UPLOAD_CHUNK_MAX_BYTES} bytes.")
+        if offset < 0 or offset + len(data) > db_obj.size:
+            raise ValueError(f"Chunk at offset {offset} extends beyond the declared size ({db_obj.size} bytes).")
+        if offset == 0:
+            crud_files.validate_upload(chunk=data, mimetype=db_obj.mime_type)
+        crud_files.write_upload_chunk(upload_id=db_obj.id, offset=offset, data=data)
+        # A single statement, so that concurrent resends of the same offset do not conflict
+        db.execute(
+            insert(UploadChunk)
+            .values(session_id=db_obj.id, offset=offset, size=len(data))
+            .on_conflict_do_update(constraint="_upload_chunk_uc", set_={"size": len(data), "created": func.now()})
+        )
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def is_expired(self, *, db_obj: UploadSession) -> bool:
+        # Abandoned partial uploads are swept after 24 hours, leaving the session without anything received
+        return not crud_files.get_upload_path(upload_id=db_obj.id).exists()
+
+    def get_missing(self, *, db_obj: UploadSession) -> tuple[int, list[list[int]]]:
+        # Bytes received, and the [start, end) ranges not yet covered by any chunk
+        received = 0
+        missing = []
+        position = 0
+        for chunk in db_obj.chunks.order_by(UploadChunk.offset).all():
+            if chunk.offset > position:
+                missing.append([position, chunk.offset])
+            end = chunk.offset + chunk.size
+            if end > position:
+                received += end - max(position, chunk.offset)
+                position = end
+        if position < db_obj.size:
+            missing.append([position, db_obj.size])
+        return received, missing
+
+    def get_status(self, *, db_obj: UploadSession) -> UploadSessionView:
+        received, missing = self.get_missing(db_obj=db_obj)
+        return UploadSessionView(
+            id=db_obj.id,
+            created=db_obj.created,
+            size=db_obj.size,
+            checksum=db_obj.checksum,
+            sourceURL=db_obj.sourceURL,
+            mime_type=db_obj.mime_type,
+            received=received,
+            missing=missing,
+            chunkSize=settings.UPLOAD_CHUNK_MAX_BYTES,
+        )
+
+    def validate(self, *, db_obj: UploadSession, checksum: str | None = None) -> str:
+        # Check that the whole file is present, and that there is a checksum to verify it. Returns the checksum.
+        _, missing = self.get_missing(db_obj=db_obj)
+        if missing:
+            raise ValueError(f"Upload is incomplete. Missing byte ranges: {missing}.")
+        checksum = checksum or db_obj.checksum
+        if not checksum:
+            raise ValueError("A checksum is required to finalize the upload.")
+        return checksum
+
+    def finalize(self, db: Session, *, db_obj: UploadSession, checksum: str | None = None) -> DataSourceTemplateModel:
+        # Runs in the worker. Assemble the upload into the data source store, but only once the whole file is present
+        # and its checksum matches. On a mismatch the session is kept, so that chunks can be resent.
+        checksum = self.validate(db_obj=db_obj, checksum=checksum)
+        if self.is_expired(db_obj=db_obj):
+            raise ValueError("Upload has expired. Start it again.")
+        received_checksum, _ = crud_files.get_source_checksum(
+            source=crud_files.get_upload_path(upload_id=db_obj.id)
+        )
+        if received_checksum != checksum:
+            raise ValueError("Upload checksum does not match. Resend the chunks, then finalize again.")
+        datasource_in = crud_files.store_upload(
+            upload_id=db_obj.id,
+            datasource_in=DataSourceTemplateModel(**db_obj.datasource),
+            mimetype=db_obj.mime_type,
+            checksum=checksum,
+        )
+        db.delete(db_obj)
+        db.commit()
+        return datasource_in
+
+    def get_presigned(self, *, db_obj: UploadSession) -> PresignedUpload:
+        presigned = crud_files.get_presigned_upload(upload_id=db_obj.id, mimetype=db_obj.mime_type, size=db_obj.size)
+        return PresignedUpload(id=db_obj.id, expires=settings.PRESIGNED_EXPIRE_SECONDS, **presigned)
+
+    def complete(self, db: Session, *, db_obj: UploadSession) -> DataSourceTemplateModel:
+        # Presigned uploads are imported by the worker, which fetches and verifies the source, so only the session
+        # is closed here. Nothing is known about what was received until then.
+        datasource_in = DataSourceTemplateModel(**db_obj.datasource)
+        db.delete(db_obj)
+        db.commit()
+        return datasource_in
+
+    def abort(self, db: Session, *, db_obj: UploadSession) -> None:
+        crud_files.delete_upload(upload_id=db_obj.id)
+        db.delete(db_obj)
+        db.commit()
+
+
+upload = CRUDUpload(UploadSession)
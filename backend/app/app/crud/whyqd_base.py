@@ -15,7 +15,7 @@ from app.models import User, Role
 
 # from app.crud.crud_user import user as crud_user
 from app.crud.crud_role import role as crud_role
-from app.core.config import settings
+from app.crud.crud_cursor import cursor as crud_cursor, SortKey
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -56,6 +56,7 @@ class CRUDWhyqdBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         descending: bool = True,
         page: int = 0,
         page_break: bool = False,
+        cursor: str | None = None,
     ) -> list[ModelType]:
         db_objs = db.query(self.model)
         if not user.is_superuser:
@@ -79,16 +80,22 @@ class CRUDWhyqdBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                     | self.model.description_vector.match(str(match))
                 )
             )
-        order_by = self.model.created
-        if descending:
-            order_by = order_by.desc()
-        db_objs = db_objs.distinct().order_by(order_by)
-        if not page_break:
-            if page > 0:
-                db_objs = db_objs.offset(page * settings.MULTI_MAX)
-            db_objs = db_objs.limit(settings.MULTI_MAX)
+        db_objs = crud_cursor.get_page(
+            db_objs.distinct(),
+            keys=self._get_sort_keys(descending=descending),
+            cursor=cursor,
+            page=page,
+            page_break=page_break,
+        )
         return db_objs.all()
 
+    def _get_sort_keys(self, *, descending: bool = True) -> list[SortKey]:
+        return [(self.model.created, descending), (self.model.id, descending)]
+
+    def get_next_cursor(self, db: Session, *, db_objs: list[ModelType], **sort) -> str | None:
+        # Cursor for the page after `db_objs`, given the same sort arguments as the query
+        return crud_cursor.get_next(db=db, db_objs=db_objs, keys=self._get_sort_keys(**sort))
+
     def create(self, db: Session, *, obj_in: CreateSchemaType, user: User) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)  # type: ignore
@@ -10,6 +10,7 @@ from app.models.resource import Resource  # noqa: F401
 from app.models.task import Task  # noqa: F401
 from app.models.project import Project  # noqa: F401
 from app.models.role import Role  # noqa: F401
+from app.models.access import ReferenceAccess  # noqa: F401
 
 from app.models.invitation import Invitation  # noqa: F401
 from app.models.activity import Activity  # noqa: F401
@@ -17,3 +18,6 @@ from app.models.activity import Activity  # noqa: F401
 from app.models.order import Order  # noqa: F401
 from app.models.subscription import Subscription, TransformActivity  # noqa: F401
 from app.models.price import Product, Price  # noqa: F401
+from app.models.blob import Blob, BlobLink  # noqa: F401
+from app.models.upload import UploadSession, UploadChunk  # noqa: F401
+from app.models.transform_batch import TransformBatch  # noqa: F401
@@ -0,0 +1,45 @@
+import argparse
+import logging
+from app import crud
+from app.db.session import SessionLocal
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def refresh() -> None:
+    db = SessionLocal()
+    count = crud.resource.refresh_latest_activity(db=db)
+    db.close()
+    logger.info(f"Resource latest activity refreshed: {count} resource(s) updated")
+
+
+def check() -> int:
+    # Returns the number of resources whose latest activity has drifted from their activities
+    db = SessionLocal()
+    differences = crud.resource.check_latest_activity(db=db)
+    for difference in differences:
+        logger.warning(
+            f"Resource {difference['id']}: latest activity at {difference['latest_activity_at']},"
+            f" but latest activity is {difference['latest_activity']}"
+        )
+    db.close()
+    logger.info(f"Resource latest activity checked: {len(differences)} with differences")
+    return len(differences)
+
+
+def main() -> None:
+    # python /app/app/latest_activity.py refresh
+    # python /app/app/latest_activity.py check
+    parser = argparse.ArgumentParser(description="Refresh or check the latest activity of every resource.")
+    parser.add_argument("command", choices=["refresh", "check"])
+    args = parser.parse_args()
+    if args.command == "refresh":
+        refresh()
+    elif check():
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,28 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.api_v1.api import api_router
 from app.core.config import settings
+from app.utilities.http import CURSOR_HEADER
 
 app = FastAPI(title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json")
 
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    # Reject oversize source uploads from their declared length, before the body is received. Registered before CORS,
+    # so that CORS is the outer layer, and a 413 still carries its headers.
+    if request.method in ["POST", "PUT"] and "/data/upload" in request.url.path:
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > settings.UPLOAD_MAX_BYTES:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Upload is larger than the {settings.UPLOAD_MAX_BYTES} byte limit."},
+            )
+    return await call_next(request)
+
+
 # Set all CORS enabled origins
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -14,6 +31,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[CURSOR_HEADER],
     )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -7,6 +7,7 @@ from .resource import Resource  # noqa: F401
 from .task import Task  # noqa: F401
 from .project import Project, Subject  # noqa: F401
 from .role import Role  # noqa: F401
+from .access import ReferenceAccess  # noqa: F401
 
 from .invitation import Invitation  # noqa: F401
 from .activity import Activity  # noqa: F401
@@ -14,3 +15,6 @@ from .activity import Activity  # noqa: F401
 from .price import Price, Product  # noqa: F401
 from .order import Order  # noqa: F401
 from .subscription import Subscription, TransformActivity  # noqa: F401
+from .blob import Blob, BlobLink  # noqa: F401
+from .upload import UploadSession, UploadChunk  # noqa: F401
+from .transform_batch import TransformBatch  # noqa: F401
@@ -0,0 +1,22 @@
+from __future__ import annotations
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, ENUM
+
+from app.db.base_class import Base
+from app.schema_types import RoleType
+
+
+class ReferenceAccess(Base):
+    # Materialised permissions: the highest responsibility a user holds for a reference, by any path (a role on the
+    # reference itself, or on a resource, task or project which links to it). Derived from `Role`, `Resource`, `Task`
+    # and `Project`, and maintained by `app.crud.crud_access` as those change. Public references need no row.
+    __tablename__ = "reference_access"
+    user_id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    reference_id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("reference.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    # Enum order is CUSTODIAN, CURATOR, WRANGLER, SEEKER, so the highest responsibility is the least value
+    max_responsibility: Mapped[ENUM[RoleType]] = mapped_column(ENUM(RoleType), nullable=False)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import ForeignKey, BigInteger
+from sqlalchemy import DateTime
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID, ENUM
+from uuid import uuid4
+
+from app.db.base_class import Base
+from app.schema_types import MimeType
+
+
+class Blob(Base):
+    # Content-addressed source file, stored once as `{checksum}.{MIME}` regardless of how many data sources use it
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid4)
+    created: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    checksum: Mapped[str] = mapped_column(unique=True, index=True, nullable=False)
+    mime_type: Mapped[ENUM[MimeType]] = mapped_column(ENUM(MimeType), nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, default=0)
+    # REFERENCE COUNT, kept with the links in single statements, so that concurrent imports and removals agree
+    refcount: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
+    links: Mapped[list["BlobLink"]] = relationship(back_populates="blob", cascade="all, delete", lazy="dynamic")
+
+
+class BlobLink(Base):
+    # Maps a data source model UUID to the blob holding its bytes
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid4)
+    created: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    model: Mapped[UUID] = mapped_column(UUID(as_uuid=True), unique=True, nullable=False, index=True)
+    blob_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("blob.id"), nullable=False)
+    blob: Mapped["Blob"] = relationship(back_populates="links", foreign_keys=[blob_id])
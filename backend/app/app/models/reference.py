@@ -17,6 +17,7 @@ if TYPE_CHECKING:
     from app.models.task import Task  # noqa: F401
     from app.models.project import Project  # noqa: F401
     from app.models.role import Role  # noqa: F401
+    from app.models.blob import Blob  # noqa: F401
 
 
 class Reference(Base):
@@ -50,6 +51,14 @@ class Reference(Base):
     # OF DATA SOURCE MIME TYPE
     mime_type: Mapped[Optional[ENUM[MimeType]]] = mapped_column(ENUM(MimeType), nullable=True)
     index: Mapped[Optional[int]] = mapped_column(nullable=True)
+    # CONTENT-ADDRESSED BYTES: THE SOURCE FOR A DATASOURCE, OR ITS CANONICAL PARQUET COPY FOR DATA
+    blob: Mapped[Optional["Blob"]] = relationship(
+        secondary="bloblink",
+        primaryjoin="Reference.model == foreign(BlobLink.model)",
+        secondaryjoin="foreign(BlobLink.blob_id) == Blob.id",
+        uselist=False,
+        viewonly=True,
+    )
     # VERSION HISTORY
     older_id: Mapped[UUID] = mapped_column(ForeignKey("reference.id"), nullable=True)
     newer: Mapped["Reference"] = relationship(uselist=False, backref=backref("older", remote_side=[id]))
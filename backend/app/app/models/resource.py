@@ -94,6 +94,8 @@ class Resource(Base):
     activities: Mapped[list["Activity"]] = relationship(
         back_populates="resource", cascade="all, delete", lazy="dynamic"
     )
+    # `created` of the latest activity, maintained as activities are created, for sorting and reports
+    latest_activity_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), index=True, nullable=True)
     # MEMBERS AND MEMBERSHIP MANAGEMENT
     auths: Mapped[list["Role"]] = relationship(back_populates="resource", cascade="all, delete", lazy="dynamic")
 
@@ -104,23 +106,11 @@ class Resource(Base):
         Index("ix_resource_description_vector", description_vector, postgresql_using="gin"),
     )
 
-    @hybrid_property
+    @property
     def latest_activity(self) -> Optional[Activity]:
+        # In queries, use `latest_activity_at`
         return self.activities.order_by(Activity.created.desc()).first()
 
-    @latest_activity.inplace.expression
-    @classmethod
-    def _latest_activity(cls) -> ColumnElement[Optional[Activity]]:
-        # https://stackoverflow.com/a/55629083
-        return (
-            select(Activity.created)
-            .correlate(cls, Resource)
-            .where(cls.id == Activity.resource_id)
-            .order_by(Activity.created.desc())
-            .limit(1)
-            .scalar_subquery()
-        )
-
     @hybrid_property
     def project_id(self) -> Optional[UUID]:
         if self.task_id and self.task.project_id:
@@ -0,0 +1,24 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, String
+from sqlalchemy import DateTime
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from uuid import uuid4
+
+from app.db.base_class import Base
+
+
+class TransformBatch(Base):
+    # Progress of a batch transform. Members run in parallel workers, and each adds its resources to `complete` or
+    # `failed` as they finish. The counts are reported in a single `activity` on the task or project.
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid4)
+    created: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    activity_id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("activity.id", ondelete="CASCADE"), nullable=False
+    )
+    name: Mapped[str] = mapped_column(nullable=False)
+    total: Mapped[int] = mapped_column(nullable=False)
+    complete: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
+    failed: Mapped[list[str]] = mapped_column(ARRAY(String), nullable=False, default=list, server_default="{}")
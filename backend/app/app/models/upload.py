@@ -0,0 +1,41 @@
+from __future__ import annotations
+from typing import Optional
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import ForeignKey, BigInteger, UniqueConstraint
+from sqlalchemy import DateTime
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID, ENUM, JSONB
+from uuid import uuid4
+
+from app.db.base_class import Base
+from app.schema_types import MimeType
+
+
+class UploadSession(Base):
+    # Resumable upload of a single source file, assembled from chunks written at their offsets
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid4)
+    created: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    researcher_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("user.id"), nullable=False)
+    task_id: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("task.id"), nullable=True)
+    # SOURCE
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    checksum: Mapped[Optional[str]] = mapped_column(nullable=True)
+    mime_type: Mapped[ENUM[MimeType]] = mapped_column(ENUM(MimeType), nullable=False)
+    datasource: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    sourceURL: Mapped[Optional[str]] = mapped_column(nullable=True)
+    chunks: Mapped[list["UploadChunk"]] = relationship(
+        back_populates="session", cascade="all, delete", lazy="dynamic"
+    )
+
+
+class UploadChunk(Base):
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid4)
+    created: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    session_id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("uploadsession.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    session: Mapped["UploadSession"] = relationship(back_populates="chunks")
+    offset: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    __table_args__ = (UniqueConstraint("session_id", "offset", name="_upload_chunk_uc"),)
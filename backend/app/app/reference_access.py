@@ -0,0 +1,55 @@
+import argparse
+import logging
+from app import crud
+from app.db.session import SessionLocal
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def rebuild() -> None:
+    db = SessionLocal()
+    rows = crud.access.rebuild(db=db)
+    db.close()
+    logger.info(f"Reference access rebuilt: {rows} rows")
+
+
+def check(email: str | None = None) -> int:
+    # Returns the number of users whose materialised access differs from their role paths
+    db = SessionLocal()
+    if email:
+        user_objs = [user_obj for user_obj in [crud.user.get_by_email(db=db, email=email)] if user_obj]
+    else:
+        user_objs = crud.user.get_multi(db=db, page_break=True)
+    drifted = 0
+    for user_obj in user_objs:
+        if user_obj.is_superuser:
+            continue
+        differences = crud.reference.check_access(db=db, user=user_obj)
+        for difference in differences:
+            logger.warning(
+                f"{user_obj.email} {difference['responsibility'].name}: missing {difference['missing']},"
+                f" unexpected {difference['unexpected']}"
+            )
+        drifted += bool(differences)
+    db.close()
+    logger.info(f"Reference access checked for {len(user_objs)} user(s): {drifted} with differences")
+    return drifted
+
+
+def main() -> None:
+    # python /app/app/reference_access.py rebuild
+    # python /app/app/reference_access.py check [--email user@example.com]
+    parser = argparse.ArgumentParser(description="Rebuild or check the materialised reference access table.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--email", default=None, help="Only check this user.")
+    args = parser.parse_args()
+    if args.command == "rebuild":
+        rebuild()
+    elif check(email=args.email):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 from enum import auto
-import pandas as pd
 
 from app.schema_types.base import BaseEnum
 
@@ -17,18 +16,11 @@ class FrequencyType(BaseEnum):
         }
         return description[self.value]
 
-    def drange(self):
+    def interval(self):
+        # Postgres interval between the starts of consecutive periods
         description = {
-            "MONTH": "MS",
-            "QUARTER": "QS",
-            "YEAR": "YS",
-        }
-        return description[self.value]
-
-    def offset(self):
-        description = {
-            "MONTH": pd.tseries.offsets.MonthEnd(),
-            "QUARTER": pd.tseries.offsets.QuarterEnd(startingMonth=0),
-            "YEAR": pd.tseries.offsets.YearEnd(),
+            "MONTH": "1 month",
+            "QUARTER": "3 months",
+            "YEAR": "1 year",
         }
         return description[self.value]
@@ -29,8 +29,16 @@ from .resource import (  # noqa: F401
     ResourceCrosswalkReference,
     ResourceManager,
     ResourceCrosswalkManager,
+    ResourceFieldCategorisation,
+)
+from .crosswalk import (  # noqa: F401
+    CrosswalkBase,
+    CrosswalkCreate,
+    CrosswalkUpdate,
+    Crosswalk,
+    ActionModel,
+    ActionProfile,
 )
-from .crosswalk import CrosswalkBase, CrosswalkCreate, CrosswalkUpdate, Crosswalk, ActionModel  # noqa: F401
 from .task import TaskBase, TaskCreate, TaskUpdate, Task, ScheduledTask  # noqa: F401
 from .project import ProjectBase, ProjectCreate, ProjectUpdate, Project  # noqa: F401
 from .invitation import InvitationBase, InvitationCreate, InvitationUpdate, Invitation  # noqa: F401
@@ -38,6 +46,16 @@ from .templates import DataSourceTemplateModel, CrosswalkTemplateModel  # noqa:
 
 from .role import RoleBase, RoleCreate, RoleUpdate, Role, RoleSummary  # noqa: F401
 from .report import ReportData  # noqa: F401
+from .statistics import ColumnValueCount, ColumnHistogram, ColumnStatistics  # noqa: F401
+from .blob import BlobCreate, BlobUpdate, Blob  # noqa: F401
+from .cache import CacheStatistics  # noqa: F401
+from .upload import (  # noqa: F401
+    UploadSessionCreate,
+    UploadSessionUpdate,
+    UploadSession,
+    PresignedUpload,
+    PresignedDownload,
+)
 
 # SUBSCRIPTIONS
 from .product import ProductCreate, ProductUpdate, Product, ProductInDB, ProductPricingView  # noqa: F401
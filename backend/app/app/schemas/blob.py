@@ -0,0 +1,30 @@
+from __future__ import annotations
+from pydantic import ConfigDict, Field
+from typing import Optional
+from uuid import UUID
+from datetime import datetime
+
+from app.schema_types import MimeType
+from app.schemas.base_schema import BaseSchema
+
+
+class BlobBase(BaseSchema):
+    id: Optional[UUID] = Field(None, description="Automatically generated unique identity.")
+    checksum: str = Field(..., description="Blake2b checksum of the stored source file bytes.")
+    mimeType: MimeType = Field(..., alias="mime_type", description="Mime type of the stored source file.")
+    size: int = Field(default=0, description="Size of the stored source file in bytes.")
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class BlobCreate(BlobBase):
+    pass
+
+
+class BlobUpdate(BlobBase):
+    id: UUID = Field(..., description="Automatically generated unique identity.")
+
+
+class Blob(BlobBase):
+    id: UUID = Field(..., description="Automatically generated unique identity.")
+    created: datetime = Field(..., description="Automatically generated date blob was created.")
+    model_config = ConfigDict(populate_by_name=True, from_attributes=True)
@@ -0,0 +1,15 @@
+from __future__ import annotations
+from pydantic import Field
+
+from app.schemas.base_schema import BaseSchema
+
+
+class CacheStatistics(BaseSchema):
+    hits: int = Field(default=0, description="Source requests served from the local cache.")
+    misses: int = Field(default=0, description="Source requests which required a download from Spaces.")
+    evictions: int = Field(default=0, description="Files evicted to keep the cache within its byte budget.")
+    downloaded_bytes: int = Field(default=0, description="Total bytes downloaded from Spaces into the cache.")
+    evicted_bytes: int = Field(default=0, description="Total bytes evicted from the cache.")
+    files: int = Field(default=0, description="Files currently held in the cache.")
+    size: int = Field(default=0, description="Bytes currently held in the cache.")
+    max_bytes: int = Field(default=0, description="Byte budget for the cache.")
@@ -61,3 +61,16 @@ class ActionModel(BaseSchema):
     )
     sourceTerm: Optional[Union[str, List[str]]] = Field(None, description="Source term names as list, or single term.")
     rows: Optional[List[int]] = Field(None, description="Source row list of row-numbers, base zero.")
+
+
+class ActionProfile(BaseSchema):
+    uuid: str = Field(..., description="Action script reference, as a string.")
+    action: str = Field(..., description="Action term for the script.")
+    seconds: float = Field(default=0.0, description="Wall time spent on the action, summed over any partitions.")
+    peakMemory: int = Field(
+        default=0, description="Peak bytes allocated in the worker process by the action, over any partitions."
+    )
+    rowsIn: int = Field(default=0, description="Rows received by the action.")
+    rowsOut: int = Field(default=0, description="Rows returned by the action.")
+    columnsIn: int = Field(default=0, description="Columns received by the action.")
+    columnsOut: int = Field(default=0, description="Columns returned by the action.")
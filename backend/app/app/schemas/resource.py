@@ -6,7 +6,8 @@ from datetime import datetime
 from whyqd.models import FieldModel, DataSourceAttributeModel
 
 from app.schemas.base_schema import BaseSchema, BaseSummarySchema
-from app.schemas.crosswalk import ActionModel
+from app.schemas.crosswalk import ActionModel, ActionProfile
+from app.schemas.statistics import ColumnStatistics
 from app.schemas.activity import ResourceActivity
 from app.schema_types import StateType, ReferenceType, MimeType
 
@@ -105,6 +106,7 @@ class ResourceDataReference(ResourceReference):
     summarykeys: Optional[List[str]] = Field([], description="Keys for first fifty rows of data source.")
     # summary: Optional[List[DataSourceAttributeModel]] = Field([], description="First fifty rows of data source.")
     summary: Optional[List[dict]] = Field([], description="First fifty rows of data source.")
+    statistics: List[ColumnStatistics] = Field([], description="Statistics for each column, computed at import.")
 
 
 class ResourceSchemaReference(ResourceReference):
@@ -120,6 +122,10 @@ class ResourceCrosswalkReference(ResourceReference):
         default=[],
         description="A list of actions which define the crosswalk.",
     )
+    profile: List[ActionProfile] = Field(
+        default=[],
+        description="Per-action profile of the latest profiled transform with this crosswalk.",
+    )
 
 
 class ResourceManager(ResourceBase):
@@ -149,3 +155,8 @@ class ResourceCrosswalkManager(ResourceBase):
     task: Optional[BaseSummarySchema] = Field(None, description="Associated task table reference.")
     latest_activity: ResourceActivity = Field(..., description="Summary of latest activity")
     model_config = ConfigDict(from_attributes=True)
+
+
+class ResourceFieldCategorisation(BaseSchema):
+    name: str = Field(..., description="Schema subject field name.")
+    termType: str = Field("term", description="Categorise as unique `term`s, or as `boolean` Trues and Falses.")
@@ -0,0 +1,35 @@
+from __future__ import annotations
+from typing import Optional, Union, List, Dict
+from pydantic import Field
+
+from app.schemas.base_schema import BaseSchema
+
+
+class ColumnValueCount(BaseSchema):
+    value: Union[bool, int, float, str] = Field(..., description="A value in the column.")
+    count: int = Field(..., description="Rows with the value.")
+
+
+class ColumnHistogram(BaseSchema):
+    edges: List[float] = Field(default=[], description="Bin edges, one more than the number of bins.")
+    counts: List[int] = Field(default=[], description="Rows in each bin.")
+
+
+class ColumnStatistics(BaseSchema):
+    name: str = Field(..., description="Column name.")
+    dtype: str = Field(..., description="Column data type, as read.")
+    count: int = Field(default=0, description="Rows in the column.")
+    nullCount: int = Field(default=0, description="Rows without a value.")
+    distinct: int = Field(default=0, description="Distinct values in the column.")
+    top: List[ColumnValueCount] = Field(default=[], description="Most frequent values, most frequent first.")
+    categories: Optional[List[Union[bool, int, float, str]]] = Field(
+        None,
+        description="Every distinct value, in order of appearance, if there are few enough to be categories.",
+    )
+    minimum: Optional[Union[int, float, str]] = Field(None, description="Least value, for numbers and dates.")
+    maximum: Optional[Union[int, float, str]] = Field(None, description="Greatest value, for numbers and dates.")
+    typeConfidence: Dict[str, float] = Field(
+        default={},
+        description="Share of values, from 0 to 1, which can be read as `integer`, `number`, `boolean` or `datetime`.",
+    )
+    histogram: Optional[ColumnHistogram] = Field(None, description="Distribution of values, for numbers.")
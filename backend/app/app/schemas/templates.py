@@ -28,6 +28,9 @@ class DataSourceTemplateModel(BaseSchema):
         None, description="Full path to valid source data file."
     )
     mime: Optional[MimeType] = Field(None, description="Mime type for source data. Automatically generated.")
+    checksum: Optional[str] = Field(
+        None, description="Blake2b checksum of the stored source file. Used as its content address. Automatically generated."
+    )
     header: Optional[Union[int, List[int]]] = Field(
         0, description="Row (0-indexed) to use for the column labels of the parsed DataFrame. "
     )
@@ -0,0 +1,50 @@
+from __future__ import annotations
+from typing import Optional
+from pydantic import ConfigDict, Field
+from uuid import UUID
+from datetime import datetime
+
+from app.schema_types import MimeType
+from app.schemas.base_schema import BaseSchema
+from app.schemas.templates import DataSourceTemplateModel
+
+
+class UploadSessionBase(BaseSchema):
+    size: int = Field(..., description="Total size of the source file, in bytes.")
+    checksum: Optional[str] = Field(
+        None, description="Blake2b hex digest of the complete source file. May instead be given on finalize."
+    )
+    sourceURL: Optional[str] = Field(None, description="Original location of the source, if any.")
+
+
+class UploadSessionCreate(UploadSessionBase):
+    datasource: DataSourceTemplateModel = Field(..., description="Data source definition for the upload.")
+    task_id: Optional[UUID] = Field(None, description="Task for which the source is being uploaded.")
+
+
+class UploadSessionUpdate(UploadSessionBase):
+    pass
+
+
+class UploadSession(UploadSessionBase):
+    id: UUID = Field(..., description="Automatically generated unique identity for the upload session.")
+    created: datetime = Field(..., description="Automatically generated date upload session was created.")
+    mimeType: MimeType = Field(..., alias="mime_type", description="Mime type of the source file.")
+    received: int = Field(default=0, description="Bytes received so far.")
+    missing: list[list[int]] = Field(
+        default=[], description="Byte ranges, as [start, end), which still need to be uploaded."
+    )
+    chunkSize: int = Field(..., description="Largest accepted chunk, in bytes.")
+    model_config = ConfigDict(populate_by_name=True, from_attributes=True)
+
+
+class PresignedUpload(BaseSchema):
+    id: UUID = Field(..., description="Upload session, to be completed once the source has been uploaded.")
+    url: str = Field(..., description="Presigned URL to which the source file is `POST`ed as `multipart/form-data`.")
+    fields: dict[str, str] = Field(default={}, description="Form fields to send, before the `file`, with the upload.")
+    expires: int = Field(..., description="Seconds for which the URL is valid.")
+
+
+class PresignedDownload(BaseSchema):
+    url: str = Field(..., description="Presigned URL from which the source file is downloaded with a `GET`.")
+    expires: int = Field(..., description="Seconds for which the URL is valid.")
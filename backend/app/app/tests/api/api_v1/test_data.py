@@ -0,0 +1,90 @@
+import hashlib
+import shutil
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.models.user import User
+from app.tests.utils.reference import create_random_crosswalk_resource, import_random_source
+
+
+def test_upload_too_large_has_cors_headers(client: TestClient) -> None:
+    origin = str(settings.BACKEND_CORS_ORIGINS[0])
+    headers = {"Origin": origin, "Content-Length": str(settings.UPLOAD_MAX_BYTES + 1)}
+    r = client.post(f"{settings.API_V1_STR}/data/upload/", headers=headers, content=b"")
+    assert r.status_code == 413
+    assert r.headers["access-control-allow-origin"] == origin
+
+
+def test_presigned_download(client: TestClient, db: Session, current_user: User) -> None:
+    resource_obj = import_random_source(db, user=current_user)
+    r = client.get(f"{settings.API_V1_STR}/data/download/presigned/{resource_obj.data_id}")
+    assert r.status_code == 200
+    response = r.json()
+    assert set(response) == {"url", "expires"}
+    assert response["expires"] == settings.PRESIGNED_EXPIRE_SECONDS
+    r = client.get(response["url"])
+    assert r.status_code == 200
+    assert r.content.startswith(b"ident,name,value\n")
+
+
+def test_download_source_range_and_etag(client: TestClient, db: Session, current_user: User) -> None:
+    resource_obj = import_random_source(db, user=current_user)
+    url = f"{settings.API_V1_STR}/data/download/source/{resource_obj.data_id}"
+    r = client.get(url)
+    assert r.status_code == 200
+    content = r.content
+    assert content.startswith(b"ident,name,value\n")
+    assert r.headers["content-length"] == str(len(content))
+    etag = r.headers["etag"]
+    assert etag == f'"{resource_obj.datasource.hash}"'
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    r = client.get(url, headers={"Range": "bytes=6-9"})
+    assert r.status_code == 206
+    assert r.content == content[6:10]
+    assert r.headers["content-range"] == f"bytes 6-9/{len(content)}"
+    r = client.get(url, headers={"Range": "bytes=-5"})
+    assert r.status_code == 206
+    assert r.content == content[-5:]
+    # A stale `If-Range` sends the whole
+    r = client.get(url, headers={"Range": "bytes=6-9", "If-Range": '"stale"'})
+    assert r.status_code == 200
+    assert r.content == content
+    r = client.get(url, headers={"Range": f"bytes={len(content)}-"})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == f"bytes */{len(content)}"
+
+
+def test_download_source_etag_without_hash(client: TestClient, db: Session, current_user: User) -> None:
+    # Transform outputs are stored by UUID, without a reference hash
+    resource_obj = import_random_source(db, user=current_user)
+    reference_obj = resource_obj.datasource
+    model_obj = crud.reference.get_model(db_obj=reference_obj)
+    mimetype = crud.files.reader.get_mimetype(mimetype=model_obj.mime)
+    source = crud.files.get_source_path(obj_id=model_obj.uuid, mimetype=mimetype, checksum=reference_obj.hash)
+    shutil.copy(source, crud.files.get_source_path(obj_id=model_obj.uuid, mimetype=mimetype))
+    reference_obj.hash = None
+    db.commit()
+    r = client.get(f"{settings.API_V1_STR}/data/download/source/{resource_obj.data_id}")
+    assert r.status_code == 200
+    assert model_obj.checksum
+    assert r.headers["etag"] == f'"{model_obj.checksum}"'
+
+
+def test_download_transform_output_etag(client: TestClient, db: Session, current_user: User) -> None:
+    resource_obj = create_random_crosswalk_resource(db, user=current_user)
+    assert crud.reference.perform_transform(db=db, resource_obj=resource_obj, user=current_user)
+    db.refresh(resource_obj)
+    url = f"{settings.API_V1_STR}/data/download/source/{resource_obj.transformdata_id}"
+    r = client.get(url)
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert etag == f'"{hashlib.blake2b(r.content).hexdigest()}"'
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    r = client.get(url, headers={"Range": "bytes=0-3", "If-Range": etag})
+    assert r.status_code == 206
+    assert len(r.content) == 4
@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.models.user import User
+from app.schema_types import ReferenceType
+from app.tests.utils.reference import create_random_crosswalk_resource
+
+
+def test_transform_profile(client: TestClient, db: Session, current_user: User) -> None:
+    resource_obj = create_random_crosswalk_resource(db, user=current_user, rows=25)
+    crosswalk_dfn = crud.reference.get_crosswalk_definition(db_obj=resource_obj, refresh_schema=True)
+    crosswalk_dfn.actions.add_multi(terms=[f"RENAME > '{name}' < ['{name}']" for name in ["ident", "name", "value"]])
+    crud.files.create_or_update(user=current_user, obj_in=crosswalk_dfn.get, obj_type=ReferenceType.CROSSWALK)
+    url = f"{settings.API_V1_STR}/resource/{resource_obj.id}/transform/profile"
+    assert crud.reference.perform_transform(db=db, resource_obj=resource_obj, user=current_user)
+    db.refresh(resource_obj)
+    r = client.get(url)
+    assert r.status_code == 200
+    assert r.json() == []
+    # A profiled run is never reused
+    transform_id = resource_obj.transform_id
+    assert crud.reference.perform_transform(db=db, resource_obj=resource_obj, user=current_user, profile=True)
+    db.refresh(resource_obj)
+    assert resource_obj.transform_id != transform_id
+    r = client.get(url)
+    assert r.status_code == 200
+    profile = r.json()
+    assert [action["action"] for action in profile] == ["RENAME"] * 3
+    assert all(action["rowsIn"] == action["rowsOut"] == 25 for action in profile)
+    assert all(action["seconds"] >= 0 and action["peakMemory"] >= 0 for action in profile)
@@ -0,0 +1,137 @@
+import base64
+import hashlib
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.activity import Activity
+from app.models.upload import UploadChunk, UploadSession
+from app.models.user import User
+from app.tests.utils.reference import get_random_source
+from app.tests.utils.task import create_random_task
+from app.tests.utils.utils import random_lower_string
+from app.worker import process_upload_import
+
+
+@pytest.fixture
+def sent_tasks(monkeypatch) -> list:
+    # Tasks sent to the worker, rather than the queue
+    tasks = []
+    monkeypatch.setattr(celery_app, "send_task", lambda name, args: tasks.append((name, args)))
+    return tasks
+
+
+def start_upload(client: TestClient, *, source: bytes, task_id: str | None = None, **kwargs) -> dict:
+    obj_in = {
+        "size": len(source),
+        "datasource": {"name": f"{random_lower_string()}.csv", "mime": "text/csv"},
+        "task_id": task_id,
+        **kwargs,
+    }
+    r = client.post(f"{settings.API_V1_STR}/data/upload/session", json=obj_in)
+    assert r.status_code == 200
+    return r.json()
+
+
+def put_chunk(client: TestClient, *, upload_id: str, offset: int, data: bytes):
+    return client.put(
+        f"{settings.API_V1_STR}/data/upload/session/{upload_id}",
+        params={"offset": offset},
+        content=data,
+        headers={"Content-Type": "application/octet-stream"},
+    )
+
+
+def test_upload_session_resume(client: TestClient, db: Session, current_user: User, sent_tasks: list) -> None:
+    task = create_random_task(db, user=current_user)
+    source = base64.b64decode(get_random_source(rows=100))
+    checksum = hashlib.blake2b(source).hexdigest()
+    upload_id = start_upload(client, source=source, task_id=str(task.id))["id"]
+    half = len(source) // 2
+    r = put_chunk(client, upload_id=upload_id, offset=half, data=source[half:])
+    assert r.status_code == 200
+    assert r.json()["missing"] == [[0, half]]
+    # Resume from the status, resending the first chunk
+    r = client.get(f"{settings.API_V1_STR}/data/upload/session/{upload_id}")
+    assert r.json()["received"] == len(source) - half
+    for _ in range(2):
+        r = put_chunk(client, upload_id=upload_id, offset=0, data=source[:half])
+        assert r.status_code == 200
+    assert r.json()["missing"] == []
+    assert db.query(UploadChunk).filter(UploadChunk.session_id == upload_id).count() == 2
+    # Finalized in the worker
+    r = client.post(f"{settings.API_V1_STR}/data/upload/session/{upload_id}/finalize", params={"checksum": checksum})
+    assert r.status_code == 202
+    assert sent_tasks == [("app.worker.process_upload_import", [current_user.id, upload_id, checksum])]
+    assert process_upload_import(*sent_tasks[0][1]).startswith("Process upload import complete")
+    assert not db.get(UploadSession, upload_id)
+    resource_obj = crud.resource.get_multi(db=db, user=current_user, task_obj=task)[0]
+    assert resource_obj.datasource.hash == checksum
+
+
+def test_upload_session_checksum_mismatch(
+    client: TestClient, db: Session, current_user: User, sent_tasks: list
+) -> None:
+    source = base64.b64decode(get_random_source())
+    upload_id = start_upload(client, source=source)["id"]
+    r = client.post(f"{settings.API_V1_STR}/data/upload/session/{upload_id}/finalize", params={"checksum": "abc"})
+    assert r.status_code == 400
+    assert r.json()["detail"].startswith("Upload is incomplete.")
+    put_chunk(client, upload_id=upload_id, offset=0, data=source)
+    r = client.post(f"{settings.API_V1_STR}/data/upload/session/{upload_id}/finalize")
+    assert r.status_code == 400
+    assert r.json()["detail"] == "A checksum is required to finalize the upload."
+    r = client.post(f"{settings.API_V1_STR}/data/upload/session/{upload_id}/finalize", params={"checksum": "abc"})
+    assert r.status_code == 202
+    assert process_upload_import(*sent_tasks[0][1]).startswith("Process upload import rejected")
+    activity_obj = (
+        db.query(Activity).filter(Activity.researcher_id == current_user.id).order_by(Activity.created.desc()).first()
+    )
+    assert activity_obj.alert
+    assert "Upload checksum does not match." in activity_obj.message
+    # The session is kept, so that chunks can be resent
+    db.expire_all()
+    assert db.get(UploadSession, upload_id)
+    assert crud.files.get_upload_path(upload_id=upload_id).exists()
+
+
+def test_upload_session_expired(client: TestClient, db: Session, current_user: User) -> None:
+    source = base64.b64decode(get_random_source())
+    upload_id = start_upload(client, source=source)["id"]
+    crud.files.get_upload_path(upload_id=upload_id).unlink()
+    r = put_chunk(client, upload_id=upload_id, offset=0, data=source)
+    assert r.status_code == 410
+    db.expire_all()
+    assert not db.get(UploadSession, upload_id)
+
+
+def test_upload_chunk_concurrent_resend(client: TestClient, db: Session, current_user: User) -> None:
+    source = base64.b64decode(get_random_source())
+    upload_id = start_upload(client, source=source)["id"]
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def resend() -> None:
+        session = SessionLocal()
+        try:
+            db_obj = session.get(UploadSession, upload_id)
+            barrier.wait()
+            crud.upload.write_chunk(db=session, db_obj=db_obj, offset=0, data=source)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=resend) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert db.query(UploadChunk).filter(UploadChunk.session_id == upload_id).count() == 1
@@ -1,13 +1,17 @@
-from typing import Dict, Generator
+from contextlib import contextmanager
+from typing import Callable, Dict, Generator, List
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
+from app.api import deps
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.main import app
-from app.tests.utils.user import authentication_token_from_email
+from app.models.user import User
+from app.tests.utils.user import authentication_token_from_email, create_random_user
 from app.tests.utils.utils import get_superuser_token_headers
 
 
@@ -16,12 +20,44 @@ def db() -> Generator:
     yield SessionLocal()
 
 
+@pytest.fixture
+def count_statements(db: Session) -> Callable:
+    # Records every SQL statement sent on the session's engine within the context, so that the number of queries made
+    # by a call can be asserted
+    @contextmanager
+    def counter() -> Generator[List[str], None, None]:
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany) -> None:
+            statements.append(statement)
+
+        engine = db.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return counter
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator:
     with TestClient(app) as c:
         yield c
 
 
+@pytest.fixture
+def current_user(db: Session) -> Generator[User, None, None]:
+    # A new user, authenticated (and subscribed) for every request made with `client`, without the login flow
+    user = create_random_user(db)
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    app.dependency_overrides[deps.get_subscribed_user] = lambda: user
+    yield user
+    app.dependency_overrides.pop(deps.get_current_active_user, None)
+    app.dependency_overrides.pop(deps.get_subscribed_user, None)
+
+
 @pytest.fixture(scope="module")
 def superuser_token_headers(client: TestClient) -> Dict[str, str]:
     return get_superuser_token_headers(client)
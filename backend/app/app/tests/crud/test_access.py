@@ -0,0 +1,147 @@
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.db.session import SessionLocal
+from app.models.access import ReferenceAccess
+from app.models.role import Role
+from app.models.user import User
+from app.schema_types import ReferenceType, RoleType
+from app.tests.utils.project import create_random_project
+from app.tests.utils.reference import create_random_reference
+from app.tests.utils.resource import create_random_resource
+from app.tests.utils.task import create_random_task
+from app.tests.utils.user import create_random_user
+
+
+def get_access(db: Session, *, user: User) -> dict:
+    # Materialised access, after checking it matches every role path
+    assert crud.reference.check_access(db=db, user=user) == []
+    db_objs = db.query(ReferenceAccess).filter(ReferenceAccess.user_id == user.id).all()
+    return {db_obj.reference_id: db_obj.max_responsibility for db_obj in db_objs}
+
+
+def test_access_follows_resource_links(db: Session) -> None:
+    user = create_random_user(db)
+    task = create_random_task(db, user=user)
+    db_obj = create_random_resource(db, user=user, task=task)
+    seeker = create_random_user(db)
+    crud.role.create(db=db, user=seeker, db_obj=task, is_validated=True)
+    reference_obj = create_random_reference(db)
+    assert get_access(db, user=seeker) == {}
+    db_obj.data_id = reference_obj.id
+    db.commit()
+    assert get_access(db, user=seeker) == {reference_obj.id: RoleType.SEEKER}
+    assert get_access(db, user=user) == {reference_obj.id: RoleType.CUSTODIAN}
+    db_obj.data_id = None
+    db_obj.crosswalk = reference_obj
+    db.commit()
+    assert get_access(db, user=seeker) == {reference_obj.id: RoleType.SEEKER}
+    db_obj.crosswalk = None
+    db.commit()
+    assert get_access(db, user=seeker) == {}
+    assert get_access(db, user=user) == {}
+
+
+def test_access_follows_role_changes(db: Session) -> None:
+    user = create_random_user(db)
+    reference_obj = create_random_reference(db)
+    db_obj = create_random_resource(db, user=user)
+    db_obj.schema_subject_id = reference_obj.id
+    db.commit()
+    seeker = create_random_user(db)
+    role_obj = crud.role.create(db=db, user=seeker, db_obj=db_obj)
+    assert get_access(db, user=seeker) == {}
+    role_obj.is_validated = True
+    db.commit()
+    assert get_access(db, user=seeker) == {reference_obj.id: RoleType.SEEKER}
+    role_obj.responsibility = RoleType.CURATOR
+    db.commit()
+    assert get_access(db, user=seeker) == {reference_obj.id: RoleType.CURATOR}
+    # A higher responsibility by another path wins
+    direct_role_obj = crud.role.create(
+        db=db, user=seeker, responsibility=RoleType.CUSTODIAN, db_obj=reference_obj, is_validated=True
+    )
+    assert get_access(db, user=seeker) == {reference_obj.id: RoleType.CUSTODIAN}
+    db.delete(direct_role_obj)
+    db.commit()
+    assert get_access(db, user=seeker) == {reference_obj.id: RoleType.CURATOR}
+    db.delete(db.get(Role, role_obj.id))
+    db.commit()
+    assert get_access(db, user=seeker) == {}
+
+
+def test_access_follows_task_and_project_links(db: Session) -> None:
+    user = create_random_user(db)
+    project = create_random_project(db, user=user)
+    other_project = create_random_project(db, user=user)
+    task = create_random_task(db, user=user, project=project)
+    other_task = create_random_task(db, user=user, project=project)
+    reference_obj = create_random_reference(db)
+    db_obj = create_random_resource(db, user=user, task=task)
+    db_obj.transform_id = reference_obj.id
+    db.commit()
+    seeker = create_random_user(db)
+    crud.role.create(db=db, user=seeker, db_obj=other_project, is_validated=True)
+    assert get_access(db, user=seeker) == {}
+    # Moving the task into the seeker's project grants access, and moving the resource out revokes it
+    task.project_id = other_project.id
+    db.commit()
+    assert get_access(db, user=seeker) == {reference_obj.id: RoleType.SEEKER}
+    db_obj.task_id = other_task.id
+    db.commit()
+    assert get_access(db, user=seeker) == {}
+    # Schema of a task, or of a project
+    schema_obj = create_random_reference(db, model_type=ReferenceType.SCHEMA)
+    other_project.schema_id = schema_obj.id
+    db.commit()
+    assert get_access(db, user=seeker) == {schema_obj.id: RoleType.SEEKER}
+    other_project.schema_id = None
+    task.schema_id = schema_obj.id
+    db.commit()
+    assert get_access(db, user=seeker) == {}
+    crud.role.create(db=db, user=seeker, responsibility=RoleType.WRANGLER, db_obj=task, is_validated=True)
+    assert get_access(db, user=seeker) == {schema_obj.id: RoleType.WRANGLER}
+    task.schema_id = None
+    db_obj.task_id = task.id
+    db.commit()
+    assert get_access(db, user=seeker) == {reference_obj.id: RoleType.WRANGLER}
+    task.schema_id = schema_obj.id
+    db.commit()
+    assert get_access(db, user=seeker) == {reference_obj.id: RoleType.WRANGLER, schema_obj.id: RoleType.WRANGLER}
+    db.delete(task)
+    db.commit()
+    assert get_access(db, user=seeker) == {}
+
+
+def test_concurrent_refresh(db: Session) -> None:
+    # Two sessions refreshing the same reference at once: the second waits on the first's rows, then replaces them
+    user = create_random_user(db)
+    reference_obj = create_random_reference(db)
+    db_obj = create_random_resource(db, user=user)
+    db_obj.data_id = reference_obj.id
+    db.commit()
+    errors = []
+
+    def refresh() -> None:
+        session = SessionLocal()
+        try:
+            crud.access.refresh(session.connection(), reference_ids={reference_obj.id})
+            session.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    session = SessionLocal()
+    crud.access.refresh(session.connection(), reference_ids={reference_obj.id})
+    thread = threading.Thread(target=refresh)
+    thread.start()
+    time.sleep(0.5)
+    session.commit()
+    session.close()
+    thread.join()
+    assert errors == []
+    assert get_access(db, user=user) == {reference_obj.id: RoleType.CUSTODIAN}
@@ -0,0 +1,26 @@
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.tests.utils.resource import create_random_resource
+from app.tests.utils.task import create_random_task
+from app.tests.utils.user import create_random_user
+
+
+def test_create_activity_moves_latest_activity(db: Session) -> None:
+    user = create_random_user(db)
+    task = create_random_task(db, user=user)
+    db_objs = [create_random_resource(db, user=user, task=task) for _ in range(3)]
+    resources = crud.resource.get_multi(db=db, user=user, task_obj=task)
+    assert [db_obj.id for db_obj in resources] == [db_obj.id for db_obj in reversed(db_objs)]
+    activity_obj = crud.activity.create(
+        db=db, obj_in={"message": "Updated.", "researcher_id": user.id, "resource_id": db_objs[0].id}
+    )
+    db.refresh(db_objs[0])
+    assert db_objs[0].latest_activity_at == activity_obj.created
+    assert db_objs[0].latest_activity.id == activity_obj.id
+    resources = crud.resource.get_multi(db=db, user=user, task_obj=task)
+    assert [db_obj.id for db_obj in resources] == [db_objs[0].id, db_objs[2].id, db_objs[1].id]
+    # Activities without a resource leave resources alone
+    crud.activity.create(db=db, obj_in={"message": "Updated.", "researcher_id": user.id, "task_id": task.id})
+    resources = crud.resource.get_multi(db=db, user=user, task_obj=task)
+    assert [db_obj.id for db_obj in resources] == [db_objs[0].id, db_objs[2].id, db_objs[1].id]
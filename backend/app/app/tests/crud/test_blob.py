@@ -0,0 +1,103 @@
+import hashlib
+import os
+import threading
+import time
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.db.session import SessionLocal
+from app.models.blob import Blob
+from app.schema_types import MimeType
+from app.schemas.templates import DataSourceTemplateModel
+from app.tests.utils.utils import random_lower_string
+
+
+def get_random_checksum() -> str:
+    return hashlib.blake2b(random_lower_string().encode("utf-8")).hexdigest()
+
+
+def write_blob(*, checksum: str, age: int = 0) -> str:
+    obj_name = f"{checksum}.CSV"
+    source_path = crud.files.directory / obj_name
+    source_path.write_bytes(b"ident,name\n")
+    modified = time.time() - age
+    os.utime(source_path, (modified, modified))
+    return obj_name
+
+
+def test_blob_link_and_unlink(db: Session) -> None:
+    checksum = get_random_checksum()
+    model_ids = [uuid4(), uuid4()]
+    for model_id in model_ids:
+        db_obj = crud.blob.link(db=db, model_id=model_id, checksum=checksum, mime_type=MimeType.CSV, size=11)
+    assert db_obj.refcount == 2
+    # Only flushed, so the caller's unit of work decides
+    db.rollback()
+    assert not crud.blob.get_by_checksum(db=db, checksum=checksum)
+    for model_id in model_ids:
+        crud.blob.link(db=db, model_id=model_id, checksum=checksum, mime_type=MimeType.CSV, size=11)
+    # Linking the same model again changes nothing
+    assert crud.blob.link(db=db, model_id=model_ids[0], checksum=checksum, mime_type=MimeType.CSV).refcount == 2
+    db.commit()
+    assert crud.blob.unlink(db=db, model_id=model_ids[0]) is None
+    assert crud.blob.get_by_checksum(db=db, checksum=checksum).refcount == 1
+    db_obj = crud.blob.unlink(db=db, model_id=model_ids[1])
+    assert db_obj.checksum == checksum
+    db.commit()
+    assert not crud.blob.get_by_checksum(db=db, checksum=checksum)
+    assert crud.blob.unlink(db=db, model_id=model_ids[1]) is None
+
+
+def test_blob_concurrent_link(db: Session) -> None:
+    checksum = get_random_checksum()
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def link() -> None:
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            crud.blob.link(db=session, model_id=uuid4(), checksum=checksum, mime_type=MimeType.CSV)
+            session.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=link) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    db_obj = crud.blob.get_by_checksum(db=db, checksum=checksum)
+    db.refresh(db_obj)
+    assert db_obj.refcount == db_obj.links.count() == 8
+
+
+def test_blob_collect(db: Session) -> None:
+    linked = get_random_checksum()
+    crud.blob.link(db=db, model_id=uuid4(), checksum=linked, mime_type=MimeType.CSV)
+    db.commit()
+    linked_name = write_blob(checksum=linked, age=7200)
+    orphan_name = write_blob(checksum=get_random_checksum(), age=7200)
+    recent_name = write_blob(checksum=get_random_checksum())
+    assert crud.blob.collect(db=db, delay=3600) >= 1
+    assert (crud.files.directory / linked_name).exists()
+    assert not (crud.files.directory / orphan_name).exists()
+    # Bytes an import in flight may be about to link
+    assert (crud.files.directory / recent_name).exists()
+    (crud.files.directory / recent_name).unlink()
+
+
+def test_discard_source_keeps_blob_bytes(db: Session) -> None:
+    # A rejected import may share its bytes with another in flight, which has not linked them yet
+    checksum = get_random_checksum()
+    obj_name = write_blob(checksum=checksum)
+    datasource_in = DataSourceTemplateModel(name="source.csv", mime=MimeType.CSV, checksum=checksum)
+    crud.reference.discard_source(db=db, datasource_in=datasource_in)
+    assert (crud.files.directory / obj_name).exists()
+    (crud.files.directory / obj_name).unlink()
+    assert not db.query(Blob).filter(Blob.checksum == checksum).first()
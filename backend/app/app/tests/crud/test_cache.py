@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.crud.crud_cache import CRUDCache
+from app.crud.crud_spaces import spaces
+
+
+@pytest.fixture
+def cache(tmp_path: Path, monkeypatch) -> CRUDCache:
+    monkeypatch.setattr(settings, "CACHE_STATS_INTERVAL", 0)
+    return CRUDCache(directory=tmp_path, max_bytes=25)
+
+
+def add_entry(cache: CRUDCache, *, filename: str, age: int = 3600) -> Path:
+    source_path = cache.directory / filename
+    source_path.write_bytes(b"0123456789")
+    os.utime(source_path, (time.time() - age, time.time() - age))
+    return source_path
+
+
+def test_cache_evicts_least_recently_used(cache: CRUDCache) -> None:
+    cache.grace = 0
+    paths = [add_entry(cache, filename=filename, age=age) for filename, age in [("a", 300), ("b", 200), ("c", 100)]]
+    # A hit makes the oldest the most recent
+    assert cache.get(filename="a") == paths[0]
+    assert cache.evict() == 1
+    assert [p.exists() for p in paths] == [True, False, True]
+    # `keep` is never evicted, even when the oldest
+    os.utime(paths[0], (0, 0))
+    assert cache.evict(keep="a", max_bytes=10) == 1
+    assert [p.exists() for p in paths] == [True, False, False]
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["evictions"], stats["evicted_bytes"]) == (1, 2, 20)
+    assert (stats["files"], stats["size"]) == (1, 10)
+
+
+def test_cache_keeps_pinned_and_recent_entries(cache: CRUDCache) -> None:
+    cache.grace = 0
+    pinned_path = add_entry(cache, filename="a")
+    other_path = add_entry(cache, filename="b")
+    with cache.pin(filename="a") as source_path:
+        assert source_path == pinned_path
+        os.utime(pinned_path, (0, 0))
+        assert cache.evict(max_bytes=0) == 1
+        assert pinned_path.exists()
+        assert not other_path.exists()
+    assert cache.evict(max_bytes=0) == 1
+    assert not pinned_path.exists()
+    # A path just returned by `get` may not be open yet
+    cache.grace = 60
+    recent_path = add_entry(cache, filename="c")
+    assert cache.get(filename="c") == recent_path
+    assert cache.evict(max_bytes=0) == 0
+    assert recent_path.exists()
+    # Only the single eviction lock is left behind
+    assert [p.name for p in cache.locks.iterdir()] == ["__evict__.lock"]
+
+
+def test_cache_fills_once_and_removes_locks(cache: CRUDCache, monkeypatch) -> None:
+    downloads = []
+
+    def download_file(*, filename: str, folder_id=None, source_path: str) -> bool:
+        downloads.append(filename)
+        time.sleep(0.1)
+        Path(source_path).write_bytes(b"0123456789")
+        return True
+
+    monkeypatch.setattr(spaces, "download_file", download_file)
+    paths = []
+    threads = [threading.Thread(target=lambda: paths.append(cache.get(filename="a"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert downloads == ["a"]
+    assert paths == [cache.directory / "a"] * 4
+    assert [p.name for p in cache.locks.iterdir()] == ["__evict__.lock"]
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["downloaded_bytes"]) == (3, 1, 10)
+
+
+def record_hits(cache: CRUDCache) -> None:
+    cache._record(hits=2)
+
+
+def test_cache_stats_per_process(cache: CRUDCache) -> None:
+    add_entry(cache, filename="a")
+    cache.get(filename="a")
+    process = multiprocessing.get_context("fork").Process(target=record_hits, args=(cache,))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+    assert len(list(cache.stats.glob("*.json"))) == 2
+    assert cache.get_stats()["hits"] == 3
@@ -0,0 +1,74 @@
+import base64
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.models.resource import Resource
+from app.schema_types import StateType
+from app.tests.utils.resource import create_random_resource
+from app.tests.utils.task import create_random_task
+from app.tests.utils.user import create_random_user
+
+
+def test_cursor_round_trip() -> None:
+    keys = [(Resource.latest_activity_at, True), (Resource.state, False), (Resource.title, False), (Resource.id, False)]
+    values = [datetime.now(timezone.utc), StateType.READY, "title", uuid4()]
+    assert crud.cursor.decode(cursor=crud.cursor.encode(values=values), keys=keys) == values
+    values = [None, StateType.COMPLETE, None, uuid4()]
+    assert crud.cursor.decode(cursor=crud.cursor.encode(values=values), keys=keys) == values
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        base64.urlsafe_b64encode(b"\xff\xfe").decode("utf-8"),
+        base64.urlsafe_b64encode(b'{"id": 1}').decode("utf-8"),
+        crud.cursor.encode(values=["title"]),
+        crud.cursor.encode(values=["title", "not a uuid"]),
+    ],
+)
+def test_cursor_invalid(cursor: str) -> None:
+    keys = [(Resource.title, False), (Resource.id, False)]
+    with pytest.raises(ValueError):
+        crud.cursor.decode(cursor=cursor, keys=keys)
+
+
+@pytest.mark.parametrize("prioritised", [True, False])
+def test_cursor_pages_match_full_sort(db: Session, monkeypatch: pytest.MonkeyPatch, prioritised: bool) -> None:
+    # Mixed sort directions, with ties and nulls in the nullable keys
+    user = create_random_user(db)
+    task = create_random_task(db, user=user)
+    latest = datetime.now(timezone.utc)
+    for title, latest_activity_at in [
+        ("a", latest),
+        ("a", latest),
+        ("b", latest),
+        ("b", None),
+        (None, latest - timedelta(days=1)),
+        (None, None),
+        ("c", None),
+    ]:
+        db_obj = create_random_resource(db, user=user, task=task)
+        db_obj.title = title
+        db_obj.latest_activity_at = latest_activity_at
+        db.add(db_obj)
+    db.commit()
+    keys = crud.resource._get_sort_keys(prioritised=prioritised)
+    db_query = db.query(Resource).filter(Resource.task_id == task.id)
+    expected = [db_obj.id for db_obj in crud.cursor.get_page(db_query, keys=keys, page_break=True).all()]
+    monkeypatch.setattr(settings, "MULTI_MAX", 2)
+    db_objs = []
+    cursor = None
+    while True:
+        page = crud.cursor.get_page(db_query, keys=keys, cursor=cursor).all()
+        db_objs.extend(page)
+        cursor = crud.cursor.get_next(db=db, db_objs=page, keys=keys)
+        if not cursor:
+            break
+    assert len(expected) == 7
+    assert [db_obj.id for db_obj in db_objs] == expected
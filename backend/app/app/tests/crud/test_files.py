@@ -0,0 +1,98 @@
+import pandas as pd
+import pytest
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+import whyqd as qd
+from whyqd.models import SchemaModel
+
+from app import crud
+from app.core.config import settings
+from app.crud.crud_cache import ModelCache
+from app.crud.crud_files import CRUDFiles
+from app.schema_types import MimeType, ReferenceType
+from app.tests.utils.reference import create_random_crosswalk_resource
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+class Item(BaseModel):
+    name: str
+
+
+def test_model_cache_copies_and_versions() -> None:
+    models = ModelCache(max_size=2, ttl=300)
+    version = models.version
+    models.set("a", Item(name="a"), version=version)
+    cached = models.get("a")
+    cached.name = "changed"
+    assert models.get("a").name == "a"
+    # A load which started before an invalidation is not cached
+    models.invalidate(lambda key: key == "a")
+    models.set("a", Item(name="stale"), version=version)
+    assert models.get("a") is None
+    version = models.version
+    for key in ["a", "b", "c"]:
+        models.set(key, Item(name=key), version=version)
+    assert models.get("a") is None
+    assert (models.misses, models.hits) == (2, 2)
+
+
+def test_model_cache_invalidated_across_processes(db: Session) -> None:
+    user = create_random_user(db)
+    # A second instance, with its own in-process cache, stands in for a worker process
+    other_files = CRUDFiles()
+    schema_in = SchemaModel(name=random_lower_string(), description="Initial.")
+    crud.files.create_or_update(user=user, obj_in=schema_in, obj_type=ReferenceType.SCHEMA)
+    assert other_files.get(obj_id=schema_in.uuid, obj_type=ReferenceType.SCHEMA).description == "Initial."
+    assert crud.files.get(obj_id=schema_in.uuid, obj_type=ReferenceType.SCHEMA).description == "Initial."
+    schema_in.description = "Updated."
+    other_files.create_or_update(user=user, obj_in=schema_in, obj_type=ReferenceType.SCHEMA)
+    assert crud.files.get(obj_id=schema_in.uuid, obj_type=ReferenceType.SCHEMA).description == "Updated."
+
+
+@pytest.mark.parametrize("mimetype", [MimeType.CSV, MimeType.PARQUET])
+def test_import_transform_single_pass(mimetype: MimeType, monkeypatch) -> None:
+    df = pd.DataFrame({"ident": range(50), "name": [random_lower_string() for _ in range(50)]})
+
+    def get(*args, **kwargs) -> None:
+        raise AssertionError("Transform output read back.")
+
+    monkeypatch.setattr(crud.files.reader, "get", get)
+    datasource_in, data_in, summary = crud.files.import_transform(data=df, mimetype=mimetype)
+    source_path = crud.files.get_source_path(obj_id=datasource_in.uuid, mimetype=mimetype)
+    # A single file, even for Parquet
+    assert source_path.is_file()
+    assert datasource_in.checksum == crud.files.get_source_checksum(source=source_path)[0]
+    assert data_in.index == 50
+    assert [c.name for c in data_in.columns] == ["ident", "name"]
+    assert data_in.checksum
+    assert summary
+    crud.files.delete_source(obj_id=datasource_in.uuid, mimetype=mimetype)
+
+
+@pytest.mark.parametrize("mimetype", [MimeType.CSV, MimeType.PARQUET])
+def test_stream_transform_matches_in_memory(db: Session, mimetype: MimeType, monkeypatch) -> None:
+    user = create_random_user(db)
+    resource_obj = create_random_crosswalk_resource(db, user=user, rows=25)
+    crosswalk_in = crud.files.get(obj_id=resource_obj.crosswalk.model, obj_type=resource_obj.crosswalk.model_type)
+    data_in = crud.reference.get_data_model(resource_obj=resource_obj)
+    transform = qd.TransformDefinition(crosswalk=crosswalk_in, data_source=data_in)
+    assert not crud.files.is_streamable(transform=transform, mimetype=mimetype)
+    # Three partitions
+    monkeypatch.setattr(settings, "WHYQD_STREAM_ROWS", 10)
+    assert crud.files.is_streamable(transform=transform, mimetype=mimetype)
+    profile = []
+    datasource_in, streamed_in, summary = crud.files.stream_transform(
+        transform=transform, mimetype=mimetype, profile=profile
+    )
+    assert streamed_in.index == 25
+    assert datasource_in.checksum == streamed_in.checksum
+    assert all(action["rowsIn"] == 25 for action in profile)
+    source_path = crud.files.get_source_path(obj_id=datasource_in.uuid, mimetype=mimetype)
+    streamed = crud.files.reader.get(source=source_path, mimetype=mimetype)
+    transform = qd.TransformDefinition(crosswalk=crosswalk_in, data_source=data_in)
+    transform.process()
+    df = transform.data
+    assert [c.name for c in streamed_in.columns] == list(df.columns)
+    assert streamed.astype(str).values.tolist() == df.astype(str).values.tolist()
+    crud.files.delete_source(obj_id=datasource_in.uuid, mimetype=mimetype)
@@ -0,0 +1,191 @@
+import base64
+import re
+from typing import Callable
+from uuid import uuid4
+
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.models.reference import Reference
+from app.schema_types import MimeType
+from app.schemas.resource import ResourceCreate
+from app.schemas.templates import DataSourceTemplateModel
+from app.tests.utils.project import create_random_project
+from app.tests.utils.reference import create_random_crosswalk_resource, get_random_source, import_random_source
+from app.tests.utils.resource import create_random_resource
+from app.tests.utils.task import create_random_task
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string, spy
+
+
+def is_reference_query(statement: str) -> bool:
+    # Excludes the refreshes of objects expired by a commit, e.g. the user
+    return re.match(r"\s*SELECT\b.*\bFROM reference\b", statement, flags=re.DOTALL) is not None
+
+
+def test_get_multi_by_hash_is_one_query(db: Session, count_statements: Callable) -> None:
+    user = create_random_user(db)
+    with count_statements() as statements:
+        crud.reference.get_multi_by_hash(db=db, hash=random_lower_string(), user=user)
+    assert len(statements) == 1
+
+
+def test_get_by_model_is_one_query(db: Session, count_statements: Callable) -> None:
+    user = create_random_user(db)
+    with count_statements() as statements:
+        crud.reference.get_by_model(db=db, model_id=uuid4(), user=user)
+    assert len(statements) == 1
+
+
+def test_find_crosswalk_prospects_is_one_query(db: Session, count_statements: Callable) -> None:
+    user = create_random_user(db)
+    schema_subject = Reference(id=uuid4())
+    schema_object = Reference(id=uuid4())
+    with count_statements() as statements:
+        crud.reference.find_crosswalk_prospects(
+            db=db, schema_subject=schema_subject, schema_object=schema_object, user=user
+        )
+    assert len(statements) == 1
+
+
+def test_import_source_hash_lookups(db: Session, count_statements: Callable, monkeypatch: pytest.MonkeyPatch) -> None:
+    # A single-sheet import looks up its source checksum, its data checksum and its column terms by hash: one query
+    # each, however many roles grant the user access
+    user = create_random_user(db)
+    project = create_random_project(db, user=user)
+    task = create_random_task(db, user=user, project=project)
+    for _ in range(2):
+        create_random_resource(db, user=user, task=create_random_task(db, user=user, project=project))
+    lookups = []
+    get_multi_by_hash = crud.reference.get_multi_by_hash
+
+    def counted_get_multi_by_hash(*args, **kwargs) -> list[Reference]:
+        with count_statements() as statements:
+            db_objs = get_multi_by_hash(*args, **kwargs)
+        lookups.append(len([statement for statement in statements if is_reference_query(statement)]))
+        return db_objs
+
+    monkeypatch.setattr(crud.reference, "get_multi_by_hash", counted_get_multi_by_hash)
+    rows = "\n".join([f"{i},{random_lower_string()}" for i in range(10)])
+    source = base64.b64encode(f"ident,name\n{rows}\n".encode("utf-8")).decode("utf-8")
+    datasource_in = crud.files.import_source(
+        source=source, mimetype=MimeType.CSV, datasource_in=DataSourceTemplateModel(name="test.csv")
+    )
+    crud.reference.import_source(db=db, user=user, datasource_in=datasource_in, task=task)
+    assert lookups == [1, 1, 1]
+    assert crud.resource.get_multi(db=db, user=user, task_obj=task)
+
+
+def test_perform_transform_reuse_does_not_read_source(db: Session, monkeypatch: pytest.MonkeyPatch) -> None:
+    user = create_random_user(db)
+    resource_obj = create_random_crosswalk_resource(db, user=user)
+    assert crud.reference.perform_transform(db=db, resource_obj=resource_obj, user=user)
+    db.refresh(resource_obj)
+    # The same data and crosswalk, in another resource
+    keys = ["task_id", "datasource_id", "data_id", "schema_subject_id", "schema_object_id", "crosswalk_id"]
+    resource_in = ResourceCreate(name=random_lower_string(), **{key: getattr(resource_obj, key) for key in keys})
+    other_obj = crud.resource.create(db=db, obj_in=resource_in, user=user)
+    get_data_model = spy(monkeypatch, crud.reference, "get_data_model")
+    assert crud.reference.perform_transform(db=db, resource_obj=other_obj, user=user)
+    db.refresh(other_obj)
+    assert other_obj.transformdata_id == resource_obj.transformdata_id
+    get_data_model.assert_not_called()
+    assert crud.reference.perform_transform(db=db, resource_obj=other_obj, user=user, force=True)
+    assert [c.kwargs["resource_obj"].id for c in get_data_model.call_args_list] == [other_obj.id]
+
+
+def test_import_source_canonical_copy(db: Session) -> None:
+    # Identical data, imported by two users, shares one Parquet copy, from which every read is made
+    source = get_random_source()
+    resource_objs = []
+    for _ in range(2):
+        user = create_random_user(db)
+        task = create_random_task(db, user=user)
+        datasource_in = crud.files.import_source(
+            source=source, mimetype=MimeType.CSV, datasource_in=DataSourceTemplateModel(name="test.csv")
+        )
+        crud.reference.import_source(db=db, user=user, datasource_in=datasource_in, task=task)
+        resource_objs.append(crud.resource.get_multi(db=db, user=user, task_obj=task)[0])
+    blob_obj = resource_objs[0].data.blob
+    assert blob_obj.mime_type == MimeType.PARQUET
+    assert resource_objs[1].data.blob.id == blob_obj.id
+    db.refresh(blob_obj)
+    assert blob_obj.refcount == 2
+    data_in = crud.reference.get_data_model(resource_obj=resource_objs[0])
+    assert data_in.path.endswith(f"{blob_obj.checksum}.PARQUET")
+    assert pq.read_table(data_in.path).num_rows == 10
+    data_in = crud.reference.get_data_model(resource_obj=resource_objs[0], columns=["name"])
+    assert [c.name for c in data_in.columns] == ["name"]
+
+
+def test_preview_transform_reuses_steps(db: Session, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "WHYQD_PREVIEW_ROWS", 5)
+    user = create_random_user(db)
+    resource_obj = create_random_crosswalk_resource(db, user=user, rows=25)
+    crosswalk_dfn = crud.reference.get_crosswalk_definition(db_obj=resource_obj, refresh_schema=True)
+    crosswalk_dfn.actions.add_multi(terms=[f"RENAME > '{name}' < ['{name}']" for name in ["ident", "name", "value"]])
+    sample = crud.reference.get_preview_sample(resource_obj=resource_obj, crosswalk_dfn=crosswalk_dfn)
+    assert len(sample) == 5
+    rows, steps = crud.reference.preview_transform(crosswalk_dfn=crosswalk_dfn, sample=sample)
+    assert len(rows) == 5
+    scripts = [action.script for action in crosswalk_dfn.actions.get_all()]
+    assert [script for script, _ in steps] == scripts
+    assert len(scripts) == 3
+    transform = spy(monkeypatch, crosswalk_dfn.actions, "transform")
+    assert crud.reference.preview_transform(crosswalk_dfn=crosswalk_dfn, sample=sample, steps=steps)[0] == rows
+    transform.assert_not_called()
+    # Only the actions from the first change are applied again
+    steps = steps[:1] + [("changed", df) for _, df in steps[1:]]
+    assert crud.reference.preview_transform(crosswalk_dfn=crosswalk_dfn, sample=sample, steps=steps)[0] == rows
+    assert [c.kwargs["script"] for c in transform.call_args_list] == scripts[1:]
+
+
+def test_import_source_catalogues_statistics(db: Session) -> None:
+    user = create_random_user(db)
+    task = create_random_task(db, user=user)
+    datasource_in = crud.files.import_source(
+        source=get_random_source(rows=20), mimetype=MimeType.CSV, datasource_in=DataSourceTemplateModel(name="t.csv")
+    )
+    crud.reference.import_source(db=db, user=user, datasource_in=datasource_in, task=task)
+    resource_obj = crud.resource.get_multi(db=db, user=user, task_obj=task)[0]
+    statistics = crud.files.get_column_statistics(obj_id=resource_obj.data.model)
+    assert [c["name"] for c in statistics] == ["ident", "name", "value"]
+    ident = crud.files.get_column_statistics(obj_id=resource_obj.data.model, name="ident")
+    assert (ident["count"], ident["nullCount"], ident["distinct"], len(ident["categories"])) == (20, 0, 20, 20)
+    assert ident["typeConfidence"]["integer"] == 1.0
+    # Checked against the catalogue, rather than the data
+    assert crud.reference.get_dtype_confidence(
+        resource_obj=resource_obj, field_name="ident", dtype="integer"
+    ) == 1.0
+
+
+def test_derive_multi_schema_categories(db: Session, monkeypatch: pytest.MonkeyPatch) -> None:
+    user = create_random_user(db)
+    resource_obj = import_random_source(db, user=user)
+    names = [c["value"] for c in crud.files.get_column_statistics(obj_id=resource_obj.data.model, name="name")["top"]]
+    get_data_model = spy(monkeypatch, crud.reference, "get_data_model")
+    update = spy(monkeypatch, crud.reference, "update")
+    fields = {"name": "term", "value": "boolean"}
+    crud.reference.derive_multi_schema_categories(db=db, resource_obj=resource_obj, user=user, fields=fields)
+    # Catalogued categories, so no columns are read
+    assert [c.kwargs.get("columns") for c in get_data_model.call_args_list] == [None]
+    assert [c.kwargs["id"] for c in update.call_args_list] == [resource_obj.schema_subject.id]
+    schema_in = crud.reference.get_model(db_obj=resource_obj.schema_subject)
+    categories = {f.name: [c.name for c in f.constraints.category or []] for f in schema_in.fields if f.constraints}
+    assert set(names) <= set(categories["name"])
+    assert len(categories["name"]) == 10
+    assert categories["value"] == [True, False]
+    # Without a catalogue, the columns are read together, once, for a single update
+    crud.files.delete_column_statistics(obj_id=resource_obj.data.model)
+    get_data_model.reset_mock()
+    update.reset_mock()
+    fields = {"ident": "term", "name": "term"}
+    crud.reference.derive_multi_schema_categories(db=db, resource_obj=resource_obj, user=user, fields=fields)
+    assert [c.kwargs.get("columns") for c in get_data_model.call_args_list] == [None, ["ident", "name"]]
+    assert [c.kwargs["id"] for c in update.call_args_list] == [resource_obj.schema_subject.id]
+    schema_in = crud.reference.get_model(db_obj=resource_obj.schema_subject)
+    categories = {f.name: [c.name for c in f.constraints.category or []] for f in schema_in.fields if f.constraints}
+    assert len(categories["ident"]) == len(categories["name"]) == 10
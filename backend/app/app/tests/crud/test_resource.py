@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.schema_types import StateType
+from app.tests.utils.project import create_random_project
+from app.tests.utils.resource import create_random_resource
+from app.tests.utils.task import create_random_task
+from app.tests.utils.user import create_random_user
+
+
+@pytest.mark.parametrize("scope", ["project", "task", "resource"])
+def test_report_follows_role_changes(db: Session, scope: str) -> None:
+    # Cached reports are per user, so a new role must invalidate them for every scope it reaches
+    user = create_random_user(db)
+    project = create_random_project(db, user=user)
+    task = create_random_task(db, user=user, project=project)
+    db_obj = create_random_resource(db, user=user, task=task)
+    db_obj.state = StateType.COMPLETE
+    db.add(db_obj)
+    db.commit()
+    seeker = create_random_user(db)
+    assert not crud.resource.get_report(db=db, user=seeker, project_obj=project).data
+    assert not crud.resource.get_report(db=db, user=seeker, task_obj=task).data
+    role_obj = {"project": project, "task": task, "resource": db_obj}[scope]
+    crud.role.create(db=db, user=seeker, db_obj=role_obj, is_validated=True)
+    assert [data.value for data in crud.resource.get_report(db=db, user=seeker, project_obj=project).data] == [1]
+    assert [data.value for data in crud.resource.get_report(db=db, user=seeker, task_obj=task).data] == [1]
+
+
+def test_alert_and_custodian_follow_latest_activity(db: Session) -> None:
+    # Only the latest activity of a resource counts
+    user = create_random_user(db)
+    task = create_random_task(db, user=user)
+    db_obj = create_random_resource(db, user=user, task=task)
+    other_obj = create_random_resource(db, user=user, task=task)
+    assert not crud.resource.get_multi(db=db, user=user, task_obj=task, alert=True)
+    assert not crud.resource.get_multi(db=db, user=user, task_obj=task, custodian=True)
+    crud.resource.record_activity(db=db, user=user, db_obj=db_obj, alert=True, message="Alert.")
+    crud.resource.record_activity(db=db, user=user, db_obj=other_obj, custodians_only=True, message="Custodians.")
+    assert [r.id for r in crud.resource.get_multi(db=db, user=user, task_obj=task, alert=True)] == [db_obj.id]
+    assert [r.id for r in crud.resource.get_multi(db=db, user=user, task_obj=task, custodian=True)] == [other_obj.id]
+    crud.resource.record_activity(db=db, user=user, db_obj=db_obj, message="Resolved.")
+    assert not crud.resource.get_multi(db=db, user=user, task_obj=task, alert=True)
+    assert [r.id for r in crud.resource.get_multi(db=db, user=user, task_obj=task, custodian=True)] == [other_obj.id]
+
+
+def test_check_and_refresh_latest_activity(db: Session) -> None:
+    user = create_random_user(db)
+    db_obj = create_random_resource(db, user=user)
+    latest_activity_at = db_obj.latest_activity_at
+    assert latest_activity_at == db_obj.latest_activity.created
+    assert db_obj.id not in [drift["id"] for drift in crud.resource.check_latest_activity(db=db)]
+    db_obj.latest_activity_at = None
+    db.commit()
+    drifts = [drift for drift in crud.resource.check_latest_activity(db=db) if drift["id"] == db_obj.id]
+    assert drifts == [{"id": db_obj.id, "latest_activity_at": None, "latest_activity": latest_activity_at}]
+    assert crud.resource.refresh_latest_activity(db=db) >= 1
+    assert not crud.resource.check_latest_activity(db=db)
+    db.refresh(db_obj)
+    assert db_obj.latest_activity_at == latest_activity_at
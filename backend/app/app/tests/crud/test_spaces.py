@@ -0,0 +1,148 @@
+import hashlib
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.crud.crud_spaces import spaces
+
+
+class FakeBody:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def iter_chunks(self):
+        yield self.content
+
+    def read(self) -> bytes:
+        return self.content
+
+
+class FakeObject:
+    # Records the calls made on a bucket object. Only a GET is expected, and `content_length` (a HEAD) fails.
+    # Without content, the key is missing.
+    def __init__(self, content: bytes | None, calls: list):
+        self.content = content
+        self.calls = calls
+
+    @property
+    def content_length(self) -> int:
+        raise AssertionError("HEAD request made.")
+
+    def load(self) -> None:
+        raise AssertionError("HEAD request made.")
+
+    def get(self, Range: str | None = None) -> dict:
+        self.calls.append(Range)
+        if self.content is None:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        if not Range:
+            return {"Body": FakeBody(self.content), "ContentLength": len(self.content)}
+        start, _, end = Range.removeprefix("bytes=").partition("-")
+        size = len(self.content)
+        start, end = (size - int(end), size - 1) if not start else (int(start), int(end) if end else size - 1)
+        if start >= size:
+            error = {"Code": "InvalidRange", "ActualObjectSize": str(size)}
+            raise ClientError({"Error": error}, "GetObject")
+        end = min(end, size - 1)
+        return {
+            "Body": FakeBody(self.content[start : end + 1]),
+            "ContentLength": end - start + 1,
+            "ContentRange": f"bytes {start}-{end}/{size}",
+        }
+
+
+class FakeBucket:
+    def __init__(self, contents: dict[str, bytes], calls: list):
+        self.contents = contents
+        self.calls = calls
+
+    def Object(self, key: str) -> FakeObject:
+        return FakeObject(self.contents.get(key), self.calls)
+
+
+class FakeClient:
+    # Multipart upload calls, with each part kept by number. `fail_part` raises on that part.
+    def __init__(self, fail_part: int | None = None):
+        self.parts = {}
+        self.completed = None
+        self.aborted = False
+        self.fail_part = fail_part
+
+    def create_multipart_upload(self, Bucket: str, Key: str) -> dict:
+        return {"UploadId": "upload"}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes) -> dict:
+        if PartNumber == self.fail_part:
+            raise ValueError("Part failed.")
+        self.parts[PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict) -> None:
+        self.completed = MultipartUpload["Parts"]
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> None:
+        self.aborted = True
+
+
+@pytest.fixture
+def bucket_calls(monkeypatch) -> list:
+    calls = []
+    contents = {"source.CSV": b"0123456789", "model.SCHEMA": b'{"name": "model"}'}
+    monkeypatch.setattr(spaces, "bucket", FakeBucket(contents, calls))
+    monkeypatch.setattr(spaces, "use_manifest", False)
+    return calls
+
+
+def test_get_stream_single_get(bucket_calls: list) -> None:
+    stream, size, byte_range = spaces.get_stream(filename="source.CSV")
+    assert b"".join(stream) == b"0123456789"
+    assert (size, byte_range) == (10, None)
+    stream, size, byte_range = spaces.get_stream(filename="source.CSV", byte_range="bytes=2-4")
+    assert b"".join(stream) == b"234"
+    assert (size, byte_range) == (10, (2, 4))
+    stream, size, byte_range = spaces.get_stream(filename="source.CSV", byte_range="bytes=-3")
+    assert b"".join(stream) == b"789"
+    assert (size, byte_range) == (10, (7, 9))
+    assert spaces.get_stream(filename="source.CSV", byte_range="bytes=10-") == (None, 10, None)
+    assert bucket_calls == [None, "bytes=2-4", "bytes=-3", "bytes=10-"]
+
+
+def test_get_single_get(bucket_calls: list, monkeypatch) -> None:
+    assert spaces.get(filename="model.SCHEMA") == {"name": "model"}
+    # A missing key is a miss, from the GET alone
+    assert spaces.get(filename="missing.SCHEMA") is None
+    assert spaces.get_stream(filename="missing.CSV") is None
+    assert bucket_calls == [None, None, None]
+    # With a manifest, a miss makes no request at all
+    monkeypatch.setattr(spaces, "use_manifest", True)
+    monkeypatch.setattr(spaces, "manifest", {"model.SCHEMA"})
+    monkeypatch.setattr(spaces, "manifest_refreshed", time.monotonic())
+    assert spaces.get(filename="missing.SCHEMA") is None
+    assert spaces.get(filename="model.SCHEMA") == {"name": "model"}
+    assert bucket_calls == [None, None, None, None]
+
+
+def test_save_stream_multipart(monkeypatch) -> None:
+    df = pd.DataFrame({"ident": range(1000), "name": [f"name-{i}" for i in range(1000)]})
+    monkeypatch.setattr(settings, "SPACES_MULTIPART_CHUNKSIZE", 2000)
+    monkeypatch.setattr(spaces, "use_manifest", False)
+    client = FakeClient()
+    monkeypatch.setattr(spaces, "space", SimpleNamespace(meta=SimpleNamespace(client=client)))
+    checksum = spaces.save_stream(filename="source.CSV", df=df)
+    assert len(client.parts) > 1
+    assert all(len(client.parts[n]) >= 2000 for n in range(1, len(client.parts)))
+    content = df.to_csv(index=False).encode("utf-8")
+    assert b"".join(client.parts[n] for n in sorted(client.parts)) == content
+    assert checksum == hashlib.blake2b(content).hexdigest()
+    assert client.completed == [{"ETag": f"etag-{n}", "PartNumber": n} for n in range(1, len(client.parts) + 1)]
+    # A failed part aborts the upload
+    client = FakeClient(fail_part=2)
+    monkeypatch.setattr(spaces, "space", SimpleNamespace(meta=SimpleNamespace(client=client)))
+    with pytest.raises(ValueError):
+        spaces.save_stream(filename="source.CSV", df=df)
+    assert client.aborted
+    assert client.completed is None
@@ -0,0 +1,68 @@
+import uuid
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.models.activity import Activity
+from app.tests.utils.task import create_random_task
+from app.tests.utils.user import create_random_user
+from app.worker import process_batch_transform, process_transform_batch
+
+
+def test_transform_batch_reports_progress(db: Session) -> None:
+    user = create_random_user(db)
+    task = create_random_task(db, user=user)
+    batch_obj = crud.transform_batch.create(db=db, user=user, db_obj=task, total=3)
+    activity_obj = db.get(Activity, batch_obj.activity_id)
+    assert activity_obj.task_id == task.id
+    assert activity_obj.message == f"Batch transform of `{task.name}`: 0 of 3 resources complete, 3 in progress."
+    assert not crud.transform_batch.record(db=db, id=batch_obj.id, name="first", complete=True)
+    db.refresh(activity_obj)
+    assert activity_obj.message == f"Batch transform of `{task.name}`: 1 of 3 resources complete, 2 in progress."
+    assert not crud.transform_batch.record(db=db, id=batch_obj.id, name="second", complete=False)
+    db.refresh(activity_obj)
+    assert activity_obj.message == (
+        f"Batch transform of `{task.name}`: 1 of 3 resources complete, 1 in progress. Failed: `second`."
+    )
+    # A failure is only an alert once the batch is finished
+    assert not activity_obj.alert
+    assert crud.transform_batch.record(db=db, id=batch_obj.id, name="third", complete=True)
+    db.refresh(activity_obj)
+    assert activity_obj.message == f"Batch transform of `{task.name}`: 2 of 3 resources complete. Failed: `second`."
+    assert activity_obj.alert
+
+
+def test_transform_batch_without_failures_is_not_an_alert(db: Session) -> None:
+    user = create_random_user(db)
+    task = create_random_task(db, user=user)
+    batch_obj = crud.transform_batch.create(db=db, user=user, db_obj=task, total=1)
+    assert crud.transform_batch.record(db=db, id=batch_obj.id, name="only", complete=True)
+    activity_obj = db.get(Activity, batch_obj.activity_id)
+    db.refresh(activity_obj)
+    assert activity_obj.message == f"Batch transform of `{task.name}`: 1 of 1 resources complete."
+    assert not activity_obj.alert
+    assert not crud.transform_batch.record(db=db, id=uuid.uuid4(), name="unknown", complete=True)
+
+
+def test_batch_transform_not_found(db: Session) -> None:
+    user = create_random_user(db)
+    obj_id = str(uuid.uuid4())
+    response = process_batch_transform(str(user.id), obj_id, [str(uuid.uuid4())])
+    assert response == f"Process batch transform not started: task or project not found - {obj_id}"
+
+
+def test_transform_batch_without_user_fails_members(db: Session) -> None:
+    # The user may be deleted between the fan-out and the chunk running
+    user = create_random_user(db)
+    task = create_random_task(db, user=user)
+    batch_obj = crud.transform_batch.create(db=db, user=user, db_obj=task, total=2)
+    resource_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+    response = process_transform_batch(str(uuid.uuid4()), str(batch_obj.id), resource_ids)
+    assert response == f"Process transform batch not run: user not found - {batch_obj.id}"
+    activity_obj = db.get(Activity, batch_obj.activity_id)
+    db.refresh(activity_obj)
+    assert activity_obj.message == (
+        f"Batch transform of `{task.name}`: 0 of 2 resources complete."
+        f" Failed: `{resource_ids[0]}`, `{resource_ids[1]}`."
+    )
+    assert activity_obj.alert
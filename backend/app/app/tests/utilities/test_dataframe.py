@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import modin.pandas as mpd
+import pandas
+import pytest
+
+from app.core.config import settings
+from app.utilities import DataSourceReader, get_column_statistics, get_engine, to_pandas
+
+
+@pytest.fixture
+def thresholds(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "DATAFRAME_MODIN_BYTES", 100)
+    monkeypatch.setattr(settings, "DATAFRAME_MODIN_ROWS", 10)
+
+
+def test_get_engine(thresholds) -> None:
+    assert get_engine(size=100) is pandas
+    assert get_engine(size=101) is mpd
+    assert get_engine(nrows=10) is pandas
+    assert get_engine(nrows=11) is mpd
+    # Either under its threshold is enough
+    assert get_engine(size=101, nrows=5) is pandas
+    assert get_engine() is mpd
+
+
+def test_reader_picks_engine_by_size(thresholds, tmp_path: Path) -> None:
+    reader = DataSourceReader()
+    source = tmp_path / "small.csv"
+    source.write_text("ident,name\n1,a\n2,b\n")
+    df = reader.read_csv(source=source)
+    assert isinstance(df, pandas.DataFrame)
+    assert df.values.tolist() == [[1, "a"], [2, "b"]]
+    assert to_pandas(df) is df
+    source = tmp_path / "large.csv"
+    source.write_text("ident,name\n" + "".join(f"{i},a\n" for i in range(50)))
+    assert reader.get_source_engine(source=source) is mpd
+    assert reader.get_source_engine(source=source, nrows=5) is pandas
+    assert isinstance(reader.read_csv(source=source, nrows=5), pandas.DataFrame)
+
+
+def test_get_column_statistics(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "STATISTICS_TOP_VALUES", 2)
+    monkeypatch.setattr(settings, "STATISTICS_CATEGORIES", 3)
+    monkeypatch.setattr(settings, "STATISTICS_HISTOGRAM_BINS", 2)
+    df = pandas.DataFrame(
+        {
+            "value": [1.0, 2.0, 2.0, 4.0, None],
+            "term": ["a", "b", "b", "c", "d"],
+            "flag": ["yes", "no", "yes", "1", None],
+        }
+    )
+    value, term, flag = get_column_statistics(df=df)
+    assert (value["count"], value["nullCount"], value["distinct"]) == (5, 1, 3)
+    assert value["top"][0] == {"value": 2.0, "count": 2}
+    assert value["categories"] == [1.0, 2.0, 4.0]
+    assert (value["minimum"], value["maximum"]) == (1.0, 4.0)
+    assert value["histogram"] == {"edges": [1.0, 2.5, 4.0], "counts": [3, 1]}
+    assert value["typeConfidence"]["integer"] == 1.0
+    # Too many distinct values to categorise, and no range for strings
+    assert term["distinct"] == 4
+    assert "categories" not in term
+    assert "minimum" not in term
+    assert term["typeConfidence"]["number"] == 0.0
+    assert flag["typeConfidence"]["boolean"] == 1.0
+    assert flag["typeConfidence"]["integer"] == 0.25
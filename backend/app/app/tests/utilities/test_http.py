@@ -0,0 +1,61 @@
+import pytest
+
+from app.utilities import etag_matches, get_byte_range, get_content_range, get_etag, parse_byte_range
+
+
+@pytest.mark.parametrize(
+    "range_header, byte_range",
+    [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, None)),
+        ("bytes=-50", (None, 50)),
+        (None, None),
+        ("", None),
+        ("items=0-99", None),
+        ("bytes=0-9,20-29", None),
+        ("bytes=a-b", None),
+        ("bytes=-", None),
+        ("bytes=10-5", None),
+    ],
+)
+def test_parse_byte_range(range_header, byte_range) -> None:
+    assert parse_byte_range(range_header) == byte_range
+
+
+@pytest.mark.parametrize(
+    "range_header, byte_range",
+    [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=990-2000", (990, 999)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-50", (950, 999)),
+        ("bytes=-5000", (0, 999)),
+        ("bytes=0-9,20-29", None),
+        (None, None),
+    ],
+)
+def test_get_byte_range(range_header, byte_range) -> None:
+    assert get_byte_range(range_header=range_header, size=1000) == byte_range
+
+
+@pytest.mark.parametrize("range_header, size", [("bytes=1000-", 1000), ("bytes=-0", 1000), ("bytes=-10", 0)])
+def test_get_byte_range_not_satisfiable(range_header, size) -> None:
+    with pytest.raises(ValueError):
+        get_byte_range(range_header=range_header, size=size)
+
+
+def test_get_content_range() -> None:
+    assert get_content_range("bytes 0-99/1234") == (0, 99, 1234)
+    for content_range in ["bytes */1234", "items 0-99/1234", "bytes 0-99/*"]:
+        with pytest.raises(ValueError):
+            get_content_range(content_range)
+
+
+def test_etag_matches() -> None:
+    etag = get_etag("abc")
+    assert etag == '"abc"'
+    assert etag_matches(etag=etag, if_none_match='"abc"')
+    assert etag_matches(etag=etag, if_none_match='"xyz", W/"abc"')
+    assert etag_matches(etag=etag, if_none_match="*")
+    assert not etag_matches(etag=etag, if_none_match='"xyz"')
+    assert not etag_matches(etag=etag, if_none_match=None)
@@ -0,0 +1,10 @@
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.schemas.project import ProjectCreate
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_project(db: Session, *, user: models.User) -> models.Project:
+    project_in = ProjectCreate(name=random_lower_string(), title=random_lower_string())
+    return crud.project.create(db=db, obj_in=project_in, user=user)
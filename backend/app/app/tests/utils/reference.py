@@ -0,0 +1,49 @@
+import base64
+from typing import Optional
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.schema_types import MimeType, ReferenceType
+from app.schemas.templates import DataSourceTemplateModel
+from app.tests.utils.task import create_random_task
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_reference(db: Session, *, model_type: ReferenceType = ReferenceType.DATA) -> models.Reference:
+    db_obj = models.Reference(name=random_lower_string(), model=uuid4(), model_type=model_type)
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+
+def get_random_source(*, rows: int = 10) -> str:
+    # A base64-encoded CSV, as a source upload
+    lines = "\n".join([f"{i},{random_lower_string()},{i * 1.5}" for i in range(rows)])
+    return base64.b64encode(f"ident,name,value\n{lines}\n".encode("utf-8")).decode("utf-8")
+
+
+def import_random_source(
+    db: Session, *, user: models.User, task: Optional[models.Task] = None, rows: int = 10
+) -> models.Resource:
+    if task is None:
+        task = create_random_task(db, user=user)
+    datasource_in = crud.files.import_source(
+        source=get_random_source(rows=rows),
+        mimetype=MimeType.CSV,
+        datasource_in=DataSourceTemplateModel(name=f"{random_lower_string()}.csv"),
+    )
+    crud.reference.import_source(db=db, user=user, datasource_in=datasource_in, task=task)
+    return crud.resource.get_multi(db=db, user=user, task_obj=task)[0]
+
+
+def create_random_crosswalk_resource(
+    db: Session, *, user: models.User, task: Optional[models.Task] = None, rows: int = 10
+) -> models.Resource:
+    # An imported source, crosswalked to its own derived schema, and ready to transform
+    resource_obj = import_random_source(db, user=user, task=task, rows=rows)
+    resource_obj.schema_object_id = resource_obj.schema_subject_id
+    db.commit()
+    return crud.reference.add_new_resource_crosswalk(db=db, db_obj=resource_obj, user=user)
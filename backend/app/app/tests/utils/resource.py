@@ -0,0 +1,15 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.schemas.resource import ResourceCreate
+from app.tests.utils.task import create_random_task
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_resource(db: Session, *, user: models.User, task: Optional[models.Task] = None) -> models.Resource:
+    if task is None:
+        task = create_random_task(db, user=user)
+    resource_in = ResourceCreate(name=random_lower_string(), title=random_lower_string(), task_id=task.id)
+    return crud.resource.create(db=db, obj_in=resource_in, user=user)
@@ -0,0 +1,15 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.schemas.task import TaskCreate
+from app.tests.utils.project import create_random_project
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_task(db: Session, *, user: models.User, project: Optional[models.Project] = None) -> models.Task:
+    if project is None:
+        project = create_random_project(db, user=user)
+    task_in = TaskCreate(name=random_lower_string(), title=random_lower_string(), project_id=project.id)
+    return crud.task.create(db=db, obj_in=task_in, user=user)
@@ -1,6 +1,9 @@
 import random
 import string
-from typing import Dict
+from typing import Any, Dict
+from unittest.mock import Mock
+
+import pytest
 
 from fastapi.testclient import TestClient
 
@@ -25,3 +28,10 @@ def get_superuser_token_headers(client: TestClient) -> Dict[str, str]:
     a_token = tokens["access_token"]
     headers = {"Authorization": f"Bearer {a_token}"}
     return headers
+
+
+def spy(monkeypatch: pytest.MonkeyPatch, obj: Any, name: str) -> Mock:
+    # Calls through to the original, recording each call in `call_args_list`
+    wrapped = Mock(wraps=getattr(obj, name))
+    monkeypatch.setattr(obj, name, wrapped)
+    return wrapped
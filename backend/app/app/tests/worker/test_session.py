@@ -0,0 +1,22 @@
+from sqlalchemy import text
+
+from app.worker import session
+
+
+def test_scoped_sessions_share_pooled_engine() -> None:
+    session.init_worker_engine()
+    engine = session.get_engine()
+    opened = session.get_connections_opened()
+    for _ in range(3):
+        SessionScoped = session.get_scoped_session()
+        db = SessionScoped()
+        assert db.get_bind() is engine
+        assert db.execute(text("SELECT 1")).scalar() == 1
+        db.close()
+        SessionScoped.remove()
+    # Every task after the first reuses the pooled connection
+    assert session.get_connections_opened() == opened + 1
+    # A new worker process starts with a pool of its own
+    session.init_worker_engine()
+    assert session.get_engine() is not engine
+    session.shutdown_worker_engine()
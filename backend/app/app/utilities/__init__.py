@@ -9,3 +9,14 @@ from .email import (  # noqa: F401
     send_successful_order_processing_error_email,
     send_admin_successful_order_processing_error_email,
 )
+from .http import (  # noqa: F401
+    CURSOR_HEADER,
+    get_etag,
+    get_last_modified,
+    etag_matches,
+    parse_byte_range,
+    get_byte_range,
+    get_content_range,
+    set_cursor_header,
+)
+from .dataframe import get_engine, to_pandas, get_column_statistics, DataSourceReader  # noqa: F401
@@ -0,0 +1,152 @@
+from __future__ import annotations
+from pathlib import Path
+from types import ModuleType
+import os
+import numpy as np
+import pandas
+import modin.pandas as mpd
+from whyqd.parsers import DataSourceParser
+
+from app.core.config import settings
+
+BOOLEAN_TERMS = ["true", "false", "yes", "no", "1", "0", "1.0", "0.0"]
+
+
+def get_engine(*, size: int | None = None, nrows: int | None = None) -> ModuleType:
+    # Plain pandas for small data, where modin's engine start-up and partitioning cost more than they save. `size` is
+    # bytes on disk, and `nrows` the rows to be read or held. Either being under its threshold is enough.
+    if nrows is not None and nrows <= settings.DATAFRAME_MODIN_ROWS:
+        return pandas
+    if size is not None and size <= settings.DATAFRAME_MODIN_BYTES:
+        return pandas
+    return mpd
+
+
+def to_pandas(df: pandas.DataFrame | mpd.DataFrame) -> pandas.DataFrame:
+    if isinstance(df, mpd.DataFrame):
+        return df.modin.to_pandas()
+    return df
+
+
+class DataSourceReader(DataSourceParser):
+    # whyqd's reader, but sources under the engine thresholds are read with plain pandas, and never start Ray.
+    # Everything downstream in whyqd (coercion, checksums, crosswalk actions) accepts either engine.
+    def get_source_engine(self, *, source: str | Path, nrows: int | None = None) -> ModuleType:
+        try:
+            size = os.path.getsize(source)
+        except (OSError, TypeError):
+            size = None
+        return get_engine(size=size, nrows=nrows)
+
+    def read_excel(self, *, source: str | Path, **kwargs) -> dict[str, pandas.DataFrame] | pandas.DataFrame:
+        if self.get_source_engine(source=source, nrows=kwargs.get("nrows")) is mpd:
+            return super().read_excel(source=source, **kwargs)
+        df = pandas.read_excel(source, **kwargs)
+        if not isinstance(df, dict):
+            return df
+        # As for whyqd, empty sheets are dropped, and a single sheet is returned as a DataFrame
+        df = {k: v for k, v in df.items() if not v.empty}
+        if len(df) == 1:
+            return next(iter(df.values()))
+        return df
+
+    def read_csv(self, *, source: str | Path, **kwargs) -> pandas.DataFrame:
+        if self.get_source_engine(source=source, nrows=kwargs.get("nrows")) is mpd:
+            return super().read_csv(source=source, **kwargs)
+        kwargs["encoding_errors"] = "ignore"
+        kwargs["engine"] = "python"
+        return pandas.read_csv(source, **kwargs)
+
+    def read_parquet(self, *, source: str | Path, nrows: int | None = None, **kwargs) -> pandas.DataFrame:
+        if nrows or self.get_source_engine(source=source) is mpd:
+            # whyqd already reads the first rows with pyarrow
+            return super().read_parquet(source=source, nrows=nrows, **kwargs)
+        if "engine" not in kwargs:
+            kwargs["engine"] = "pyarrow"
+        return pandas.read_parquet(source, **kwargs)
+
+    def read_feather(self, *, source: str | Path, **kwargs) -> pandas.DataFrame:
+        if self.get_source_engine(source=source) is mpd:
+            return super().read_feather(source=source, **kwargs)
+        return pandas.read_feather(source, **kwargs)
+
+
+def to_native(value):
+    # JSON-ready scalar, from numpy and pandas types
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def get_type_confidence(*, counts: pandas.Series) -> dict[str, float]:
+    # Share of values which can be read as each type. Only distinct values are parsed (the most frequent, for columns
+    # with many), and weighted by their counts, so a column is never parsed row by row.
+    counts = counts.iloc[: settings.STATISTICS_TYPE_SAMPLE]
+    total = counts.sum()
+    if not total:
+        return {}
+    values = counts.index.to_series(index=counts.index)
+    if pandas.api.types.is_bool_dtype(values):
+        return {"boolean": 1.0}
+    if pandas.api.types.is_datetime64_any_dtype(values):
+        return {"datetime": 1.0}
+    numbers = pandas.to_numeric(values, errors="coerce")
+    integers = numbers.notna() & (numbers == numbers.round())
+    booleans = values.astype(str).str.strip().str.lower().isin(BOOLEAN_TERMS)
+    if pandas.api.types.is_numeric_dtype(values):
+        datetimes = pandas.Series(False, index=values.index)
+    else:
+        # Numbers are not read as dates, even where a date parser would accept them
+        datetimes = pandas.to_datetime(values.astype(str), errors="coerce", format="mixed").notna() & numbers.isna()
+    return {
+        term: round(float(counts[mask.to_numpy()].sum() / total), 4)
+        for term, mask in {
+            "integer": integers,
+            "number": numbers.notna(),
+            "boolean": booleans,
+            "datetime": datetimes,
+        }.items()
+    }
+
+
+def get_column_statistics(*, df: pandas.DataFrame | mpd.DataFrame) -> list[dict]:
+    # Per-column profile: nulls, distinct values, most frequent values (and every value, if few enough to categorise),
+    # range, type confidence, and a histogram for numbers. One `value_counts` pass per column supplies most of it.
+    df = to_pandas(df)
+    statistics = []
+    for name in df.columns:
+        column = df[name]
+        values = column.dropna()
+        try:
+            counts = values.value_counts(sort=False)
+            top = counts.nlargest(settings.STATISTICS_TOP_VALUES)
+        except TypeError:
+            # Unhashable values, e.g. lists
+            values = values.astype(str)
+            counts = values.value_counts(sort=False)
+            top = counts.nlargest(settings.STATISTICS_TOP_VALUES)
+        column_statistics = {
+            "name": str(name),
+            "dtype": str(column.dtype),
+            "count": len(column),
+            "nullCount": int(len(column) - len(values)),
+            "distinct": len(counts),
+            "top": [{"value": to_native(k), "count": int(v)} for k, v in top.items()],
+            "typeConfidence": get_type_confidence(counts=counts.sort_values(ascending=False)),
+        }
+        if len(counts) <= settings.STATISTICS_CATEGORIES:
+            column_statistics["categories"] = [to_native(k) for k in counts.index]
+        is_number = pandas.api.types.is_numeric_dtype(column) and not pandas.api.types.is_bool_dtype(column)
+        if len(values) and (is_number or pandas.api.types.is_datetime64_any_dtype(column)):
+            column_statistics["minimum"] = to_native(values.min())
+            column_statistics["maximum"] = to_native(values.max())
+        if len(values) and is_number:
+            finite = values.to_numpy(dtype="float64")
+            finite = finite[np.isfinite(finite)]
+            if len(finite):
+                histogram, edges = np.histogram(finite, bins=settings.STATISTICS_HISTOGRAM_BINS)
+                column_statistics["histogram"] = {"edges": edges.tolist(), "counts": histogram.tolist()}
+        statistics.append(column_statistics)
+    return statistics
@@ -0,0 +1,75 @@
+from __future__ import annotations
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from fastapi import Response
+
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+def get_etag(checksum: str) -> str:
+    # Strong validator. Checksums are of the stored bytes, so identical content always has an identical ETag.
+    return f'"{checksum}"'
+
+
+def get_last_modified(modified: datetime) -> str:
+    return format_datetime(modified.astimezone(timezone.utc), usegmt=True)
+
+
+def etag_matches(*, etag: str, if_none_match: str | None) -> bool:
+    # `If-None-Match` uses weak comparison, and may be a list of ETags, or "*"
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+def parse_byte_range(range_header: str | None) -> tuple[int | None, int | None] | None:
+    # Parse a single `bytes=` range into its (first, last) byte positions, as given. `first` is None for a suffix range
+    # of the last `last` bytes, and `last` is None for an open range. Returns None if the whole content should be sent,
+    # i.e. there is no range, it is malformed, or it asks for multiple ranges.
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start, _, end = range_header.removeprefix("bytes=").strip().partition("-")
+    if not (start + end).isdigit():
+        return None
+    start = int(start) if start else None
+    end = int(end) if end else None
+    if start is not None and end is not None and end < start:
+        return None
+    return start, end
+
+
+def get_byte_range(*, range_header: str | None, size: int) -> tuple[int, int] | None:
+    # Resolve a single `bytes=` range against the content size, into an inclusive (start, end). Returns None if the
+    # whole content should be sent. Raises ValueError if unsatisfiable.
+    byte_range = parse_byte_range(range_header)
+    if not byte_range:
+        return None
+    start, end = byte_range
+    if start is None:
+        # Suffix range, the last `end` bytes
+        if not end or not size:
+            raise ValueError("Range not satisfiable.")
+        return max(0, size - end), size - 1
+    end = size - 1 if end is None else end
+    if start >= size:
+        raise ValueError("Range not satisfiable.")
+    return start, min(end, size - 1)
+
+
+def get_content_range(content_range: str) -> tuple[int, int, int]:
+    # Parse a `Content-Range` of bytes sent, e.g. "bytes 0-99/1234", into an inclusive (start, end), and the size
+    unit, _, sent = content_range.strip().partition(" ")
+    byte_range, _, size = sent.partition("/")
+    start, _, end = byte_range.partition("-")
+    if unit != "bytes" or not (start.isdigit() and end.isdigit() and size.isdigit()):
+        raise ValueError(f"Invalid Content-Range: {content_range}")
+    return int(start), int(end), int(size)
+
+
+def set_cursor_header(*, response: Response, cursor: str | None) -> None:
+    # The keyset cursor of the next page of a list, if there is one. Pass it back as `cursor` to continue.
+    if cursor:
+        response.headers[CURSOR_HEADER] = cursor
@@ -1,4 +1,12 @@
 from app.core.celery_app import celery_app  # noqa: F401
 
 # from .tests import test_celery  # noqa: F401
-from .transform import process_data_import, process_schema_categorisation, process_transform  # noqa: F401
+from .transform import (  # noqa: F401
+    process_data_import,
+    process_upload_import,
+    process_schema_categorisation,
+    process_schema_multi_categorisation,
+    process_transform,
+    process_batch_transform,
+    process_transform_batch,
+)
@@ -1,22 +1,37 @@
-from sqlalchemy import create_engine, MetaData
+from __future__ import annotations
+import logging
+import threading
+from celery import signals
+from sqlalchemy import create_engine, event, Engine
 from sqlalchemy.orm import sessionmaker, scoped_session
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
 
-def get_scoped_session():
-    # https://github.com/tiangolo/full-stack-fastapi-postgresql/issues/68#issuecomment-537883784
-    # Method of use:
-    #     SessionScoped = get_scoped_session()
-    #     db = SessionScoped()
-    #     ...
-    #     db.close()
-    #     SessionScoped.remove()
-    # Has to be *inside* the function calling it to ensure that it is an independent session.
+# One engine, and one session factory, per worker process. Created on `worker_process_init` (i.e. after the fork from
+# the Celery parent) and reused by every task that process runs. Connections are pooled, so there is no per-task
+# connection setup, and no per-task `MetaData.reflect`. The ORM models already know the schema.
+_engine: Engine | None = None
+_session_factory: sessionmaker | None = None
+_lock = threading.Lock()
+# Count of DBAPI connections opened by this process, and per-task baselines, so we can confirm the pool is reused
+_connections_opened = 0
+_task_connections: dict[str, int] = {}
+
+
+def _on_connect(dbapi_connection, connection_record) -> None:
+    global _connections_opened
+    _connections_opened += 1
+
+
+def _create_engine() -> Engine:
     engine = create_engine(
         settings.SQLALCHEMY_DATABASE_URI.unicode_string(),
         pool_pre_ping=True,
-        pool_recycle=3600,  # this line might not be needed
+        pool_size=settings.WORKER_POOL_SIZE,
+        max_overflow=settings.WORKER_POOL_OVERFLOW,
+        pool_recycle=settings.WORKER_POOL_RECYCLE,
         connect_args={
             "keepalives": 1,
             "keepalives_idle": 30,
@@ -24,9 +39,79 @@ def get_scoped_session():
             "keepalives_count": 5,
         },
     )
-    meta = MetaData()
-    meta.reflect(bind=engine)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    SessionScoped = scoped_session(SessionLocal)
-    # Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    return SessionScoped
+    event.listen(engine, "connect", _on_connect)
+    return engine
+
+
+def get_engine() -> Engine:
+    global _engine, _session_factory
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                _engine = _create_engine()
+                _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+    return _engine
+
+
+def dispose_engine() -> None:
+    # Drop any pooled connections. Must not be shared across a fork - the child gets its own sockets.
+    global _engine, _session_factory
+    with _lock:
+        if _engine is not None:
+            # `close=False` so the child does not close sockets still owned by the parent
+            _engine.dispose(close=False)
+        _engine = None
+        _session_factory = None
+
+
+def get_scoped_session() -> scoped_session:
+    # https://github.com/tiangolo/full-stack-fastapi-postgresql/issues/68#issuecomment-537883784
+    # Method of use:
+    #     SessionScoped = get_scoped_session()
+    #     db = SessionScoped()
+    #     ...
+    #     db.close()
+    #     SessionScoped.remove()
+    # Each call returns an independent scoped session, but all share the process-wide pooled engine.
+    get_engine()
+    return scoped_session(_session_factory)
+
+
+def get_connections_opened() -> int:
+    return _connections_opened
+
+
+###################################################################################################
+# WORKER SIGNALS
+###################################################################################################
+@signals.worker_process_init.connect
+def init_worker_engine(**kwargs) -> None:
+    # https://docs.celeryq.dev/en/stable/userguide/signals.html#worker-process-init
+    # Anything inherited from the parent process is discarded, and a fresh pool created for this child
+    dispose_engine()
+    get_engine()
+    logger.info(f"Worker database engine initialised (pool size {settings.WORKER_POOL_SIZE}).")
+
+
+@signals.worker_process_shutdown.connect
+def shutdown_worker_engine(**kwargs) -> None:
+    global _engine, _session_factory
+    with _lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _session_factory = None
+
+
+@signals.task_prerun.connect
+def count_task_connections_start(task_id: str | None = None, **kwargs) -> None:
+    if task_id:
+        _task_connections[task_id] = _connections_opened
+
+
+@signals.task_postrun.connect
+def count_task_connections_end(task_id: str | None = None, task=None, **kwargs) -> None:
+    if task_id and task_id in _task_connections:
+        opened = _connections_opened - _task_connections.pop(task_id)
+        name = getattr(task, "name", task_id)
+        logger.info(f"Task {name} opened {opened} database connection(s) ({_connections_opened} for this process).")
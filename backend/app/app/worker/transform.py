@@ -1,5 +1,6 @@
 from raven import Client
-from typing import Union, List
+from typing import Union, List, Dict
+from celery import group
 from whyqd.parsers.datasource import DataSourceParser
 
 from app.core.celery_app import celery_app
@@ -12,9 +13,15 @@ client_sentry = Client(settings.SENTRY_DSN)
 
 @celery_app.task(name="app.worker.process_data_import")  # (acks_late=True)
 def process_data_import(
-    user_id: str, datasource_in: dict, sourceURL: Union[str, None] = None, task_id: Union[str, None] = None
+    user_id: str,
+    datasource_in: dict,
+    sourceURL: Union[str, None] = None,
+    task_id: Union[str, None] = None,
+    upload_id: Union[str, None] = None,
+    checksum: Union[str, None] = None,
 ) -> str:
     # call with celery_app.send_task("app.worker.process_data_import", args=[user_id, datasource_in, task_id])
+    # presigned uploads add `upload_id` and, optionally, the expected `checksum`
     SessionScoped = get_scoped_session()
     db = SessionScoped()
     # GET DEPENDENCIES
@@ -24,6 +31,16 @@ def process_data_import(
     if task_id:
         task_obj = crud.task.get(db=db, id=task_id, user=user_obj, responsibility=schema_types.RoleType.WRANGLER)
     # PROCESS
+    if upload_id:
+        try:
+            datasource_in = crud.files.import_source_from_presigned(
+                upload_id=upload_id, datasource_in=datasource_in, checksum=checksum
+            )
+        except ValueError as e:
+            crud.reference.record_rejected_source(db=db, user=user_obj, message=str(e))
+            db.close()
+            SessionScoped.remove()
+            return f"Process data import rejected: {datasource_in.name}, {user_obj.email}"
     crud.reference.import_source(db=db, user=user_obj, datasource_in=datasource_in, sourceURL=sourceURL, task=task_obj)
     response = f"Process data import complete: {datasource_in.name}, {user_obj.email}"
     if task_obj:
@@ -33,6 +50,42 @@ def process_data_import(
     return response
 
 
+@celery_app.task(name="app.worker.process_upload_import")  # (acks_late=True)
+def process_upload_import(user_id: str, upload_id: str, checksum: str) -> str:
+    # call with celery_app.send_task("app.worker.process_upload_import", args=[user_id, upload_id, checksum])
+    # Finalizes a resumable upload. The assembled source is hashed, and stored, here rather than in the request.
+    SessionScoped = get_scoped_session()
+    db = SessionScoped()
+    # GET DEPENDENCIES
+    user_obj = crud.user.get(db=db, id=user_id)
+    upload_obj = crud.upload.get(db=db, id=upload_id, user=user_obj) if user_obj else None
+    if not upload_obj:
+        db.close()
+        SessionScoped.remove()
+        return f"Process upload import not started: upload not found - {upload_id}"
+    sourceURL = upload_obj.sourceURL
+    task_obj = None
+    if upload_obj.task_id:
+        task_obj = crud.task.get(
+            db=db, id=upload_obj.task_id, user=user_obj, responsibility=schema_types.RoleType.WRANGLER
+        )
+    # PROCESS
+    try:
+        datasource_in = crud.upload.finalize(db=db, db_obj=upload_obj, checksum=checksum)
+    except ValueError as e:
+        source_name = upload_obj.datasource.get("name")
+        response = f"Process upload import rejected: {source_name}, {user_obj.email}"
+        crud.reference.record_rejected_source(db=db, user=user_obj, message=f"For data import ({source_name}): - {e}")
+        db.close()
+        SessionScoped.remove()
+        return response
+    crud.reference.import_source(db=db, user=user_obj, datasource_in=datasource_in, sourceURL=sourceURL, task=task_obj)
+    response = f"Process upload import complete: {datasource_in.name}, {user_obj.email}"
+    db.close()
+    SessionScoped.remove()
+    return response
+
+
 @celery_app.task(name="app.worker.process_schema_categorisation")  # (acks_late=True)
 def process_schema_categorisation(user_id: str, resource_id: str, field_name: str, term_type: str) -> str:
     # call with celery_app.send_task("app.worker.process_schema_categorisation", args=[user_id, resource_id, field_name, term_type])
@@ -54,6 +107,27 @@ def process_schema_categorisation(user_id: str, resource_id: str, field_name: st
     return response
 
 
+@celery_app.task(name="app.worker.process_schema_multi_categorisation")  # (acks_late=True)
+def process_schema_multi_categorisation(user_id: str, resource_id: str, fields: Dict[str, str]) -> str:
+    # call with celery_app.send_task("app.worker.process_schema_multi_categorisation", args=[user_id, resource_id, fields])
+    # `fields` maps each field name to its term type
+    SessionScoped = get_scoped_session()
+    db = SessionScoped()
+    # GET DEPENDENCIES
+    user_obj = crud.user.get(db=db, id=user_id)
+    resource_obj = crud.resource.get(
+        db=db, id=resource_id, user=user_obj, responsibility=schema_types.RoleType.WRANGLER
+    )
+    # PROCESS
+    crud.reference.derive_multi_schema_categories(db=db, resource_obj=resource_obj, user=user_obj, fields=fields)
+    response = (
+        f"Process schema categorisation complete: {resource_obj.name}, {', '.join(fields)} - {user_obj.email}"
+    )
+    db.close()
+    SessionScoped.remove()
+    return response
+
+
 @celery_app.task(name="app.worker.process_schema_type_update")  # (acks_late=True)
 def process_schema_type_update(user_id: str, resource_id: str, field_name: str, dtype: str) -> str:
     # call with celery_app.send_task("app.worker.process_schema_type_update", args=[user_id, resource_id, field_name, dtype])
@@ -96,8 +170,10 @@ def process_create_multi_tasks_from_project(
 
 
 @celery_app.task(name="app.worker.process_transform")  # (acks_late=True)
-def process_transform(user_id: str, resource_id: str, mimetype: Union[str, None] = None) -> str:
-    # call with celery_app.send_task("app.worker.process_transform", args=[user_id, resource_id, mimetype])
+def process_transform(
+    user_id: str, resource_id: str, mimetype: Union[str, None] = None, force: bool = False, profile: bool = False
+) -> str:
+    # call with celery_app.send_task("app.worker.process_transform", args=[user_id, resource_id, mimetype, force, profile])
     SessionScoped = get_scoped_session()
     db = SessionScoped()
     # GET DEPENDENCIES
@@ -109,10 +185,91 @@ def process_transform(user_id: str, resource_id: str, mimetype: Union[str, None]
         reader = DataSourceParser()
         mimetype = reader.get_mimetype(mimetype=mimetype)
     # PROCESS
-    crud.reference.perform_transform(db=db, resource_obj=resource_obj, mimetype=mimetype, user=user_obj)
+    crud.reference.perform_transform(
+        db=db, resource_obj=resource_obj, mimetype=mimetype, user=user_obj, force=force, profile=profile
+    )
     response = f"Process transform complete: {resource_obj.name}, {user_obj.email}"
     if mimetype:
         response = f"Process data import complete: {resource_obj.name}, {user_obj.email} - {mimetype.name}"
     db.close()
     SessionScoped.remove()
     return response
+
+
+@celery_app.task(name="app.worker.process_batch_transform")  # (acks_late=True)
+def process_batch_transform(
+    user_id: str, obj_id: str, resource_ids: List[str], mimetype: Union[str, None] = None, force: bool = False
+) -> str:
+    # call with celery_app.send_task("app.worker.process_batch_transform", args=[user_id, obj_id, resource_ids, mimetype, force])
+    # `obj_id` is the task or project. Resources are split into at most TRANSFORM_BATCH_CONCURRENCY contiguous chunks,
+    # which run in parallel. Each chunk is transformed in turn by one worker, so resources sharing a crosswalk (ordered
+    # together by the caller) share its session and parsed crosswalk. A single activity on the task or project reports
+    # progress as each resource finishes, and the outcome once all have.
+    SessionScoped = get_scoped_session()
+    db = SessionScoped()
+    # GET DEPENDENCIES
+    user_obj = crud.user.get(db=db, id=user_id)
+    db_obj = None
+    if user_obj:
+        db_obj = crud.task.get(db=db, id=obj_id, user=user_obj, responsibility=schema_types.RoleType.WRANGLER)
+        if not db_obj:
+            db_obj = crud.project.get(db=db, id=obj_id, user=user_obj, responsibility=schema_types.RoleType.WRANGLER)
+    if not db_obj:
+        db.close()
+        SessionScoped.remove()
+        return f"Process batch transform not started: task or project not found - {obj_id}"
+    # PROCESS
+    batch_obj = crud.transform_batch.create(db=db, user=user_obj, db_obj=db_obj, total=len(resource_ids))
+    size = max(1, -(-len(resource_ids) // settings.TRANSFORM_BATCH_CONCURRENCY))
+    chunks = [resource_ids[i : i + size] for i in range(0, len(resource_ids), size)]
+    group(
+        celery_app.signature(
+            "app.worker.process_transform_batch", args=[user_id, str(batch_obj.id), chunk, mimetype, force]
+        )
+        for chunk in chunks
+    ).apply_async()
+    response = f"Process batch transform started: {len(resource_ids)} resources in {len(chunks)} chunks - {obj_id}"
+    db.close()
+    SessionScoped.remove()
+    return response
+
+
+@celery_app.task(name="app.worker.process_transform_batch")  # (acks_late=True)
+def process_transform_batch(
+    user_id: str, batch_id: str, resource_ids: List[str], mimetype: Union[str, None] = None, force: bool = False
+) -> str:
+    # Member of a batch transform. A failure is recorded, and does not stop the rest of the chunk.
+    SessionScoped = get_scoped_session()
+    db = SessionScoped()
+    # GET DEPENDENCIES
+    user_obj = crud.user.get(db=db, id=user_id)
+    if not user_obj:
+        # E.g. deleted since the fan-out. Every member is reported, so that the batch still finishes.
+        for resource_id in resource_ids:
+            crud.transform_batch.record(db=db, id=batch_id, name=resource_id, complete=False)
+        db.close()
+        SessionScoped.remove()
+        return f"Process transform batch not run: user not found - {batch_id}"
+    if mimetype:
+        reader = DataSourceParser()
+        mimetype = reader.get_mimetype(mimetype=mimetype)
+    # PROCESS
+    for resource_id in resource_ids:
+        resource_obj = crud.resource.get(
+            db=db, id=resource_id, user=user_obj, responsibility=schema_types.RoleType.WRANGLER
+        )
+        name = resource_obj.name if resource_obj else resource_id
+        complete = False
+        if resource_obj and resource_obj.state == schema_types.StateType.TRANSFORM_READY and resource_obj.crosswalk_id:
+            try:
+                complete = crud.reference.perform_transform(
+                    db=db, resource_obj=resource_obj, mimetype=mimetype, user=user_obj, force=force
+                )
+            except Exception:
+                db.rollback()
+                client_sentry.captureException()
+        crud.transform_batch.record(db=db, id=batch_id, name=name, complete=complete)
+    response = f"Process transform batch complete: {len(resource_ids)} resources - {batch_id}"
+    db.close()
+    SessionScoped.remove()
+    return response